@@ -1,10 +1,28 @@
 #include <Adafruit_NeoPixel.h>
+#include <util/crc16.h>
 
 #define LED_PIN         6 // Neopixels connected to D6
 #define NUM_LEDS        56
 #define LEDS_PER_CLUSTER 7
 #define NUM_CLUSTERS    (NUM_LEDS / LEDS_PER_CLUSTER)
 #define COLOR_ORDER     NEO_GRBW // Change as necessary
+#define BAUD_RATE       115200
+
+// Binary frames from main.py (see led_protocol.py):
+//   0xA5 0x5A type length payload[length] crc_hi crc_lo, CRC-16/XMODEM over type, length and payload
+// Every frame is answered with ACK, or NAK on a bad CRC. Single characters
+// ('0'-'7', 'r') still work until the first good frame arrives.
+#define SYNC1           0xA5
+#define SYNC2           0x5A
+#define MSG_FRAME       0x01 // NUM_LEDS x (r, g, b, w)
+#define MSG_HIGHLIGHT   0x02 // bit n highlights cluster n in white
+#define MSG_DELTA       0x03 // (cluster, r, g, b, w) per cluster
+#define MSG_RESET       0x04 // fade the highlights out, like 'r'
+#define ACK             0x06
+#define NAK             0x15
+#define FRAME_TIMEOUT   50   // ms a half-received frame is kept
+#define LINE_QUIET      5    // ms without bytes before strip.show() may run
+#define STREAM_TIMEOUT  1000 // ms after the last full frame before the rainbow comes back
 
 Adafruit_NeoPixel strip(NUM_LEDS, LED_PIN, COLOR_ORDER + NEO_KHZ800);
 
@@ -12,13 +30,24 @@ bool clusterHighlighted[NUM_CLUSTERS] = {false}; // Track which clusters are hig
 int fadeValue[NUM_CLUSTERS] = {0}; // Track the fade value for each cluster
 bool fading[NUM_CLUSTERS] = {false}; // Track whether a cluster is currently fading
 unsigned long previousMillis[NUM_CLUSTERS] = {0}; // Track the last update time for each cluster
+uint8_t clusterColor[NUM_CLUSTERS][4]; // Highlight colour of each cluster, faded out from there
 const long fadeInterval = 30; // Interval between fade steps in milliseconds
 const long rainbowInterval = 10; // Interval between hue updates in milliseconds
 
+enum ParserState { WAIT_SYNC1, WAIT_SYNC2, WAIT_TYPE, WAIT_LENGTH, WAIT_PAYLOAD, WAIT_CRC_HI, WAIT_CRC_LO };
+ParserState parserState = WAIT_SYNC1;
+uint8_t frameType, frameLength, payloadCount;
+uint8_t payload[255];
+uint16_t frameCrc;
+unsigned long lastByteMillis = 0;
+unsigned long lastFrameMillis = 0;
+bool binaryMode = false; // Set by the first good frame; single characters are ignored from then on
+bool streaming = false;  // Full frames are arriving, so the rainbow and fades stand still
+
 void setup() {
   strip.begin();
   strip.show(); // Initialize all pixels to 'off'
-  Serial.begin(9600);
+  Serial.begin(BAUD_RATE);
 }
 
 void loop() {
@@ -26,51 +55,171 @@ void loop() {
   brightness = map(brightness, 0, 1023, 0, 255);
   strip.setBrightness(brightness);
 
+  // Take everything the UART has. strip.show() stops interrupts for a couple
+  // of ms, so it is never called with a frame half received or bytes would be lost.
+  while (Serial.available() > 0) {
+    parseByte(Serial.read());
+  }
+  unsigned long currentMillis = millis();
+  if (parserState != WAIT_SYNC1 && currentMillis - lastByteMillis > FRAME_TIMEOUT) {
+    parserState = WAIT_SYNC1; // Bytes were lost; the host will send the frame again
+  }
+  if (parserState != WAIT_SYNC1 || currentMillis - lastByteMillis < LINE_QUIET) {
+    return; // Mid-frame, or the host may be about to resend or send the next frame
+  }
+  if (streaming) {
+    if (currentMillis - lastFrameMillis < STREAM_TIMEOUT) {
+      return;
+    }
+    streaming = false;
+  }
+
   // Apply a rotating rainbow effect to non-highlighted clusters
   static uint8_t hue = 0;
   static unsigned long lastRainbowUpdate = 0;
-  unsigned long currentMillis = millis();
 
   if (currentMillis - lastRainbowUpdate >= rainbowInterval) {
     lastRainbowUpdate = currentMillis;
     hue++;
-  }
 
-  for (int cluster = 0; cluster < NUM_CLUSTERS; cluster++) {
-    if (!clusterHighlighted[cluster] && !fading[cluster]) {
-      int clusterHue = (hue + cluster * 36) % 256; // Increment hue by cluster
-      uint32_t color = strip.ColorHSV(clusterHue * 65536 / 256, 255, 255); // RGB only, no white component
-      for (int i = cluster * LEDS_PER_CLUSTER; i < (cluster + 1) * LEDS_PER_CLUSTER; i++) {
-        strip.setPixelColor(i, color);
+    for (int cluster = 0; cluster < NUM_CLUSTERS; cluster++) {
+      if (!clusterHighlighted[cluster] && !fading[cluster]) {
+        int clusterHue = (hue + cluster * 36) % 256; // Increment hue by cluster
+        uint32_t color = strip.ColorHSV(clusterHue * 65536 / 256, 255, 255); // RGB only, no white component
+        for (int i = cluster * LEDS_PER_CLUSTER; i < (cluster + 1) * LEDS_PER_CLUSTER; i++) {
+          strip.setPixelColor(i, color);
+        }
       }
     }
-  }
-  strip.show();
-
-  // Check for incoming serial data
-  int incomingByte = Serial.read();
-  if (incomingByte != -1) {
-    if (incomingByte == 'r') { // Reset command
-      startFadeOut();
-    } else if (incomingByte >= '0' && incomingByte < ('0' + NUM_CLUSTERS)) {
-      int clusterIndex = incomingByte - '0';
-      highlightCluster(clusterIndex);
-    }
+    strip.show();
   }
 
   // Update fading clusters
   updateFadeOut();
 }
 
+void parseByte(uint8_t incomingByte) {
+  lastByteMillis = millis();
+  switch (parserState) {
+    case WAIT_SYNC1:
+      if (incomingByte == SYNC1) {
+        parserState = WAIT_SYNC2;
+      } else if (!binaryMode) {
+        legacyCommand(incomingByte);
+      }
+      break;
+    case WAIT_SYNC2:
+      parserState = (incomingByte == SYNC2) ? WAIT_TYPE : resync(incomingByte);
+      break;
+    case WAIT_TYPE:
+      if (incomingByte < MSG_FRAME || incomingByte > MSG_RESET) {
+        parserState = resync(incomingByte);
+        break;
+      }
+      frameType = incomingByte;
+      frameCrc = _crc_xmodem_update(0, incomingByte);
+      parserState = WAIT_LENGTH;
+      break;
+    case WAIT_LENGTH:
+      if (!lengthValid(frameType, incomingByte)) {
+        parserState = resync(incomingByte); // A byte went missing; don't wait for a payload that isn't coming
+        break;
+      }
+      frameLength = incomingByte;
+      payloadCount = 0;
+      frameCrc = _crc_xmodem_update(frameCrc, incomingByte);
+      parserState = frameLength > 0 ? WAIT_PAYLOAD : WAIT_CRC_HI;
+      break;
+    case WAIT_PAYLOAD:
+      payload[payloadCount++] = incomingByte;
+      frameCrc = _crc_xmodem_update(frameCrc, incomingByte);
+      if (payloadCount == frameLength) {
+        parserState = WAIT_CRC_HI;
+      }
+      break;
+    case WAIT_CRC_HI:
+      frameCrc ^= (uint16_t)incomingByte << 8;
+      parserState = WAIT_CRC_LO;
+      break;
+    case WAIT_CRC_LO:
+      parserState = WAIT_SYNC1;
+      if ((frameCrc ^ incomingByte) != 0) {
+        Serial.write(NAK);
+        break;
+      }
+      binaryMode = true;
+      handleFrame();
+      Serial.write(ACK); // After the show(), so the next frame can't arrive during it
+      break;
+  }
+}
+
+ParserState resync(uint8_t incomingByte) {
+  return incomingByte == SYNC1 ? WAIT_SYNC2 : WAIT_SYNC1;
+}
+
+bool lengthValid(uint8_t type, uint8_t length) {
+  switch (type) {
+    case MSG_FRAME:     return length == NUM_LEDS * 4;
+    case MSG_HIGHLIGHT: return length == 1;
+    case MSG_DELTA:     return length > 0 && length <= NUM_CLUSTERS * 5 && length % 5 == 0;
+    default:            return length == 0;
+  }
+}
+
+void legacyCommand(uint8_t incomingByte) {
+  if (incomingByte == 'r') { // Reset command
+    startFadeOut();
+  } else if (incomingByte >= '0' && incomingByte < ('0' + NUM_CLUSTERS)) {
+    int clusterIndex = incomingByte - '0';
+    highlightCluster(clusterIndex);
+  }
+}
+
+void handleFrame() {
+  if (frameType == MSG_FRAME) {
+    for (int i = 0; i < NUM_LEDS; i++) {
+      strip.setPixelColor(i, strip.Color(payload[4 * i], payload[4 * i + 1], payload[4 * i + 2], payload[4 * i + 3]));
+    }
+    strip.show();
+    streaming = true;
+    lastFrameMillis = millis();
+  } else if (frameType == MSG_HIGHLIGHT) {
+    for (int cluster = 0; cluster < NUM_CLUSTERS; cluster++) {
+      if (payload[0] & (1 << cluster)) {
+        setClusterColor(cluster, 255, 255, 255, 0);
+      }
+    }
+    strip.show();
+  } else if (frameType == MSG_DELTA) {
+    for (int i = 0; i < frameLength; i += 5) {
+      if (payload[i] < NUM_CLUSTERS) {
+        setClusterColor(payload[i], payload[i + 1], payload[i + 2], payload[i + 3], payload[i + 4]);
+      }
+    }
+    strip.show();
+  } else if (frameType == MSG_RESET) {
+    startFadeOut();
+  }
+}
+
 void highlightCluster(int clusterIndex) {
+  setClusterColor(clusterIndex, 255, 255, 255, 0); // RGB with no White
+  strip.show();
+}
+
+void setClusterColor(int clusterIndex, uint8_t r, uint8_t g, uint8_t b, uint8_t w) {
   clusterHighlighted[clusterIndex] = true;
   fading[clusterIndex] = false;
   fadeValue[clusterIndex] = 255;
+  clusterColor[clusterIndex][0] = r;
+  clusterColor[clusterIndex][1] = g;
+  clusterColor[clusterIndex][2] = b;
+  clusterColor[clusterIndex][3] = w;
   int startIndex = clusterIndex * LEDS_PER_CLUSTER;
   for (int i = startIndex; i < startIndex + LEDS_PER_CLUSTER; i++) {
-    strip.setPixelColor(i, strip.Color(255, 255, 255, 0)); // RGB with no White
+    strip.setPixelColor(i, strip.Color(r, g, b, w));
   }
-  strip.show();
 }
 
 void startFadeOut() {
@@ -94,9 +243,11 @@ void updateFadeOut() {
           fading[cluster] = false;
           clusterHighlighted[cluster] = false;
         }
+        uint8_t *color = clusterColor[cluster];
+        int level = fadeValue[cluster];
         int startIndex = cluster * LEDS_PER_CLUSTER;
         for (int i = startIndex; i < startIndex + LEDS_PER_CLUSTER; i++) {
-          strip.setPixelColor(i, strip.Color(fadeValue[cluster], fadeValue[cluster], fadeValue[cluster], 0));
+          strip.setPixelColor(i, strip.Color((uint16_t)color[0] * level / 255, (uint16_t)color[1] * level / 255, (uint16_t)color[2] * level / 255, (uint16_t)color[3] * level / 255));
         }
         strip.show();
       }
@@ -0,0 +1,144 @@
+import contextlib
+import fcntl
+import threading
+import time
+
+# Background sampling of the ADS1115 knobs (A0 search radius, A1 volume).
+#
+# The ADC runs in continuous-conversion mode. A thread goes round the channels,
+# switching the input multiplexer when there is more than one, waits for a
+# conversion on the new input and keeps the last few readings per channel.
+# With a single channel the input is only switched when the config register
+# shows someone else has moved it, and otherwise each sample is one read of
+# the conversion register. value() returns the median of the readings at once,
+# so callers never wait on the ADC. Each switch-and-read holds an flock on
+# lock_file (bus_lock), as do the one-shot reads in main.py and acquireData.py,
+# so the two scripts can share the chip without reading each other's channel.
+
+ADS1115_CONVERSION = 0x00
+ADS1115_CONFIG = 0x01
+DATA_RATES = {8: 0, 16: 1, 32: 2, 64: 3, 128: 4, 250: 5, 475: 6, 860: 7}  # samples per second -> DR bits
+LOCK_FILE = '/tmp/spacechimes_ads1115.lock'
+
+
+@contextlib.contextmanager
+def bus_lock(lock_file=LOCK_FILE):
+    # Exclusive use of the ADC for one switch-and-read
+    with open(lock_file, 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def continuous_config(channel, data_rate=128):
+    # Config register bytes: AINx against GND, +-6.144 V, continuous, comparator off
+    msb = 0x80 | ((4 + channel) << 4)
+    lsb = (DATA_RATES[data_rate] << 5) | 0x03
+    return [msb, lsb]
+
+
+def to_signed(data):
+    val = (data[0] << 8) | data[1]
+    return val - 65536 if val > 32767 else val
+
+
+class ADCService:
+    """
+    Samples channels of an ADS1115 on bus from a daemon thread, one channel
+    every interval seconds. raw(channel) is the median of the last window
+    readings, value(channel, full_scale) that reading inverted and
+    normalized the way the knobs always have been: (full_scale - raw) / full_scale.
+    on_change(), if set, is called from the thread whenever a channel's
+    median has moved more than change_threshold counts since it was last
+    called for that channel, so a caller can sleep until a knob is turned.
+    """
+
+    def __init__(self, bus, address=0x48, channels=(0, 1), interval=0.2, window=5, data_rate=128,
+                 lock_file=LOCK_FILE, on_change=None, change_threshold=0):
+        self.bus = bus
+        self.address = address
+        self.channels = list(channels)
+        self.interval = interval
+        self.window = window
+        self.data_rate = data_rate
+        self.lock_file = lock_file
+        self.on_change = on_change
+        self.change_threshold = change_threshold
+        self.readings = {channel: [] for channel in self.channels}
+        self.reported = {}  # median per channel when on_change was last called
+        self.samples = 0
+        self.switches = 0
+        self.errors = 0
+        self.lock = threading.Lock()
+        self.ready = threading.Event()
+        self.running = False
+        self.thread = None
+
+    def configured(self, config):
+        # Whether the chip is already converting with config (the OS bit reads back differently)
+        current = self.bus.read_i2c_block_data(self.address, ADS1115_CONFIG, 2)
+        return [current[0] & 0x7F, current[1]] == [config[0] & 0x7F, config[1]]
+
+    def sample(self, channel):
+        config = continuous_config(channel, self.data_rate)
+        with bus_lock(self.lock_file):
+            # Whoever last switched the input waited for its conversion before letting go of the lock
+            if len(self.channels) > 1 or not self.configured(config):
+                self.bus.write_i2c_block_data(self.address, ADS1115_CONFIG, config)
+                self.switches += 1
+                # The first full conversion on the new input is done within two periods
+                time.sleep(2.0 / self.data_rate)
+            return to_signed(self.bus.read_i2c_block_data(self.address, ADS1115_CONVERSION, 2))
+
+    def run(self):
+        while self.running:
+            for channel in self.channels:
+                try:
+                    reading = self.sample(channel)
+                except Exception as e:
+                    self.errors += 1
+                    print(e)
+                    continue
+                with self.lock:
+                    readings = self.readings[channel]
+                    readings.append(reading)
+                    if len(readings) > self.window:
+                        del readings[0]
+                    self.samples += 1
+                    if all(len(values) == self.window for values in self.readings.values()):
+                        self.ready.set()
+                    median = sorted(readings)[len(readings) // 2]
+                    changed = channel not in self.reported or abs(median - self.reported[channel]) > self.change_threshold
+                    if changed:
+                        self.reported[channel] = median
+                if changed and self.on_change is not None:
+                    self.on_change()
+            # At least a conversion period apart, so no reading is counted twice
+            time.sleep(max(self.interval, 1.0 / self.data_rate))
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+
+    def wait_ready(self, timeout=None):
+        # Block until every channel has a full window, e.g. for a one-off reading at startup
+        return self.ready.wait(timeout)
+
+    def raw(self, channel):
+        with self.lock:
+            readings = sorted(self.readings[channel])
+        if not readings:
+            return None
+        return readings[len(readings) // 2]
+
+    def value(self, channel, full_scale=32767):
+        raw = self.raw(channel)
+        if raw is None:
+            return None
+        return (full_scale - raw) / full_scale
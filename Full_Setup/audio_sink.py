@@ -0,0 +1,188 @@
+import contextlib
+import os
+import sys
+import threading
+import time
+import wave
+
+import numpy as np
+
+# Where the AudioEngine's blocks go. Each sink pulls blocks from the engine on
+# its own schedule for as long as it runs:
+#
+#   "pyaudio"  the sound card, one long-lived callback stream
+#   "wav"      a 16 bit WAV file, paced like a sound card (or as fast as possible)
+#   "null"     nowhere, paced like a sound card, for headless runs and profiling
+#
+# pyaudio is only imported by the "pyaudio" sink, so the others run on machines
+# without it or without a sound card.
+
+# The RIFF chunk size is 32 bits, so one 16 bit mono WAV file holds at most this
+# many frames, about 13.5 hours at 44.1 kHz
+MAX_WAV_FRAMES = (2 ** 32 - 1 - 36) // 2
+
+
+@contextlib.contextmanager
+def ignore_stderr():
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    old_stderr = os.dup(2)
+    sys.stderr.flush()
+    os.dup2(devnull, 2)
+    os.close(devnull)
+    try:
+        yield
+    finally:
+        os.dup2(old_stderr, 2)
+        os.close(old_stderr)
+
+
+def pcm16(block):
+    # Float block as 16 bit little-endian WAV frames
+    return (np.clip(block, -1.0, 1.0) * 32767).astype('<i2').tobytes()
+
+
+class WavFiles:
+    """
+    16 bit mono WAV output split into files of chunk_frames frames, named
+    <stem>_000.wav, <stem>_001.wav, ... Without chunk_frames it writes to
+    filename and only goes on to <stem>_001.wav, ... when a file is full.
+    filenames lists the files written so far.
+    """
+
+    def __init__(self, filename, rate, chunk_frames=None):
+        if chunk_frames is not None and not 0 < chunk_frames <= MAX_WAV_FRAMES:
+            raise ValueError(f"A WAV file holds 1 to {MAX_WAV_FRAMES} frames, got {chunk_frames}")
+        self.filename = filename
+        self.rate = rate
+        self.chunk_frames = chunk_frames
+        self.file = None
+        self.frames_in_file = 0
+        self.filenames = []
+
+    def open_next(self):
+        if self.file is not None:
+            self.file.close()
+        if self.chunk_frames is None and not self.filenames:
+            name = self.filename
+        else:
+            stem = self.filename[:-4] if self.filename.endswith('.wav') else self.filename
+            name = f"{stem}_{len(self.filenames):03d}.wav"
+        self.file = wave.open(name, 'wb')
+        self.file.setnchannels(1)
+        self.file.setsampwidth(2)
+        self.file.setframerate(self.rate)
+        self.filenames.append(name)
+        self.frames_in_file = 0
+
+    def write_pcm(self, frames):
+        # writeframes keeps the header current, so a file cut off by a crash still plays
+        self.file.writeframes(frames)
+
+    def write(self, block):
+        chunk_frames = MAX_WAV_FRAMES if self.chunk_frames is None else self.chunk_frames
+        while len(block):
+            if self.file is None or self.frames_in_file == chunk_frames:
+                self.open_next()
+            room = chunk_frames - self.frames_in_file
+            self.write_pcm(pcm16(block[:room]))
+            self.frames_in_file += min(room, len(block))
+            block = block[room:]
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class PyAudioSink:
+    def __init__(self, engine):
+        self.engine = engine
+        self.output_latency = 0.0
+        self.pyaudio = None
+        self.stream = None
+
+    def callback(self, in_data, frame_count, time_info, status):
+        return self.engine.render(frame_count).tobytes(), self.pyaudio.paContinue
+
+    def start(self):
+        import pyaudio
+        self.pyaudio = pyaudio
+        with ignore_stderr():
+            self.p = pyaudio.PyAudio()
+        self.stream = self.p.open(format=pyaudio.paFloat32, channels=1, rate=self.engine.rate, output=True,
+                                  frames_per_buffer=self.engine.block_size, stream_callback=self.callback)
+        self.stream.start_stream()
+        self.output_latency = self.stream.get_output_latency()
+        return self
+
+    def close(self):
+        self.stream.stop_stream()
+        self.stream.close()
+        self.p.terminate()
+
+
+class NullSink:
+    """
+    Renders blocks on a thread at the rate a sound card would take them,
+    and drops them. realtime=False renders as fast as possible instead.
+    """
+
+    def __init__(self, engine, realtime=True):
+        self.engine = engine
+        self.realtime = realtime
+        self.output_latency = 0.0
+        self.blocks = 0
+        self.render_seconds = 0.0  # time spent in engine.render, for profiling
+        self.running = False
+        self.thread = None
+
+    def write(self, block):
+        pass
+
+    def run(self):
+        block_seconds = self.engine.block_size / self.engine.rate
+        next_block = time.time()
+        while self.running:
+            began = time.perf_counter()
+            block = self.engine.render(self.engine.block_size)
+            self.render_seconds += time.perf_counter() - began
+            self.write(block)
+            self.blocks += 1
+            if self.realtime:
+                next_block += block_seconds
+                time.sleep(max(0.0, next_block - time.time()))
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def close(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+
+
+class WavSink(NullSink):
+    # Goes on in chimes_001.wav, ... when a file reaches the format's size limit
+    def __init__(self, engine, filename, realtime=True):
+        super().__init__(engine, realtime)
+        self.files = WavFiles(filename, engine.rate)
+
+    def write(self, block):
+        self.files.write(block)
+
+    def close(self):
+        super().close()
+        self.files.close()
+
+
+def open_sink(kind, engine, filename='chimes.wav', realtime=True):
+    if kind == "pyaudio":
+        return PyAudioSink(engine)
+    if kind == "wav":
+        return WavSink(engine, filename, realtime)
+    if kind == "null":
+        return NullSink(engine, realtime)
+    raise ValueError(f"Unknown audio sink {kind!r}, expected pyaudio, wav or null")
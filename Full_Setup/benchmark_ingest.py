@@ -0,0 +1,103 @@
+import multiprocessing
+import sys
+import threading
+import time
+import tracemalloc
+
+import requests
+
+import filter_pipeline
+import gp_stream
+from spacetrack_standin import start_standin
+from tests.gp_records import synthetic_catalog
+
+# Full GP download as JSON against the streamed CSV and 3LE ingest, through the
+# local space-track stand-in. Reports bytes on the wire, time to parsed records
+# (wall clock, which includes the stand-in building the response, and this
+# process's CPU) and peak Python memory for each, with and without the catalog filters applied
+# as records arrive, and with the filters written into the query so the stand-in applies them.
+# Then the time the local filter pipeline takes over what each query returns.
+#
+#   python benchmark_ingest.py [objects]
+
+DATA_PATH = '/basicspacedata/query/class/gp/decay_date/null-val/epoch/%3Enow-30/orderby/norad_cat_id/format/json'
+OBSERVER_LATITUDE = 29.76303
+# acquireData's catalog filters, with a perigee ceiling so every rule has something to do
+CATALOG_FILTERS = dict(filter_pipeline.DEFAULT_FILTERS, max_perigee_km=2000)
+
+
+def cheap_filter(entry, pipeline=filter_pipeline.FilterPipeline(CATALOG_FILTERS, (OBSERVER_LATITUDE, 0))):
+    # What acquireData's cheap_filter checks, without the logging
+    return pipeline.reason(entry) is None
+
+
+def serve(catalog, ready):
+    # The stand-in in its own process, so its work and memory stay out of the measurements
+    standin = start_standin(catalog)
+    ready.put(standin.base_url)
+    threading.Event().wait()
+
+
+def measure(base_url, fetch):
+    session = requests.Session()
+    session.post(base_url + '/ajaxauth/login', data={})
+    began, began_cpu = time.perf_counter(), time.process_time()
+    fetch(session)
+    seconds, cpu_seconds = time.perf_counter() - began, time.process_time() - began_cpu
+    tracemalloc.start()
+    records = fetch(session)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return records, seconds, cpu_seconds, peak
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 30000
+    ready = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(synthetic_catalog(count), ready), daemon=True)
+    server.start()
+    base_url = ready.get()
+    url = base_url + DATA_PATH
+    filtered_url = filter_pipeline.FilterPipeline(CATALOG_FILTERS, (OBSERVER_LATITUDE, 0)).query(url)
+    print(f"{count} objects")
+
+    def fetch_json(session):
+        return session.get(url).json()
+
+    runs = [("json, then filter", url, lambda session: [record for record in fetch_json(session) if cheap_filter(record)])]
+    for ingest_format in gp_stream.FORMATS:
+        query = gp_stream.compact_query(url, ingest_format)
+        runs.append((f"{ingest_format}", query, lambda session, f=ingest_format: gp_stream.fetch_records(session, url, f)))
+        runs.append((f"{ingest_format}, filter on the fly", query,
+                     lambda session, f=ingest_format: gp_stream.fetch_records(session, url, f, keep=cheap_filter)))
+        runs.append((f"{ingest_format}, server-side filters", gp_stream.compact_query(filtered_url, ingest_format),
+                     lambda session, f=ingest_format: gp_stream.fetch_records(session, filtered_url, f, keep=cheap_filter)))
+
+    results = {}
+    for name, query, fetch in runs:
+        sent = len(requests.get(query).content)
+        records, seconds, cpu_seconds, peak = measure(base_url, fetch)
+        results[name] = records
+        print(f"  {name:30s} {sent / 1e6:7.2f} MB sent  {seconds * 1000:6.0f} ms wall  {cpu_seconds * 1000:6.0f} ms client CPU  "
+              f"peak {peak / 1e6:6.1f} MB  {len(records)} records")
+
+    # The local filter pipeline over everything each query returns
+    session = requests.Session()
+    for name, query_url in [("local filters only", url), ("server-side filters", filtered_url)]:
+        records = gp_stream.fetch_records(session, query_url, "csv")
+        pipeline = filter_pipeline.FilterPipeline(CATALOG_FILTERS, (OBSERVER_LATITUDE, 0))
+        began = time.perf_counter()
+        kept = [record for record in records if pipeline.reason(record) is None]
+        seconds = time.perf_counter() - began
+        print(f"  {name:30s} {len(records):6d} records filtered in {seconds * 1000:5.1f} ms, {len(kept)} kept  {pipeline.counters}")
+    server.terminate()
+
+    # The streamed records carry the same values as the JSON ones
+    reference = {record['NORAD_CAT_ID']: record for record in results["json, then filter"]}
+    for name in ["csv, filter on the fly", "3le, filter on the fly", "csv, server-side filters", "3le, server-side filters"]:
+        assert len(results[name]) == len(reference), name
+        for record in results[name]:
+            original = reference[record['NORAD_CAT_ID']]
+            for field in ['OBJECT_ID', 'OBJECT_TYPE', 'TLE_LINE1', 'TLE_LINE2', 'INCLINATION', 'ECCENTRICITY', 'MEAN_MOTION']:
+                assert str(record[field]) == str(original[field]), (name, field, record[field], original[field])
+    print("Streamed records match the JSON ones")
@@ -0,0 +1,169 @@
+import random
+import sys
+import threading
+import time
+import numpy as np
+import audio_engine
+import audio_sink
+import voice_synth
+
+# Trigger latency and jitter of chimes: how long after the culmination time in
+# the pass table a chime actually starts at the speaker.
+#
+#   python benchmark_latency.py [passes]
+#
+# Runs the real AudioEngine and VoiceSynth on a simulated clock. The main loop
+# is modelled by what blocks it: the 1.1 s read_average_volume at the top of
+# check_pass_times, the 1 s sleep after the serial write and the loop's own
+# sleep, each with a little scheduler overshoot. Onsets are found in the
+# rendered output.
+#
+# Then the event loop and the lookahead are measured for real: a NullSink pulls
+# blocks on its own thread paced like a sound card, a thread sleeps until each
+# culmination (or lookahead seconds before it) and plays the chime, and every
+# block is stamped with time.time() as it is rendered. An onset counts as
+# heard at its block's timestamp plus its offset in the block plus the output
+# latency. This takes real scheduler and sleep jitter into account, but not the
+# sound card's: there is no DAC clock here, so a card whose callbacks come at
+# uneven times would add its own.
+
+RATE = 44100
+BLOCK = 1024
+OUTPUT_LATENCY = 2 * BLOCK / RATE
+VOLUME_READ = 10 * (0.1 + 0.01)  # read_average_volume: 10 samples of time.sleep(0.1) + time.sleep(0.01)
+
+
+def overshoot(rng):
+    # time.sleep() returns a little late
+    return rng.uniform(0.0, 0.002)
+
+
+def poll_loop(culminations, rng):
+    # Original loop: check_pass_times, then time.sleep(1), forever
+    actions = []
+    t = rng.uniform(0, 2.1)
+    remaining = list(culminations)
+    while remaining:
+        now = t
+        t += VOLUME_READ + 10 * overshoot(rng)
+        while remaining and remaining[0] <= now:
+            remaining.pop(0)
+            t += 1 + overshoot(rng)  # time.sleep(1) after the serial write
+            actions.append((t, None))
+        t += 1 + overshoot(rng)
+    return actions
+
+
+def event_loop(culminations, rng):
+    # Event-driven loop waking at each culmination, chime played by check_pass_times
+    actions = []
+    busy_until = 0.0
+    for culmination in culminations:
+        now = max(culmination + 0.01 + overshoot(rng), busy_until)
+        t = now + VOLUME_READ + 10 * overshoot(rng) + 1 + overshoot(rng)
+        actions.append((t, None))
+        busy_until = t
+    return actions
+
+
+def lookahead_loop(culminations, rng, lookahead=5):
+    # Event-driven loop queueing each chime lookahead seconds early at its exact frame
+    actions = []
+    busy_until = 0.0
+    for culmination in culminations:
+        now = max(culmination - lookahead + 0.01 + overshoot(rng), busy_until)
+        actions.append((now, culmination))
+        busy_until = now + VOLUME_READ + 10 * overshoot(rng) + 1 + overshoot(rng)
+    return actions
+
+
+def simulate(loop, culminations, seed=0):
+    # Onset latency in seconds of every chime
+    rng = random.Random(seed)
+    actions = sorted(loop(culminations, rng), key=lambda action: action[0])
+    clock = [0.0]
+    engine = audio_engine.AudioEngine(RATE, BLOCK, output_latency=OUTPUT_LATENCY, clock=lambda: clock[0])
+    synth = voice_synth.VoiceSynth(max_voices=32, rate=RATE, block_size=BLOCK)
+    engine.sources.append(synth)
+
+    blocks = []
+    end = culminations[-1] + 8
+    while clock[0] < end:
+        # Calls made by the main loop before this callback land in this block or later
+        while actions and actions[0][0] <= clock[0]:
+            t, culmination = actions.pop(0)
+            at_frame = None if culmination is None else engine.frame_at(culmination)
+            synth.play(1046.5, 2, -2, 0.8, at_frame)
+        blocks.append(engine.render(BLOCK))
+        clock[0] += BLOCK / RATE
+    output = np.concatenate(blocks)
+
+    sounding = np.flatnonzero(output != 0)
+    onsets = sounding[np.insert(np.diff(sounding) > RATE, 0, True)]
+    return onsets / RATE + OUTPUT_LATENCY - np.array(culminations)
+
+
+class StampedSink(audio_sink.NullSink):
+    # Keeps every block with the first frame and the wall clock time it was rendered at
+    def __init__(self, engine):
+        super().__init__(engine)
+        self.output = []
+        self.stamps = []
+
+    def write(self, block):
+        self.output.append(block)
+        self.stamps.append((self.engine.clock_frame, self.engine.clock_time))
+
+
+def play_at_culminations(engine, synth, culminations, lookahead):
+    # The main loop's part: wake at each culmination (or lookahead seconds before it) and play
+    for culmination in culminations:
+        wake = culmination - lookahead + 0.01 if lookahead else culmination + 0.01
+        time.sleep(max(0.0, wake - time.time()))
+        synth.play(1046.5, 0.5, -8, 0.8, engine.frame_at(culmination) if lookahead else None)
+
+
+def measure(culminations, lookahead):
+    # Onset latency in seconds of every chime, against real timestamps
+    engine = audio_engine.AudioEngine(RATE, BLOCK, output_latency=OUTPUT_LATENCY)
+    synth = voice_synth.VoiceSynth(max_voices=32, rate=RATE, block_size=BLOCK)
+    engine.sources.append(synth)
+    sink = StampedSink(engine).start()
+    player = threading.Thread(target=play_at_culminations, args=(engine, synth, culminations, lookahead))
+    player.start()
+    player.join()
+    time.sleep(max(0.0, culminations[-1] + 1 - time.time()))
+    sink.close()
+
+    output = np.concatenate(sink.output)
+    sounding = np.flatnonzero(output != 0)
+    onsets = sounding[np.insert(np.diff(sounding) > RATE // 2, 0, True)]
+    heard = []
+    for onset in onsets:
+        block_frame, block_time = sink.stamps[onset // BLOCK]
+        heard.append(block_time + (onset - block_frame) / RATE + OUTPUT_LATENCY)
+    return np.array(heard) - np.array(culminations)
+
+
+def report(name, latency):
+    latency = latency * 1000
+    print(f"{name:<22} mean {latency.mean():8.1f} ms   median {np.median(latency):8.1f}   "
+          f"p95 {np.percentile(latency, 95):8.1f}   max {latency.max():8.1f}   jitter (std) {latency.std():7.2f} ms")
+
+
+if __name__ == "__main__":
+    passes = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    rng = random.Random(1)
+    # Whole-second culminations, as in the pass table, far enough apart that 2 s chimes do not overlap
+    culminations = [10.0 + 7 * i + rng.randint(0, 2) for i in range(passes)]
+    print(f"Simulated clock, {passes} chimes")
+    report("poll, 1 s loop", simulate(poll_loop, culminations))
+    report("event loop", simulate(event_loop, culminations))
+    report("lookahead 5 s", simulate(lookahead_loop, culminations))
+
+    measured = passes // 5
+    print(f"Measured, {measured} chimes each against time.time() through a NullSink")
+    start = time.time() + 6
+    report("event loop", measure([start + 1.5 * i for i in range(measured)], 0))
+    start = time.time() + 6
+    report("lookahead 5 s", measure([start + 1.5 * i for i in range(measured)], 5))
@@ -0,0 +1,79 @@
+import sys
+import time
+import numpy as np
+import audio_engine
+import chime_bank
+import limiter
+
+# CPU per second of audio for the old whole-buffer renormalization against the
+# ring buffer and look-ahead limiter, with bursts of overlapping chimes.
+#
+#   python benchmark_limiter.py [seconds] [chimes per burst]
+
+RATE = 44100
+BLOCK = 1024
+
+
+def burst_schedule(seconds, burst):
+    # (block, chime) pairs: every 6 s a breakup's worth of 8 s chimes over half a second
+    notes = [783.99, 932.33, 1046.5, 1174.66, 1396.91, 1567.98, 1864.66, 2093.0]
+    chimes = [(chime_bank.render_chime(frequency, 8, -0.5), 0.8) for frequency in notes]
+    chimes = [(volume * np.clip(dry + volume * wet, -1, 1)).astype(np.float32) for (dry, wet), volume in chimes]
+    schedule = {}
+    for start in np.arange(1, seconds - 8, 6):
+        for i in range(burst):
+            block = int((start + 0.5 * i / burst) * RATE / BLOCK)
+            schedule.setdefault(block, []).append(chimes[i % len(chimes)])
+    return schedule
+
+
+def renormalize(schedule, blocks):
+    # mix_new_sound and audio_playback_thread as they were before the ring buffer
+    sound_buffer = np.zeros(RATE)
+    output = []
+    for block in range(blocks):
+        for new_waveform in schedule.get(block, []):
+            if len(new_waveform) > len(sound_buffer):
+                sound_buffer = np.append(sound_buffer, np.zeros(len(new_waveform) - len(sound_buffer)))
+            sound_buffer[:len(new_waveform)] += new_waveform
+            max_val = np.max(np.abs(sound_buffer))
+            if max_val > 1.0:
+                sound_buffer /= max_val
+        output.append(sound_buffer[:BLOCK].astype(np.float32))
+        sound_buffer = np.roll(sound_buffer, -BLOCK)
+        sound_buffer[-BLOCK:] = 0
+    return np.concatenate(output)
+
+
+def limited(schedule, blocks):
+    engine = audio_engine.AudioEngine(RATE, BLOCK)
+    engine.limiter = limiter.PeakLimiter(RATE)
+    output = []
+    for block in range(blocks):
+        for new_waveform in schedule.get(block, []):
+            engine.mix(new_waveform)
+        output.append(engine.render(BLOCK))
+    return np.concatenate(output)
+
+
+def level_steps(output):
+    # Largest change in level between neighbouring 10 ms windows while something plays, in dB
+    window = RATE // 100
+    frames = len(output) // window * window
+    rms = np.sqrt(np.mean(output[:frames].reshape(-1, window) ** 2, axis=1))
+    playing = rms > 1e-3
+    steps = np.abs(np.diff(20 * np.log10(np.maximum(rms, 1e-9))))[playing[1:] & playing[:-1]]
+    return steps.max()
+
+
+if __name__ == "__main__":
+    seconds = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    burst = int(sys.argv[2]) if len(sys.argv) > 2 else 24
+    schedule = burst_schedule(seconds, burst)
+    blocks = seconds * RATE // BLOCK
+    for name, mixer in [("renormalize", renormalize), ("ring + limiter", limited)]:
+        began = time.process_time()
+        output = mixer(schedule, blocks)
+        cost = time.process_time() - began
+        print(f"{name:<16} {cost / seconds * 1000:8.2f} ms CPU per second of audio   "
+              f"peak {np.max(np.abs(output)):.3f}   largest level step {level_steps(output):5.1f} dB")
@@ -0,0 +1,72 @@
+import os
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+import numpy as np
+from skyfield.api import load
+
+import batch_propagation
+import pass_cache
+from tests.gp_records import synthetic_catalog, with_checksum
+
+# Cost of each pass search run in main.py's "rolling" mode against the "daily"
+# rebuild. The daily run searches the whole catalog over the horizon; a rolling
+# run an hour later, at a different knob radius, only searches the hour that has
+# opened up and the objects with new elements, and reads the rest from the pass
+# cache. Times include loading and saving the cache.
+#
+#   python benchmark_rolling.py [objects] [percent of objects with new elements per hour]
+
+OBSERVER = (29.76303, -95.362061)
+
+
+def search(entries, start_time, end_time, radius):
+    return batch_propagation.batch_next_pass_details(entries, OBSERVER, radius, start_time, end_time.tt - start_time.tt)
+
+
+def new_elements(entry):
+    # The same orbit with an epoch a second later, so the cache sees an update
+    tle_line1 = entry['TLE_LINE1']
+    epoch = float(tle_line1[18:32]) + 1 / 86400.0
+    return dict(entry, TLE_LINE1=with_checksum(tle_line1[:18] + f"{epoch:014.8f}" + tle_line1[32:]))
+
+
+def timed(function, *args):
+    began = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - began, result
+
+
+def benchmark(count, updated_percent):
+    ts = load.timescale()
+    entries = synthetic_catalog(count, seed=1)
+    start = ts.now()
+    later = start + timedelta(hours=1)
+    rng = np.random.default_rng(1)
+    updated = set(rng.choice(count, int(count * updated_percent / 100), replace=False).tolist())
+    later_entries = [new_elements(entry) if i in updated else entry for i, entry in enumerate(entries)]
+
+    daily_cost, _ = timed(search, entries, start, start + timedelta(days=1), 300.0)
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, 'pass_cache.json')
+        first_cost, _ = timed(pass_cache.cached_pass_details, entries, OBSERVER, 300.0, start, search, filename)
+        rolling_cost, rolling = timed(pass_cache.cached_pass_details, later_entries, OBSERVER, 412.7, later, search, filename)
+        cache_size = os.path.getsize(filename)
+    fresh_cost, fresh = timed(search, later_entries, later, later + timedelta(days=1), 412.7)
+
+    rolling_passes = sum(len(pass_events) for _, pass_events in rolling)
+    fresh_passes = sum(len(pass_events) for _, pass_events in fresh)
+    print(f"\n{count} objects, {len(updated)} with new elements an hour later")
+    print(f"  daily rebuild, no cache        {daily_cost:7.2f} s")
+    print(f"  first rolling run, empty cache {first_cost:7.2f} s")
+    print(f"  next rolling run, 1 h later    {rolling_cost:7.2f} s   ({24 * rolling_cost:.1f} s a day, "
+          f"cache {cache_size / 1e6:.1f} MB)")
+    print(f"  passes: rolling {rolling_passes}, fresh search {fresh_passes} ({fresh_cost:.2f} s)")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    updated_percent = float(sys.argv[2]) if len(sys.argv) > 2 else 2.0
+    benchmark(count, updated_percent)
@@ -0,0 +1,84 @@
+import datetime
+import random
+import sys
+import time
+import trigger_index
+
+# Per-tick cost of the old check_pass_times scan against the PassSchedule index.
+#
+#   python benchmark_triggers.py [10000 100000 1000000]
+
+
+def synthetic_passes(count, start):
+    # count passes spread over the 24 hours after start, sorted like debris_data.json
+    passes = []
+    for i in range(count):
+        culmination = start + datetime.timedelta(seconds=random.uniform(0, 86400))
+        passes.append({
+            'object_id': f"BENCH-{i}",
+            'object_name': "BENCH DEB",
+            'rcs': 'SMALL',
+            'culmination_time': culmination.strftime('%Y-%m-%d %H:%M:%S'),
+            'altitude_km': 800.0,
+            'distance_km': 100.0
+        })
+    passes.sort(key=lambda x: x['culmination_time'])
+    return passes
+
+
+def scan_tick(debris_data, triggered_alerts, now):
+    # The loop check_pass_times used to run every second
+    for object_id in list(triggered_alerts.keys()):
+        if now > triggered_alerts[object_id]:
+            del triggered_alerts[object_id]
+    due = []
+    for debris in debris_data:
+        pass_datetime = datetime.datetime.strptime(debris['culmination_time'], '%Y-%m-%d %H:%M:%S')
+        expiry_time = pass_datetime + datetime.timedelta(minutes=30)
+        if pass_datetime > (now - datetime.timedelta(minutes=1)) and now >= pass_datetime and now <= expiry_time and debris['object_id'] not in triggered_alerts:
+            triggered_alerts[debris['object_id']] = expiry_time
+            due.append(debris)
+    return due
+
+
+def indexed_tick(schedule, triggered_alerts, now):
+    triggered_alerts.expire(now)
+    due = []
+    for debris in schedule.due(now):
+        if debris['object_id'] not in triggered_alerts:
+            triggered_alerts.add(debris['object_id'], now + 30 * 60)
+            due.append(debris)
+    return due
+
+
+def benchmark(count, ticks=1000):
+    start = datetime.datetime(2024, 8, 25, 22, 0, 0)
+    passes = synthetic_passes(count, start)
+    start_epoch = (start - datetime.datetime(1970, 1, 1)).total_seconds()
+
+    # The old scan is far too slow to run for many ticks at the larger sizes
+    scan_ticks = max(1, min(ticks, 1000000 // count))
+    triggered_alerts = {}
+    began = time.perf_counter()
+    for tick in range(scan_ticks):
+        scan_tick(passes, triggered_alerts, start + datetime.timedelta(hours=12, seconds=tick))
+    scan_cost = (time.perf_counter() - began) / scan_ticks
+
+    began = time.perf_counter()
+    schedule = trigger_index.PassSchedule(passes)
+    build_cost = time.perf_counter() - began
+    alerts = trigger_index.AlertExpiry()
+    began = time.perf_counter()
+    for tick in range(ticks):
+        indexed_tick(schedule, alerts, start_epoch + 12 * 3600 + tick)
+    indexed_cost = (time.perf_counter() - began) / ticks
+
+    print(f"{count:>9} passes: scan {scan_cost * 1e3:10.3f} ms/tick   "
+          f"indexed {indexed_cost * 1e6:8.1f} us/tick   (index built once in {build_cost * 1e3:.0f} ms)")
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 100000, 1000000]
+    for size in sizes:
+        benchmark(size)
@@ -0,0 +1,136 @@
+import json
+import os
+from datetime import datetime, timedelta
+from urllib.parse import quote
+
+import gp_stream
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Same window as the full query's epoch/>now-30 predicate
+MAX_EPOCH_AGE = timedelta(days=30)
+
+
+def load_catalog(filename):
+    if not os.path.exists(filename):
+        return None
+    with open(filename, 'r') as file:
+        return json.load(file)
+
+
+def save_catalog(filename, catalog_by_id, last_full_sync, now):
+    records = [catalog_by_id[key] for key in sorted(catalog_by_id, key=lambda key: (len(key), key))]
+    data_to_save = {
+        "last_updated": now.strftime(TIME_FORMAT),
+        "last_full_sync": last_full_sync.strftime(TIME_FORMAT),
+        "data": records
+    }
+    with open(filename, 'w') as file:
+        json.dump(data_to_save, file)
+    return records
+
+
+def newest_creation_date(catalog_by_id):
+    # Newest CREATION_DATE we hold; space-track's own clock, so no skew with ours
+    dates = [record.get('CREATION_DATE') for record in catalog_by_id.values() if record.get('CREATION_DATE')]
+    return max(dates) if dates else None
+
+
+def parse_epoch(epoch):
+    # GP epochs look like 2024-08-25T12:34:56.123456
+    return datetime.strptime(epoch[:19], '%Y-%m-%dT%H:%M:%S')
+
+
+def merge_records(catalog_by_id, records):
+    """
+    Merge changed GP records into the catalog keyed by NORAD_CAT_ID.
+    Objects that have decayed are removed. Returns (added, updated, decayed).
+    """
+    added = updated = decayed = 0
+    for record in records:
+        key = str(record.get('NORAD_CAT_ID'))
+        if record.get('DECAY_DATE') is not None:
+            if catalog_by_id.pop(key, None) is not None:
+                decayed += 1
+            continue
+        if key in catalog_by_id:
+            updated += 1
+        else:
+            added += 1
+        catalog_by_id[key] = record
+    return added, updated, decayed
+
+
+def prune_catalog(catalog_by_id, now):
+    # Drop objects whose newest elements have aged out of the query window
+    removed = 0
+    for key in list(catalog_by_id):
+        epoch = catalog_by_id[key].get('EPOCH')
+        if epoch and now - parse_epoch(epoch) > MAX_EPOCH_AGE:
+            del catalog_by_id[key]
+            removed += 1
+    return removed
+
+
+def fetch(session, url, ingest_format, keep=None):
+    # Records of one query, or None if the request fails
+    if ingest_format != "json":
+        return gp_stream.fetch_records(session, url, ingest_format, keep=keep)
+    data_response = session.get(url)
+    if data_response.status_code != 200:
+        print(f"Failed to retrieve data. Status Code: {data_response.status_code}")
+        return None
+    return [record for record in data_response.json() if keep is None or keep(record)]
+
+
+def sync_catalog(session, filename, full_url, delta_url, full_sync_interval=timedelta(days=7), now=None, ingest_format="json",
+                 keep=None):
+    """
+    Bring the local GP catalog in filename up to date and return its records.
+    Pulls the whole catalog from full_url when there is no usable local copy
+    or the last full pull is older than full_sync_interval; otherwise asks
+    delta_url (with a {since} placeholder) only for records created since
+    the newest one we hold. ingest_format "csv" or "3le" downloads through
+    gp_stream instead of as JSON. keep(record), if given, drops records as
+    they arrive; decayed records skip it, since the merge needs them, and
+    objects whose new record it drops are taken out of the catalog.
+    Returns None if the server request fails.
+    """
+    if now is None:
+        now = datetime.utcnow()
+    saved_data = load_catalog(filename)
+
+    dropped = set()
+
+    def keep_or_decayed(record):
+        if keep is None or record.get('DECAY_DATE') is not None or keep(record):
+            return True
+        dropped.add(str(record.get('NORAD_CAT_ID')))
+        return False
+
+    last_full_sync = None
+    catalog_by_id = {}
+    if saved_data and saved_data.get("last_full_sync"):
+        last_full_sync = datetime.strptime(saved_data["last_full_sync"], TIME_FORMAT)
+        catalog_by_id = {str(record.get('NORAD_CAT_ID')): record for record in saved_data.get("data", [])}
+    since = newest_creation_date(catalog_by_id)
+
+    if last_full_sync is None or since is None or now - last_full_sync >= full_sync_interval:
+        print("Fetching full catalog from server...")
+        records = fetch(session, full_url, ingest_format, keep_or_decayed)
+        if records is None:
+            return None
+        catalog_by_id = {}
+        added, updated, decayed = merge_records(catalog_by_id, records)
+        print(f"Full catalog: {added} objects")
+        return save_catalog(filename, catalog_by_id, now, now)
+
+    print(f"Fetching catalog changes since {since}...")
+    records = fetch(session, delta_url.format(since=quote(since.replace('T', ' '))), ingest_format, keep_or_decayed)
+    if records is None:
+        return None
+    added, updated, decayed = merge_records(catalog_by_id, records)
+    filtered = sum(catalog_by_id.pop(key, None) is not None for key in dropped)
+    removed = prune_catalog(catalog_by_id, now)
+    print(f"Catalog changes: {added} added, {updated} updated, {decayed} decayed, {filtered} filtered out, {removed} aged out")
+    return save_catalog(filename, catalog_by_id, last_full_sync, now)
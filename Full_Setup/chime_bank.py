@@ -0,0 +1,114 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+import numpy as np
+
+# Every chime main.py can play, rendered once and kept in a memory-mapped file.
+#
+#   header  MAGIC, version, length of the index
+#   index   JSON: {"key": ..., "chimes": [[frequency, duration, decay_rate, offset, length], ...]}
+#   data    float32 samples, dry and wet part of each chime back to back
+#
+# generate_tone_with_reverb(volume=v) is v * clip(dry + v * wet, -1, 1), where
+# dry is the decaying sine and wet the sum of its echoes at unit volume, so one
+# rendering per chime serves every volume. The key is a hash of the chime list
+# and synthesis parameters; if they change the file is rebuilt.
+
+MAGIC = b'SCCB'
+VERSION = 1
+HEADER = struct.Struct('<4sHxxI')
+
+
+def render_chime(frequency, duration, decay_rate, rate=44100, reverb_delay=0.05, reverb_decay=0.3):
+    # Dry and wet parts of generate_tone_with_reverb at unit volume
+    length = int(duration * rate)
+    t = np.linspace(0, duration, length)
+    dry = np.sin(2 * np.pi * frequency * t) * np.exp(decay_rate * t)
+    wet = np.zeros_like(dry)
+    delay_samples = int(reverb_delay * rate)
+    for i in range(1, 5):
+        echo_delay = i * delay_samples
+        if echo_delay < length:
+            wet[:-echo_delay] += dry[echo_delay:] * (reverb_decay ** i)
+    return dry, wet
+
+
+def bank_key(chimes, rate, reverb_delay, reverb_decay):
+    parameters = {"version": VERSION, "chimes": sorted(chimes), "rate": rate,
+                  "reverb_delay": reverb_delay, "reverb_decay": reverb_decay}
+    return hashlib.sha1(json.dumps(parameters).encode('utf-8')).hexdigest()
+
+
+def write_bank(filename, chimes, key, rate, reverb_delay, reverb_decay):
+    index = []
+    offset = 0
+    for frequency, duration, decay_rate in chimes:
+        length = int(duration * rate)
+        index.append([frequency, duration, decay_rate, offset, length])
+        offset += 2 * length
+    header = json.dumps({"key": key, "chimes": index}).encode('utf-8')
+    # Pad the index so the samples start on a 4 byte boundary
+    header += b' ' * (-(HEADER.size + len(header)) % 4)
+
+    temp_filename = filename + '.tmp'
+    with open(temp_filename, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(header)))
+        file.write(header)
+        for frequency, duration, decay_rate in chimes:
+            dry, wet = render_chime(frequency, duration, decay_rate, rate, reverb_delay, reverb_decay)
+            file.write(dry.astype(np.float32).tobytes())
+            file.write(wet.astype(np.float32).tobytes())
+    os.replace(temp_filename, filename)
+
+
+def open_bank(filename, key):
+    # (index, samples) of a bank file built for key, or None
+    if not os.path.exists(filename):
+        return None
+    with open(filename, 'rb') as file:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, index_length = HEADER.unpack_from(mapped, 0)
+    if magic != MAGIC or version != VERSION:
+        return None
+    index = json.loads(mapped[HEADER.size:HEADER.size + index_length].decode('utf-8'))
+    if index["key"] != key:
+        return None
+    samples = np.frombuffer(mapped, dtype=np.float32, offset=HEADER.size + index_length)
+    return index["chimes"], samples
+
+
+class ChimeBank:
+    """
+    Pre-rendered chimes for a list of (frequency, duration, decay_rate).
+    waveform() returns what generate_tone_with_reverb would for the same
+    arguments, read from the mapped bank instead of synthesized.
+    """
+
+    def __init__(self, chimes, filename='chime_bank.bin', rate=44100, reverb_delay=0.05, reverb_decay=0.3):
+        self.rate = rate
+        self.reverb_delay = reverb_delay
+        self.reverb_decay = reverb_decay
+        chimes = sorted(set((float(f), float(d), float(r)) for f, d, r in chimes))
+        key = bank_key(chimes, rate, reverb_delay, reverb_decay)
+        bank = open_bank(filename, key)
+        if bank is None:
+            print(f"Rendering {len(chimes)} chimes into {filename}")
+            write_bank(filename, chimes, key, rate, reverb_delay, reverb_decay)
+            bank = open_bank(filename, key)
+        index, self.samples = bank
+        self.chimes = {(f, d, r): (offset, length) for f, d, r, offset, length in index}
+
+    def parts(self, frequency, duration, decay_rate):
+        entry = self.chimes.get((float(frequency), float(duration), float(decay_rate)))
+        if entry is None:
+            # Not in the bank (e.g. a note added since it was built), render it now
+            return render_chime(frequency, duration, decay_rate, self.rate, self.reverb_delay, self.reverb_decay)
+        offset, length = entry
+        return self.samples[offset:offset + length], self.samples[offset + length:offset + 2 * length]
+
+    def waveform(self, frequency, duration, decay_rate, volume=0.8):
+        dry, wet = self.parts(frequency, duration, decay_rate)
+        return (volume * np.clip(dry + volume * wet, -1.0, 1.0)).astype(np.float32)
@@ -0,0 +1,104 @@
+import os
+import pty
+import select
+import threading
+import time
+import tty
+
+# Pretend NeoPixel controller on a pseudo-terminal, for running the serial code
+# without the board.
+#
+#   python fake_arduino.py
+#
+# port is the pty's device name; open it as if it were /dev/ttyUSB0. Bytes
+# arrive at the baud rate into a 64 byte receive buffer (the rest is dropped,
+# as on the board) and loop() takes one byte per loop_time seconds, acting on
+# it like SpaceChimes_NeopixelController.ino: '0'-'7' highlight a cluster,
+# 'r' starts fading the highlighted clusters. events has (time, byte) of every
+# byte loop() handled.
+
+NUM_CLUSTERS = 8
+RX_BUFFER = 64
+
+
+class FakeArduino:
+    def __init__(self, baud_rate=9600, loop_time=0.005):
+        self.master, self.slave = pty.openpty()
+        tty.setraw(self.slave)
+        self.port = os.ttyname(self.slave)
+        self.byte_time = 10.0 / baud_rate
+        self.loop_time = loop_time
+        self.received = []      # (arrival time, byte) in the receive buffer
+        self.wire_free_at = 0.0
+        self.events = []
+        self.highlighted = set()
+        self.fading = set()
+        self.dropped = 0
+        self.running = False
+        self.thread = None
+
+    def receive(self, now):
+        # Move bytes from the pty onto the simulated wire and into the receive buffer
+        while select.select([self.master], [], [], 0)[0]:
+            for byte in os.read(self.master, 1024):
+                self.wire_free_at = max(self.wire_free_at, now) + self.byte_time
+                if len(self.received) >= RX_BUFFER:
+                    self.dropped += 1
+                else:
+                    self.received.append((self.wire_free_at, byte))
+
+    def handle(self, byte, now):
+        if byte == ord('r'):
+            self.fading |= self.highlighted
+            self.highlighted = set()
+        elif ord('0') <= byte < ord('0') + NUM_CLUSTERS:
+            self.highlighted.add(byte - ord('0'))
+        self.events.append((now, chr(byte)))
+
+    def run(self):
+        while self.running:
+            now = time.monotonic()
+            self.receive(now)
+            # Serial.read(): at most one byte per pass of loop()
+            if self.received and self.received[0][0] <= now:
+                self.handle(self.received.pop(0)[1], now)
+            time.sleep(self.loop_time)
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+        os.close(self.master)
+        os.close(self.slave)
+
+
+if __name__ == "__main__":
+    import led_writer
+    try:
+        import serial
+        port = serial.Serial
+    except ImportError:
+        # Without pyserial the pty can be written as a plain file
+        port = lambda name, baud_rate: open(name, 'wb', buffering=0)
+
+    arduino = FakeArduino().start()
+    leds = led_writer.LedWriter(port(arduino.port, 9600), reset_delay=1).start()
+
+    # Five fragments of one breakup culminating in the same second
+    began = time.monotonic()
+    for cluster in [3, 3, 4, 3, 5]:
+        leds.highlight(cluster)
+    print(f"5 highlights queued in {(time.monotonic() - began) * 1e6:.0f} us")
+    time.sleep(1.5)
+    leds.stop()
+    arduino.stop()
+
+    print(f"{leds.writes} writes, {leds.bytes_sent} bytes, {arduino.dropped} dropped")
+    for when, command in arduino.events:
+        print(f"  {when - began:6.3f} s  {command}")
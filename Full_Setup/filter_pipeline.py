@@ -0,0 +1,138 @@
+from datetime import datetime, timedelta
+from urllib.parse import quote
+
+from orbit_screen import orbit_heights
+
+# Record-level catalog filters, set up from a config dict:
+#
+#   object_types            OBJECT_TYPE values to keep
+#   inclination_margin_deg  drop inclinations below |observer latitude| minus this
+#   max_perigee_km          drop perigees above this (None for no ceiling)
+#   max_epoch_age_days      drop elements older than this (None for any age)
+#
+# plus dropping objects that have decayed. Every rule space-track can apply is
+# also written into the full query as a predicate, so those objects never come
+# down the wire; the incremental query only gets the rules a new element set
+# cannot change. The rules run locally as well, cheapest first, to catch records
+# the server filters don't reach (the local cache, incremental updates) and to
+# count what each rule drops.
+
+# Rules, cheapest first
+DECAYED = "Already decayed"
+OBJECT_TYPE = "Object type not wanted"
+EPOCH_AGE = "Elements too old"
+LOW_INCLINATION = "Inclination below threshold"
+HIGH_PERIGEE = "Perigee above ceiling"
+RULES = [DECAYED, OBJECT_TYPE, EPOCH_AGE, LOW_INCLINATION, HIGH_PERIGEE]
+
+# Query fields the rules are written into, for full and incremental queries
+QUERY_FIELDS = ['decay_date', 'epoch', 'object_type', 'inclination', 'periapsis']
+INCREMENTAL_QUERY_FIELDS = ['object_type']
+
+DEFAULT_FILTERS = {
+    "object_types": ["DEBRIS", "ROCKET BODY", "UNKNOWN"],
+    "inclination_margin_deg": 4,
+    "max_perigee_km": None,
+    "max_epoch_age_days": 30,
+}
+
+
+def number(entry, field):
+    try:
+        return float(entry.get(field))
+    except (TypeError, ValueError):
+        return None
+
+
+class FilterPipeline:
+    """
+    The rules of one config for an observer. reason(entry) returns the first
+    rule the entry breaks, or None, and counts it in counters. query(url)
+    returns url with the rules as space-track predicates; for an incremental
+    query only the object type is pushed, since decayed records, and updated
+    ones that now fail an element rule, are how the sync learns to drop
+    objects it holds.
+    """
+
+    def __init__(self, config, observer_location, now=None):
+        config = dict(DEFAULT_FILTERS, **config)
+        self.now = now or datetime.utcnow()
+        self.object_types = set(config["object_types"]) if config["object_types"] else None
+        self.inclination_floor = abs(observer_location[0]) - config["inclination_margin_deg"]
+        self.max_perigee_km = config["max_perigee_km"]
+        self.max_epoch_age_days = config["max_epoch_age_days"]
+        self.oldest_epoch = None
+        if self.max_epoch_age_days is not None:
+            # ISO timestamps sort as strings, so no need to parse every EPOCH
+            self.oldest_epoch = (self.now - timedelta(days=self.max_epoch_age_days)).strftime('%Y-%m-%dT%H:%M:%S')
+
+        self.rules = [(DECAYED, self.decayed)]
+        if self.object_types:
+            self.rules.append((OBJECT_TYPE, self.unwanted_type))
+        if self.oldest_epoch is not None:
+            self.rules.append((EPOCH_AGE, self.too_old))
+        if self.inclination_floor > 0:
+            self.rules.append((LOW_INCLINATION, self.low_inclination))
+        if self.max_perigee_km is not None:
+            self.rules.append((HIGH_PERIGEE, self.high_perigee))
+        self.counters = {rule: 0 for rule, _ in self.rules}
+
+    def decayed(self, entry):
+        return entry.get('DECAY_DATE') is not None
+
+    def unwanted_type(self, entry):
+        return entry.get('OBJECT_TYPE') not in self.object_types
+
+    def too_old(self, entry):
+        epoch = entry.get('EPOCH')
+        return bool(epoch) and epoch[:19] < self.oldest_epoch
+
+    def low_inclination(self, entry):
+        return (number(entry, 'INCLINATION') or 0.0) < self.inclination_floor
+
+    def high_perigee(self, entry):
+        perigee = number(entry, 'PERIAPSIS')
+        if perigee is None:
+            heights = orbit_heights(entry)
+            if heights is None:
+                return False
+            perigee = heights[0]
+        return perigee > self.max_perigee_km
+
+    def reason(self, entry):
+        for rule, breaks in self.rules:
+            if breaks(entry):
+                self.counters[rule] += 1
+                return rule
+        return None
+
+    def predicates(self, incremental=False):
+        # (field, value) pairs in space-track's query syntax
+        predicates = []
+        if not incremental:
+            predicates.append(('decay_date', 'null-val'))
+            if self.max_epoch_age_days is not None:
+                predicates.append(('epoch', f">now-{self.max_epoch_age_days}"))
+        if self.object_types:
+            predicates.append(('object_type', ','.join(sorted(self.object_types))))
+        if not incremental:
+            if self.inclination_floor > 0:
+                predicates.append(('inclination', f">{self.inclination_floor}"))
+            if self.max_perigee_km is not None:
+                predicates.append(('periapsis', f"<{self.max_perigee_km}"))
+        return predicates
+
+    def query(self, url, incremental=False):
+        """
+        url with the pipeline's predicates in place of any it already has for
+        the fields the rules cover, ahead of orderby/predicates/format.
+        """
+        prefix, rest = url.split('/class/gp/', 1)
+        parts = rest.split('/')
+        pairs = list(zip(parts[0::2], parts[1::2]))
+        replaced = INCREMENTAL_QUERY_FIELDS if incremental else QUERY_FIELDS
+        filters = [(field, value) for field, value in pairs
+                   if field not in replaced and field not in ('orderby', 'predicates', 'format')]
+        filters += [(field, quote(value, safe=',-.')) for field, value in self.predicates(incremental)]
+        tail = [(field, value) for field, value in pairs if field in ('orderby', 'predicates', 'format')]
+        return prefix + '/class/gp/' + '/'.join(f"{field}/{value}" for field, value in filters + tail)
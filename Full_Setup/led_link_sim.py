@@ -0,0 +1,242 @@
+import random
+import sys
+from collections import deque
+
+import led_protocol
+
+# Byte-level simulation of main.py talking to SpaceChimes_NeopixelController.ino,
+# for comparing the framed protocol with the old single characters.
+#
+#   python led_link_sim.py [seconds]
+#
+# The sketch's loop() is played out with ATmega328 timings. Bytes arrive one
+# per byte time into the 64 byte receive buffer. strip.show() stops interrupts
+# for SHOW_TIME, and during it only the UART's two byte FIFO survives; later
+# bytes are lost, as on the board. The host side does what led_writer does:
+# stop-and-wait on ACK with resends for "binary", write-and-forget for "ascii".
+# Latency is from when the host wanted to send to when show() finished.
+
+RX_BUFFER = 64
+UART_FIFO = 2
+SHOW_TIME = led_protocol.NUM_LEDS * 32 * 1.25e-6  # 32 bits per RGBW pixel at 800 kHz
+ANALOG_READ_TIME = 112e-6
+RAINBOW_TIME = 300e-6  # ColorHSV per cluster and setPixelColor for the strip
+FRAME_APPLY_TIME = 200e-6
+PARSE_TIME = 8e-6  # per byte, CRC included
+RAINBOW_INTERVAL = 0.010
+STREAM_TIMEOUT = 1.0
+LINE_QUIET = 0.005
+
+
+class Host:
+    def __init__(self, link, workload, protocol, ack_timeout=0.03, retries=3):
+        self.link = link
+        self.workload = deque(workload)  # (ready time, bytes) in order
+        self.protocol = protocol
+        self.ack_timeout = ack_timeout
+        self.retries = retries
+        self.in_flight = None  # [message, deadline, attempts]
+        self.reply = None  # (arrival time, byte)
+        self.free_at = 0.0
+        self.ready_times = []
+        self.workload_data = []
+        self.resends = 0
+        self.failures = 0
+
+    def next_event(self):
+        if self.in_flight is not None:
+            if self.reply is not None:
+                return self.reply[0]
+            return self.in_flight[1]
+        if self.workload:
+            return max(self.workload[0][0], self.free_at)
+        return float('inf')
+
+    def transmit(self, message, now):
+        data = self.workload_data[message]
+        self.link.transmit(data, message, now)
+        self.free_at = now + len(data) * self.link.byte_time
+
+    def fire(self, now):
+        if self.in_flight is not None:
+            message, deadline, attempts = self.in_flight
+            reply, self.reply = self.reply, None
+            if reply is not None and reply[1] == led_protocol.ACK:
+                self.in_flight = None
+                return
+            if attempts > self.retries:
+                self.failures += 1
+                self.in_flight = None
+                return
+            self.resends += 1
+            self.transmit(message, now)
+            self.in_flight = [message, self.free_at + self.ack_timeout, attempts + 1]
+            return
+        ready, data = self.workload.popleft()
+        message = len(self.ready_times)
+        self.ready_times.append(ready)
+        self.workload_data.append(data)
+        self.transmit(message, now)
+        if self.protocol == "binary":
+            self.in_flight = [message, self.free_at + self.ack_timeout, 1]
+
+
+class Link:
+    """
+    The sketch end of the serial line. run(until) plays loop() up to that
+    time; host events are fired exactly when they fall due in between.
+    """
+
+    def __init__(self, protocol, baud_rate):
+        self.protocol = protocol
+        self.byte_time = 10.0 / baud_rate
+        self.parser = led_protocol.Parser()
+        self.host = None
+        self.now = 0.0
+        self.arriving = deque()  # (arrival time, byte, message) on the wire
+        self.rx = deque()  # (byte, message)
+        self.fifo = 0  # bytes held in the UART while interrupts are off
+        self.lost = 0
+        self.applied = {}  # message -> when show() finished with it
+        self.last_frame = -STREAM_TIMEOUT
+        self.streaming = False
+        self.last_rainbow = 0.0
+        self.shows = 0
+
+    def transmit(self, data, message, now):
+        start = max(now, self.arriving[-1][0] if self.arriving else now)
+        for i, byte in enumerate(data):
+            self.arriving.append((start + (i + 1) * self.byte_time, byte, message))
+
+    def deliver(self, until, interrupts):
+        while self.arriving and self.arriving[0][0] <= until:
+            received = self.arriving.popleft()[1:]
+            if not interrupts:
+                if self.fifo < UART_FIFO:
+                    self.fifo += 1
+                    self.rx.append(received)
+                else:
+                    self.lost += 1
+            elif len(self.rx) < RX_BUFFER:
+                self.rx.append(received)
+            else:
+                self.lost += 1
+
+    def advance(self, duration, interrupts=True):
+        end = self.now + duration
+        while self.host.next_event() <= end:
+            self.deliver(self.host.next_event(), interrupts)
+            self.now = max(self.now, self.host.next_event())
+            self.host.fire(self.now)
+        self.deliver(end, interrupts)
+        self.now = end
+        if not interrupts:
+            self.fifo = 0
+
+    def show(self):
+        self.advance(SHOW_TIME, interrupts=False)
+        self.shows += 1
+
+    def reply(self, byte):
+        self.host.reply = (self.now + self.byte_time, byte)
+
+    def handle(self, result, message):
+        if result == 'nak':
+            self.reply(led_protocol.NAK)
+            return
+        message_type, payload = result
+        if message_type == led_protocol.FRAME:
+            self.advance(FRAME_APPLY_TIME)
+            self.streaming = True
+            self.last_frame = self.now
+        if message_type != led_protocol.RESET:
+            self.show()
+        self.applied.setdefault(message, self.now)
+        self.reply(led_protocol.ACK)
+
+    def loop_binary(self):
+        self.advance(ANALOG_READ_TIME)
+        while self.rx:
+            self.advance(PARSE_TIME)
+            byte, message = self.rx.popleft()
+            result = self.parser.feed(byte, self.now * 1000)
+            if result is not None and result[0] != 'ascii':
+                self.handle(result, message)
+        if not self.parser.idle() or self.now - self.parser.last_byte_ms / 1000 < LINE_QUIET:
+            return
+        if self.streaming and self.now - self.last_frame < STREAM_TIMEOUT:
+            return
+        self.streaming = False
+        if self.now - self.last_rainbow >= RAINBOW_INTERVAL:
+            self.last_rainbow = self.now
+            self.advance(RAINBOW_TIME)
+            self.show()
+
+    def loop_ascii(self):
+        # The sketch before framing: rainbow and show() every pass, one byte read per pass
+        self.advance(ANALOG_READ_TIME + RAINBOW_TIME)
+        self.show()
+        if self.rx:
+            message = self.rx.popleft()[1]
+            self.show()
+            self.applied.setdefault(message, self.now)
+
+    def run(self, until):
+        loop = self.loop_binary if self.protocol == "binary" else self.loop_ascii
+        while self.now < until:
+            loop()
+
+
+def simulate(protocol, baud_rate, workload, seconds):
+    link = Link(protocol, baud_rate)
+    link.host = Host(link, workload, protocol)
+    link.run(seconds)
+    latencies = sorted(done - link.host.ready_times[message] for message, done in link.applied.items())
+    return link, latencies
+
+
+def summary(name, link, latencies, seconds):
+    if not latencies:
+        print(f"{name}: nothing applied, {link.lost} bytes lost")
+        return
+    missed = len(link.host.ready_times) - len(latencies)
+    mean = sum(latencies) / len(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{name}: {len(latencies) / seconds:6.1f} per s  latency mean {mean * 1000:5.1f} ms  "
+          f"p99 {p99 * 1000:5.1f} ms  max {latencies[-1] * 1000:5.1f} ms  "
+          f"{link.host.resends} resends  {missed} never shown  {link.lost} bytes lost")
+
+
+def test_pixels(n):
+    return [((n + i) % 256, (n * 3) % 256, i * 4 % 256, 0) for i in range(led_protocol.NUM_LEDS)]
+
+
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10.0
+    rng = random.Random(0)
+
+    # Highlight bursts at random moments against the idle rainbow
+    bursts = []
+    t = 0.05
+    while t < seconds - 1:
+        bursts.append((t, rng.sample(range(led_protocol.NUM_CLUSTERS), rng.randint(1, 4))))
+        t += rng.uniform(0.05, 0.5)
+    ascii_workload = [(t, str(cluster).encode()) for t, clusters in bursts for cluster in clusters]
+    binary_workload = [(t, led_protocol.encode_highlight(clusters)) for t, clusters in bursts]
+    delta_workload = [(t, led_protocol.encode_delta({c: (255, 80, 0, 40) for c in clusters})) for t, clusters in bursts]
+
+    print(f"Highlights, {len(bursts)} bursts of 1-4 clusters over {seconds:.0f} s (per-cluster latency for ascii)")
+    summary("  ascii  9600     ", *simulate("ascii", 9600, ascii_workload, seconds), seconds)
+    summary("  ascii  115200   ", *simulate("ascii", 115200, ascii_workload, seconds), seconds)
+    summary("  HIGHLIGHT 115200", *simulate("binary", 115200, binary_workload, seconds), seconds)
+    summary("  DELTA  115200   ", *simulate("binary", 115200, delta_workload, seconds), seconds)
+
+    frame_bytes = led_protocol.NUM_LEDS * 4 + led_protocol.OVERHEAD
+    print(f"Full frames, {frame_bytes} bytes each")
+    for baud_rate in [115200, 250000]:
+        paced = [(n / 30.0, led_protocol.encode_frame(test_pixels(n))) for n in range(int(seconds * 30))]
+        summary(f"  30 fps     {baud_rate:6d}", *simulate("binary", baud_rate, paced, seconds), seconds)
+        flat_out = [(0.0, led_protocol.encode_frame(test_pixels(n))) for n in range(int(seconds * 200))]
+        link, latencies = simulate("binary", baud_rate, flat_out, seconds)
+        print(f"  flat out   {baud_rate:6d}: {len(link.applied) / seconds:6.1f} frames per s, "
+              f"{link.host.resends} resends, {link.lost} bytes lost")
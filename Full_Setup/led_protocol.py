@@ -0,0 +1,152 @@
+import struct
+
+# Binary frames between main.py and SpaceChimes_NeopixelController.ino.
+#
+#   0xA5 0x5A  type  length  payload[length]  crc_hi crc_lo
+#
+# The CRC is CRC-16/XMODEM (avr-libc's _crc_xmodem_update) over type, length
+# and payload. The sketch answers every frame with ACK, or NAK if the CRC does
+# not match, and goes back to looking for 0xA5 if a frame stalls for
+# FRAME_TIMEOUT_MS. Until the first good frame the old single characters
+# still work: '0'-'7' highlight a cluster, 'r' fades the highlights out.
+#
+#   FRAME      NUM_LEDS x (r, g, b, w), shown as is; the rainbow pauses while frames keep coming
+#   HIGHLIGHT  one byte, bit n highlights cluster n in white
+#   DELTA      (cluster, r, g, b, w) per cluster, highlighting each in its own colour
+#   RESET      no payload, fades the highlighted clusters out like 'r'
+
+SYNC = b'\xa5\x5a'
+FRAME = 0x01
+HIGHLIGHT = 0x02
+DELTA = 0x03
+RESET = 0x04
+ACK = 0x06
+NAK = 0x15
+
+NUM_LEDS = 56
+LEDS_PER_CLUSTER = 7
+NUM_CLUSTERS = NUM_LEDS // LEDS_PER_CLUSTER
+FRAME_TIMEOUT_MS = 50
+OVERHEAD = len(SYNC) + 2 + 2  # sync, type, length, CRC
+
+
+def length_valid(message_type, length):
+    if message_type == FRAME:
+        return length == NUM_LEDS * 4
+    if message_type == HIGHLIGHT:
+        return length == 1
+    if message_type == DELTA:
+        return 0 < length <= NUM_CLUSTERS * 5 and length % 5 == 0
+    return length == 0
+
+
+def crc16_xmodem(data, crc=0):
+    for byte in data:
+        crc ^= byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else crc << 1
+            crc &= 0xFFFF
+    return crc
+
+
+def encode(message_type, payload=b''):
+    body = bytes([message_type, len(payload)]) + bytes(payload)
+    return SYNC + body + struct.pack('>H', crc16_xmodem(body))
+
+
+def encode_frame(pixels):
+    # pixels: NUM_LEDS (r, g, b, w) tuples
+    if len(pixels) != NUM_LEDS:
+        raise ValueError(f"A frame has {NUM_LEDS} pixels, got {len(pixels)}")
+    return encode(FRAME, bytes(channel for pixel in pixels for channel in pixel))
+
+
+def encode_highlight(clusters):
+    mask = 0
+    for cluster in clusters:
+        if 0 <= cluster < NUM_CLUSTERS:
+            mask |= 1 << cluster
+    return encode(HIGHLIGHT, bytes([mask]))
+
+
+def encode_delta(updates):
+    # updates: {cluster: (r, g, b, w)}
+    payload = bytes(value for cluster, color in sorted(updates.items()) for value in (cluster, *color))
+    return encode(DELTA, payload)
+
+
+def encode_reset():
+    return encode(RESET)
+
+
+class Parser:
+    """
+    The sketch's frame parser, byte for byte, for the simulator and for
+    checking the encoder. feed() takes one received byte and its time in
+    ms and returns (type, payload) for a complete good frame, ('ascii',
+    byte) for a single-character command, 'nak' for a bad CRC, or None.
+    The sketch drops a stalled frame from loop(); here that happens when
+    the next byte arrives, which comes to the same thing.
+    """
+
+    def __init__(self):
+        self.state = 'sync1'
+        self.last_byte_ms = 0
+        self.binary = False  # single characters are ignored after the first good frame
+        self.good = 0
+        self.bad = 0
+        self.timeouts = 0
+
+    def idle(self):
+        return self.state == 'sync1'
+
+    def resync(self, byte):
+        self.state = 'sync2' if byte == SYNC[0] else 'sync1'
+
+    def feed(self, byte, now_ms):
+        if self.state != 'sync1' and now_ms - self.last_byte_ms > FRAME_TIMEOUT_MS:
+            self.state = 'sync1'
+            self.timeouts += 1
+        self.last_byte_ms = now_ms
+
+        if self.state == 'sync1':
+            if byte == SYNC[0]:
+                self.state = 'sync2'
+                return None
+            return None if self.binary else ('ascii', byte)
+        if self.state == 'sync2':
+            if byte == SYNC[1]:
+                self.state = 'type'
+            else:
+                self.resync(byte)
+        elif self.state == 'type':
+            if not FRAME <= byte <= RESET:
+                self.resync(byte)
+                return None
+            self.type = byte
+            self.state = 'length'
+        elif self.state == 'length':
+            if not length_valid(self.type, byte):
+                # A byte went missing; don't wait for a payload that isn't coming
+                self.resync(byte)
+                return None
+            self.length = byte
+            self.payload = bytearray()
+            self.state = 'payload' if byte else 'crc_hi'
+        elif self.state == 'payload':
+            self.payload.append(byte)
+            if len(self.payload) == self.length:
+                self.state = 'crc_hi'
+        elif self.state == 'crc_hi':
+            self.crc = byte << 8
+            self.state = 'crc_lo'
+        elif self.state == 'crc_lo':
+            self.state = 'sync1'
+            self.crc |= byte
+            if self.crc != crc16_xmodem(bytes([self.type, self.length]) + bytes(self.payload)):
+                self.bad += 1
+                return 'nak'
+            self.good += 1
+            self.binary = True
+            return (self.type, bytes(self.payload))
+        return None
@@ -0,0 +1,174 @@
+import threading
+import time
+
+import led_protocol
+
+# Serial output to the NeoPixel controller (SpaceChimes_NeopixelController.ino)
+# from its own thread, so the trigger path never waits on the port.
+#
+# highlight() only records the cluster. The thread sends every cluster that
+# is pending as one write and sends the 'r' reset reset_delay seconds after
+# the latest highlight, as the main loop used to. Writes are paced to what the
+# sketch can take: it reads one byte per pass of loop() into a 64 byte receive
+# buffer, so the writer tracks how full that buffer probably is and waits
+# rather than overflow it.
+#
+# With protocol="binary" the writer speaks led_protocol's framed format
+# instead: every pending cluster goes out as one HIGHLIGHT frame (or a DELTA
+# frame if any has a colour), show_frame() streams whole frames with the
+# newest one replacing any not yet sent, and each frame waits for the
+# sketch's ACK and is sent again after a NAK or silence.
+
+
+class LedWriter:
+    def __init__(self, serial_conn, reset_delay=5, rx_buffer=64, consume_rate=200, baud_rate=9600,
+                 protocol="ascii", ack_timeout=0.1, retries=3):
+        self.serial_conn = serial_conn
+        self.protocol = protocol
+        self.ack_timeout = ack_timeout
+        self.retries = retries
+        self.reset_delay = reset_delay
+        self.rx_buffer = rx_buffer
+        self.consume_rate = consume_rate  # bytes per second the sketch reads, about one per loop()
+        self.byte_time = 10.0 / baud_rate  # start + 8 data + stop bits
+        self.pending = []
+        self.colors = {}
+        self.frame = None
+        self.reset_at = None
+        self.buffered = 0.0  # bytes probably waiting in the sketch's receive buffer
+        self.buffered_at = time.monotonic()
+        self.wire_free_at = 0.0
+        self.writes = 0
+        self.bytes_sent = 0
+        self.resends = 0
+        self.failures = 0
+        self.condition = threading.Condition()
+        self.running = False
+        self.thread = None
+
+    def highlight(self, cluster, color=None):
+        # color (r, g, b, w) needs the binary protocol; the old sketch only does white
+        with self.condition:
+            if cluster not in self.pending:
+                self.pending.append(cluster)
+            if color is not None:
+                self.colors[cluster] = color
+            self.reset_at = time.monotonic() + self.reset_delay
+            self.condition.notify()
+
+    def show_frame(self, pixels):
+        # pixels: led_protocol.NUM_LEDS (r, g, b, w) tuples
+        with self.condition:
+            self.frame = pixels
+            self.condition.notify()
+
+    def drain_estimate(self, now):
+        self.buffered = max(0.0, self.buffered - (now - self.buffered_at) * self.consume_rate)
+        self.buffered_at = now
+
+    def send(self, data):
+        try:
+            self.serial_conn.write(data)
+        except Exception as e:
+            print("LED serial write failed:", e)
+            return
+        self.writes += 1
+        self.bytes_sent += len(data)
+        self.buffered += len(data)
+
+    def next_write(self):
+        # Bytes to send now, or None after waiting for something to do
+        with self.condition:
+            while self.running and not self.pending and self.frame is None and self.reset_at is None:
+                self.condition.wait()
+            if not self.running:
+                return None
+            now = time.monotonic()
+            if self.protocol == "binary":
+                return self.next_frame(now)
+            self.drain_estimate(now)
+            if now < self.wire_free_at:
+                # The last write is still crossing the wire
+                self.condition.wait(self.wire_free_at - now)
+                return None
+            if self.pending:
+                # Everything pending that fits in the sketch's receive buffer, as one write
+                room = int(self.rx_buffer - self.buffered)
+                data = ''
+                while self.pending and len(data) + len(str(self.pending[0])) <= room:
+                    data += str(self.pending.pop(0))
+                if not data:
+                    self.condition.wait(1 / self.consume_rate)
+                    return None
+                return data.encode()
+            if now >= self.reset_at:
+                self.reset_at = None
+                return b'r'
+            self.condition.wait(self.reset_at - now)
+            return None
+
+    def next_frame(self, now):
+        # Called with the lock held. No pacing needed: the last frame was acknowledged.
+        if self.pending:
+            clusters, self.pending = self.pending, []
+            colors, self.colors = self.colors, {}
+            if colors:
+                return led_protocol.encode_delta({c: colors.get(c, (255, 255, 255, 0)) for c in clusters})
+            return led_protocol.encode_highlight(clusters)
+        if self.frame is not None:
+            frame, self.frame = self.frame, None
+            return led_protocol.encode_frame(frame)
+        if self.reset_at is None:
+            return None
+        if now >= self.reset_at:
+            self.reset_at = None
+            return led_protocol.encode_reset()
+        self.condition.wait(self.reset_at - now)
+        return None
+
+    def wait_reply(self, frame_bytes):
+        # ACK, NAK or None, allowing for the frame still crossing the wire
+        deadline = time.monotonic() + frame_bytes * self.byte_time + self.ack_timeout
+        while time.monotonic() < deadline:
+            try:
+                reply = self.serial_conn.read(1)
+            except Exception as e:
+                print("LED serial read failed:", e)
+                return None
+            if reply and reply[0] in (led_protocol.ACK, led_protocol.NAK):
+                return reply[0]
+        return None
+
+    def send_frame(self, data):
+        for attempt in range(1 + self.retries):
+            if attempt:
+                self.resends += 1
+            self.send(data)
+            if self.wait_reply(len(data)) == led_protocol.ACK:
+                return
+        self.failures += 1
+        print("LED frame not acknowledged after", 1 + self.retries, "tries")
+
+    def run(self):
+        while self.running:
+            data = self.next_write()
+            if data:
+                # Outside the lock, so highlight() never waits on the port
+                if self.protocol == "binary":
+                    self.send_frame(data)
+                else:
+                    self.send(data)
+                    self.wire_free_at = time.monotonic() + len(data) * self.byte_time
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join()
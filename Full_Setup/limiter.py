@@ -0,0 +1,57 @@
+import numpy as np
+
+# Look-ahead peak limiter applied to each output block.
+#
+# The signal is delayed by lookahead frames, which is how far ahead the gain
+# can see a peak coming. Working in dB of attenuation, each frame needs
+# max(0, level - ceiling). The gain ramps down towards a coming peak at no more
+# than attack_db per frame, and recovers at no more than release_db per frame.
+# Both limits are max-plus recurrences, which numpy solves with a running
+# maximum instead of a per-frame loop, so a block costs O(block) whatever is
+# playing.
+
+
+class PeakLimiter:
+    """
+    Streaming limiter. process(block) returns the block from lookahead
+    frames earlier, scaled so no frame exceeds ceiling.
+    """
+
+    def __init__(self, rate=44100, ceiling=0.98, lookahead_ms=5, attack_db=24, release_ms=250, release_db=12):
+        self.ceiling_db = 20 * np.log10(ceiling)
+        self.ceiling = ceiling
+        self.lookahead = max(1, int(rate * lookahead_ms / 1000))
+        # attack_db is reached within the look-ahead, release_db is recovered over release_ms
+        self.attack_slope = attack_db / self.lookahead
+        self.release_slope = release_db / (rate * release_ms / 1000)
+        self.delay = np.zeros(self.lookahead, dtype=np.float32)
+        self.attenuation = 0.0  # dB, at the last frame returned
+
+    def process(self, block):
+        signal = np.concatenate((self.delay, block))
+        level = 20 * np.log10(np.maximum(np.abs(signal), 1e-9))
+        needed = np.maximum(level - self.ceiling_db, 0.0)
+
+        # Attack: a[n] = max over k >= n of needed[k] - attack_slope * (k - n)
+        index = np.arange(len(signal))
+        ahead = needed - self.attack_slope * index
+        attack = np.maximum.accumulate(ahead[::-1])[::-1] + self.attack_slope * index
+
+        # Release: a[n] = max(attack[n], a[n - 1] - release_slope), starting from the last block
+        frames = len(block)
+        behind = attack[:frames] + self.release_slope * index[:frames]
+        start = self.attenuation - self.release_slope
+        attenuation = np.maximum.accumulate(np.maximum(behind, start)) - self.release_slope * index[:frames]
+        self.attenuation = float(attenuation[-1])
+
+        output = signal[:frames] * 10 ** (-attenuation / 20)
+        self.delay = signal[frames:]
+        # The attack limit can leave a very steep peak above the ceiling
+        return np.clip(output, -self.ceiling, self.ceiling).astype(np.float32)
+
+    def idle(self):
+        return not self.delay.any()
+
+    def skip(self, frames):
+        # Silence passes through unchanged while the gain recovers
+        self.attenuation = max(0.0, self.attenuation - self.release_slope * frames)
@@ -0,0 +1,80 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+import geo_distance
+from skyfield.api import Topos, load, EarthSatellite
+
+
+def next_pass_details(tle_line1, tle_line2, observer_location, radius, start_time, end_time=None, distance_mode="screened"):
+    ts = start_time.ts
+    satellite = EarthSatellite(tle_line1, tle_line2, ts=ts)
+    observer = Topos(latitude_degrees=observer_location[0], longitude_degrees=observer_location[1])
+
+    if end_time is None:
+        end_time = start_time + timedelta(days=1)  # Look 24 hours ahead
+
+    pass_events = []  # List to hold all pass details
+
+    times, events = satellite.find_events(observer, start_time, end_time, altitude_degrees=0.0)
+    culminations = times[events == 1]
+    if not len(culminations):
+        return pass_events
+
+    # Subpoints and distances of all the culminations at once
+    subpoint = satellite.at(culminations).subpoint()
+    altitudes_km = subpoint.elevation.km  # Altitude above Earth's surface in kilometers
+    observer_location = (observer.latitude.degrees, observer.longitude.degrees)
+    distances_km = geo_distance.distances_km(observer_location, subpoint.latitude.degrees, subpoint.longitude.degrees,
+                                             mode=distance_mode, radius=radius)
+    for time, altitude_km, distance_km in zip(culminations, altitudes_km, distances_km):
+        if distance_km > radius:  # Exclude satellites too far away
+            continue
+        pass_events.append({
+            'culmination_time': time.utc_strftime('%Y-%m-%d %H:%M:%S'),
+            'altitude_km': altitude_km,
+            'distance_km': float(distance_km)
+        })
+
+    return pass_events
+
+
+def chunk_pass_details(chunk, observer_location, radius, start_tt, end_tt):
+    # Runs in a worker process; the window travels as (whole, fraction) pairs so
+    # every worker searches exactly the same window as the serial path
+    ts = load.timescale()
+    start_time = ts.tt_jd(*start_tt)
+    end_time = ts.tt_jd(*end_tt)
+    return [next_pass_details(debris['TLE_LINE1'], debris['TLE_LINE2'], observer_location, radius, start_time, end_time)
+            for debris in chunk]
+
+
+def parallel_pass_details(entries, observer_location, radius, start_time, end_time=None, workers=4, chunk_size=50, progress=None):
+    """
+    Run next_pass_details for every entry across a pool of worker processes.
+    entries must all have TLE lines. Returns a list of (entry, pass_events)
+    in the same order as entries, so sorting the records built from it
+    gives the same result as the serial loop.
+    """
+    chunks = [entries[i:i + chunk_size] for i in range(0, len(entries), chunk_size)]
+    chunk_results = [None] * len(chunks)
+    if end_time is None:
+        end_time = start_time + timedelta(days=1)
+    start_tt = (start_time.whole, start_time.tt_fraction)
+    end_tt = (end_time.whole, end_time.tt_fraction)
+    done = 0
+
+    # acquireData.py has no __main__ guard, so the workers must be forked rather than spawned
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork')) as executor:
+        futures = {executor.submit(chunk_pass_details, chunk, observer_location, radius, start_tt, end_tt): i
+                   for i, chunk in enumerate(chunks)}
+        for future in as_completed(futures):
+            i = futures[future]
+            chunk_results[i] = future.result()
+            done += len(chunks[i])
+            if progress:
+                progress(done, len(entries))
+
+    pass_results = []
+    for chunk, results in zip(chunks, chunk_results):
+        pass_results.extend(zip(chunk, results))
+    return pass_results
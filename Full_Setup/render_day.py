@@ -0,0 +1,133 @@
+import hashlib
+import json
+import sys
+import time
+
+import numpy as np
+
+import audio_engine
+import audio_sink
+import chime_bank
+import chime_map
+import limiter
+import pass_store
+import trigger_index
+import voice_synth
+
+# Renders the chimes of a pass table to WAV on a virtual clock, far faster than
+# real time, with the same mapping (chime_map), synthesis, scheduling and
+# limiting as main.py.
+#
+#   python render_day.py debris_data.json day.wav [hours] [chunk_minutes] [voices|waveform]
+#
+# The output is split into chunk_minutes files, day_000.wav, day_001.wav, ...
+# (60 minutes unless given). chunk_minutes 0 writes day.wav, going on in
+# day_001.wav, ... only where a file reaches the 4 GiB WAV limit (13.5 hours);
+# chunks longer than that are rejected.
+# Stretches with nothing playing are skipped over instead of rendered. The
+# SHA-1 of the samples is printed, for checking that a change left the audio
+# alone.
+
+RATE = 44100
+BLOCK = 1024
+LOOKAHEAD = 5  # seconds, as chime_lookahead in main.py
+VOLUME = 0.8
+MAX_SKIP = 60 * RATE  # frames of silence written at a time
+
+
+def load_passes(filename):
+    if filename.endswith('.pass'):
+        return pass_store.open_pass_store(filename)
+    with open(filename, 'r') as file:
+        return json.load(file).get('data', [])
+
+
+class ChunkedWav(audio_sink.WavFiles):
+    # WavFiles that also hashes the samples, and leaves the headers until each file is closed
+    def __init__(self, filename, chunk_frames=None):
+        super().__init__(filename, RATE, chunk_frames)
+        self.digest = hashlib.sha1()
+
+    def write_pcm(self, frames):
+        self.digest.update(frames)
+        self.file.writeframesraw(frames)
+
+
+def render(passes, filename, hours=24, chunk_minutes=60, chime_mode="voices", volume=VOLUME):
+    chunk_frames = None if chunk_minutes is None else int(chunk_minutes * 60 * RATE)
+    if chunk_frames is not None and chunk_frames > audio_sink.MAX_WAV_FRAMES:
+        raise ValueError(f"{chunk_minutes} minute chunks would be over the 4 GiB WAV limit, "
+                         f"at most {audio_sink.MAX_WAV_FRAMES / RATE / 60:.0f} minutes")
+    schedule = trigger_index.PassSchedule(passes)
+    if not len(schedule.epochs):
+        print("No passes to render.")
+        return
+    start = int(schedule.epochs[0]) - 1
+    total_frames = int(hours * 3600 * RATE)
+
+    clock = [float(start)]
+    engine = audio_engine.AudioEngine(RATE, BLOCK, clock=lambda: clock[0])
+    engine.limiter = limiter.PeakLimiter(RATE)
+    synth = voice_synth.VoiceSynth(max_voices=32, rate=RATE, block_size=BLOCK)
+    engine.sources.append(synth)
+    bank = None
+    if chime_mode == "waveform":
+        rcs_classes = {chime_map.rcs_to_duration_bin(rcs_size) for rcs_size in [None, 'SMALL', 'MEDIUM', 'LARGE', 'unknown']}
+        bank = chime_bank.ChimeBank([(chime_map.note_frequencies[note], duration, decay_rate) for note in chime_map.notes for duration, decay_rate in rcs_classes])
+
+    output = ChunkedWav(filename, chunk_frames)
+    scheduled_chimes = trigger_index.AlertExpiry()
+    chimes = 0
+    frames = 0
+    began = time.perf_counter()
+    while frames < total_frames:
+        now = clock[0]
+        # Same queueing as schedule_chimes in main.py
+        scheduled_chimes.expire(now)
+        for debris in schedule.due(now + LOOKAHEAD):
+            if debris['object_id'] in scheduled_chimes:
+                continue
+            culmination = pass_store.to_epoch(debris['culmination_time'])
+            scheduled_chimes.add(debris['object_id'], culmination + 30 * 60)
+            frequency, pixelbin = chime_map.altitude_to_pitch_bin(debris['altitude_km'])
+            duration, decay_rate = chime_map.rcs_to_duration_bin(debris['rcs'])
+            if chime_mode == "voices":
+                synth.play(frequency, duration, decay_rate, volume, engine.frame_at(culmination))
+            else:
+                engine.mix(bank.waveform(frequency, duration, decay_rate, volume), engine.frame_at(culmination))
+            chimes += 1
+
+        if engine.idle():
+            # Jump, in whole blocks, to the block where the next chime gets queued
+            next_pass = schedule.next_culmination(now + LOOKAHEAD)
+            silent = total_frames - frames if next_pass is None else (next_pass - LOOKAHEAD - now) * RATE
+            blocks = int(min(silent, total_frames - frames, MAX_SKIP) // BLOCK)
+            if blocks > 0:
+                engine.skip(blocks * BLOCK)
+                output.write(np.zeros(blocks * BLOCK, dtype=np.float32))
+                frames += blocks * BLOCK
+                clock[0] = start + frames / RATE
+                continue
+
+        block = engine.render(BLOCK)[:total_frames - frames]
+        output.write(block)
+        frames += len(block)
+        clock[0] = start + frames / RATE
+    output.close()
+
+    elapsed = time.perf_counter() - began
+    audio_seconds = frames / RATE
+    print(f"Rendered {audio_seconds / 3600:.2f} h with {chimes} chimes in {elapsed:.1f} s, "
+          f"{audio_seconds / elapsed:.0f}x real time")
+    print(f"Wrote {', '.join(output.filenames)}")
+    print(f"Samples SHA-1 {output.digest.hexdigest()}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("usage: render_day.py <debris_data.json|debris_data.pass> <output.wav> [hours] [chunk_minutes] [voices|waveform]")
+        sys.exit(1)
+    hours = float(sys.argv[3]) if len(sys.argv) > 3 else 24
+    chunk_minutes = 60 if len(sys.argv) <= 4 else float(sys.argv[4]) or None
+    chime_mode = sys.argv[5] if len(sys.argv) > 5 else "voices"
+    render(load_passes(sys.argv[1]), sys.argv[2], hours, chunk_minutes, chime_mode)
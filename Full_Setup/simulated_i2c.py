@@ -0,0 +1,97 @@
+import random
+import threading
+import time
+
+import adc_service
+
+# Stand-in for smbus.SMBus with an ADS1115 on it, for running the ADC code
+# without the hardware.
+#
+#   python simulated_i2c.py
+#
+# Knob positions are set in counts per channel (levels). The config register
+# is decoded for the input, mode and data rate. A conversion takes one data
+# rate period from the config write or the previous conversion, and until it
+# finishes the conversion register still holds the last result, as on the chip.
+# noise adds that many counts of random jitter to every conversion.
+
+
+class SimulatedBus:
+    def __init__(self, levels=None, address=0x48, noise=0, seed=0):
+        self.levels = dict(levels or {0: 16000, 1: 8000})
+        self.address = address
+        self.noise = noise
+        self.random = random.Random(seed)
+        self.config = [0x85, 0x83]  # power-on default: single-shot, powered down
+        self.conversion = 0
+        self.started = None  # when the running conversion began
+        self.transactions = 0
+        self.lock = threading.Lock()
+
+    def check_address(self, address):
+        if address != self.address:
+            raise OSError(121, "Remote I/O error")
+
+    def channel(self):
+        return ((self.config[0] >> 4) & 0x07) - 4
+
+    def period(self):
+        rates = {bits: rate for rate, bits in adc_service.DATA_RATES.items()}
+        return 1.0 / rates[(self.config[1] >> 5) & 0x07]
+
+    def convert(self):
+        level = self.levels.get(self.channel(), 0)
+        if self.noise:
+            level += self.random.randint(-self.noise, self.noise)
+        return max(-32768, min(32767, level))
+
+    def update(self):
+        # Finish any conversions that are due by now
+        if self.started is None:
+            return
+        now = time.monotonic()
+        if now - self.started >= self.period():
+            self.conversion = self.convert()
+            single_shot = self.config[0] & 0x01
+            self.started = None if single_shot else now
+
+    def write_i2c_block_data(self, address, register, data):
+        self.check_address(address)
+        with self.lock:
+            self.transactions += 1
+            if register == adc_service.ADS1115_CONFIG:
+                self.update()
+                self.config = list(data[:2])
+                continuous = not (self.config[0] & 0x01)
+                if continuous or self.config[0] & 0x80:
+                    self.started = time.monotonic()
+
+    def read_i2c_block_data(self, address, register, length):
+        self.check_address(address)
+        with self.lock:
+            self.transactions += 1
+            self.update()
+            if register == adc_service.ADS1115_CONFIG:
+                return self.config[:length]
+            value = self.conversion & 0xFFFF
+            return [value >> 8, value & 0xFF][:length]
+
+
+if __name__ == "__main__":
+    bus = SimulatedBus({0: 16000, 1: 8000}, noise=200)
+    adc = adc_service.ADCService(bus, channels=(0, 1)).start()
+    began = time.perf_counter()
+    adc.wait_ready(5)
+    print(f"Windows full after {time.perf_counter() - began:.2f} s")
+
+    began = time.perf_counter()
+    for _ in range(10000):
+        adc.value(1, 27270)
+    print(f"value() takes {(time.perf_counter() - began) / 10000 * 1e6:.1f} us")
+    print(f"A0 {adc.raw(0)} counts, radius {adc.value(0) * 500:.0f} km; A1 {adc.raw(1)} counts, volume {adc.value(1, 27270):.2f}")
+
+    bus.levels[1] = 20000  # turn the volume knob
+    time.sleep(1)
+    print(f"After turning the knob: A1 {adc.raw(1)} counts, volume {adc.value(1, 27270):.2f}")
+    adc.stop()
+    print(f"{adc.samples} samples, {adc.errors} errors, {bus.transactions} bus transactions")
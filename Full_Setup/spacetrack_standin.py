@@ -0,0 +1,139 @@
+import csv
+import io
+import json
+import sys
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+# Local stand-in for the parts of space-track.org that acquireData.py uses,
+# so the download and sync paths can be exercised without an account.
+# Answers in json, csv, 3le or tle as the query's format/ asks, with just
+# the predicates/ fields if there are any.
+#
+#   python spacetrack_standin.py catalog.json 8080
+#
+# then point LOGIN_URL / DATA_URL at http://localhost:8080 instead of
+# https://www.space-track.org.
+
+QUERY_PREFIX = '/basicspacedata/query/class/gp/'
+
+
+def parse_epoch(epoch):
+    return datetime.strptime(epoch[:19], '%Y-%m-%dT%H:%M:%S')
+
+
+def matches(record, field, value, now):
+    # Just the predicate forms the SpaceChimes queries use
+    field = field.upper()
+    if value == 'null-val':
+        return record.get(field) is None
+    if value.startswith('>now-'):
+        return parse_epoch(record.get(field, '1970-01-01T00:00:00')) > now - timedelta(days=float(value[5:]))
+    if value[0] in '<>':
+        if record.get(field) is None:
+            return False
+        try:
+            actual, operand = float(record[field]), float(value[1:])
+        except ValueError:
+            actual, operand = str(record[field]).replace('T', ' '), value[1:].replace('T', ' ')
+        return actual > operand if value[0] == '>' else actual < operand
+    if ',' in value:
+        return str(record.get(field)) in value.split(',')
+    return str(record.get(field)) == value
+
+
+def run_query(records, path, now):
+    parts = [unquote(part) for part in path[len(QUERY_PREFIX):].split('/')]
+    predicates = dict(zip(parts[0::2], parts[1::2]))
+    selected = list(records)
+    for field, value in predicates.items():
+        if field in ('orderby', 'format', 'predicates'):
+            continue
+        selected = [record for record in selected if matches(record, field, value, now)]
+    if 'orderby' in predicates:
+        field = predicates['orderby'].split()[0].upper()
+        selected.sort(key=lambda record: (len(str(record.get(field))), str(record.get(field))))
+    if 'predicates' in predicates:
+        # Only the listed fields, in that order
+        fields = [field.upper() for field in predicates['predicates'].split(',')]
+        selected = [{field: record.get(field) for field in fields} for record in selected]
+    return selected, predicates.get('format', 'json')
+
+
+def format_body(records, output_format):
+    if output_format == 'csv':
+        text = io.StringIO()
+        if records:
+            writer = csv.DictWriter(text, fieldnames=list(records[0]), lineterminator='\n')
+            writer.writeheader()
+            writer.writerows({field: '' if value is None else value for field, value in record.items()} for record in records)
+        return text.getvalue().encode(), 'text/csv'
+    if output_format in ('3le', 'tle'):
+        lines = []
+        for record in records:
+            if output_format == '3le':
+                lines.append(record.get('TLE_LINE0') or f"0 {record.get('OBJECT_NAME')}")
+            lines += [record.get('TLE_LINE1'), record.get('TLE_LINE2')]
+        return ('\n'.join(lines) + '\n').encode(), 'text/plain'
+    return json.dumps(records).encode(), 'application/json'
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, status, body, content_type='application/json'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.bytes_sent += len(body)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        if self.path == '/ajaxauth/login':
+            self.send_response(200)
+            self.send_header('Set-Cookie', 'chocolatechip=standin; Path=/')
+            self.send_header('Content-Length', '2')
+            self.end_headers()
+            self.wfile.write(b'""')
+        else:
+            self.send_body(404, b'')
+
+    def do_GET(self):
+        if not self.path.startswith(QUERY_PREFIX):
+            self.send_body(404, b'')
+            return
+        self.server.requests.append(self.path)
+        selected, output_format = run_query(self.server.records, self.path, self.server.now())
+        self.send_body(200, *format_body(selected, output_format))
+
+
+def start_standin(records, port=0):
+    """
+    Serve records from a background thread. Returns the server; its
+    base_url, records (mutable), requests and bytes_sent attributes let a
+    test change the catalog and see what was asked for and sent.
+    """
+    server = ThreadingHTTPServer(('localhost', port), StandInHandler)
+    server.records = records
+    server.requests = []
+    server.bytes_sent = 0
+    server.now = datetime.utcnow
+    server.base_url = f'http://localhost:{server.server_address[1]}'
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    with open(sys.argv[1], 'r') as file:
+        catalog = json.load(file)
+    if isinstance(catalog, dict):
+        catalog = catalog.get("data", [])
+    standin = start_standin(catalog, int(sys.argv[2]) if len(sys.argv) > 2 else 8080)
+    print(f"Serving {len(catalog)} records at {standin.base_url}")
+    threading.Event().wait()
@@ -0,0 +1,104 @@
+import ctypes
+import ctypes.util
+import os
+import struct
+import threading
+import time
+
+# Watches the pass table for new versions published by acquireData.py.
+#
+# acquireData.py writes the table next to its final name and renames it over
+# the old one, so a reader only ever sees a complete file. On Linux the watch
+# is an inotify watch on the containing directory and the thread blocks until
+# the kernel reports a rename or close-after-write of the table; elsewhere it
+# falls back to checking the modification time every poll_interval seconds.
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CLOEXEC = 0o2000000
+EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, name length
+
+
+def inotify_libc():
+    # libc with the inotify calls, or None where they do not exist
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+def event_names(buffer):
+    # File names in a buffer of inotify events
+    offset = 0
+    while offset + EVENT_HEADER.size <= len(buffer):
+        wd, mask, cookie, length = EVENT_HEADER.unpack_from(buffer, offset)
+        offset += EVENT_HEADER.size
+        yield buffer[offset:offset + length].rstrip(b'\0').decode('utf-8', 'replace')
+        offset += length
+
+
+class PassTableWatcher:
+    """
+    Background thread that reloads the pass table whenever a new version is
+    published. load() builds the new table and its result replaces
+    self.table in a single assignment, so the main loop picks it up by
+    comparing references. on_change() is called after each swap.
+    """
+
+    def __init__(self, filename, load, on_change=None, poll_interval=5):
+        self.path = os.path.abspath(filename)
+        self.load = load
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self.table = None
+        self.libc = inotify_libc()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def run(self):
+        if self.libc is not None:
+            fd = self.libc.inotify_init1(IN_CLOEXEC)
+            if fd >= 0:
+                directory = os.path.dirname(self.path).encode()
+                if self.libc.inotify_add_watch(fd, directory, IN_CLOSE_WRITE | IN_MOVED_TO) >= 0:
+                    self.watch_inotify(fd)
+                    return
+                os.close(fd)
+            print("inotify unavailable, polling the pass table instead:", os.strerror(ctypes.get_errno()))
+        self.watch_mtime()
+
+    def watch_inotify(self, fd):
+        name = os.path.basename(self.path)
+        while True:
+            # Blocks until something in the directory is renamed into place or closed after writing
+            if name in event_names(os.read(fd, 4096)):
+                self.reload()
+
+    def watch_mtime(self):
+        last_modified = os.path.getmtime(self.path) if os.path.exists(self.path) else None
+        while True:
+            time.sleep(self.poll_interval)
+            if not os.path.exists(self.path):
+                continue
+            modified = os.path.getmtime(self.path)
+            if modified != last_modified:
+                last_modified = modified
+                self.reload()
+
+    def reload(self):
+        try:
+            table = self.load()
+        except Exception as e:
+            # Keep playing the table we have
+            print("Could not load the new pass table:", e)
+            return
+        self.table = table
+        print("Pass table has been updated.")
+        if self.on_change is not None:
+            self.on_change()
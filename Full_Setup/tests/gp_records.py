@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+from sgp4.api import Satrec, WGS72
+from sgp4.exporter import export_tle
+
+import gp_stream
+from orbit_screen import orbit_heights
+
+# Synthetic GP records for the tests, and for the benchmarks run from Full_Setup
+# (from tests.gp_records import synthetic_catalog)
+
+OBJECT_TYPES = ['DEBRIS', 'ROCKET BODY', 'PAYLOAD', 'UNKNOWN']
+OBJECT_NAMES = {'DEBRIS': 'COSMOS 2251 DEB', 'ROCKET BODY': 'SL-16 R/B', 'PAYLOAD': 'STARLINK-1234', 'UNKNOWN': 'TBA - TO BE ASSIGNED'}
+
+
+def with_checksum(line):
+    digits = sum(int(c) for c in line[:68] if c.isdigit()) + line[:68].count('-')
+    return line[:68] + str(digits % 10)
+
+
+def synthetic_catalog(count, seed=0):
+    # GP records with every field space-track sends, around 40 per object
+    rng = np.random.default_rng(seed)
+    now = datetime.utcnow()
+    records = []
+    for i in range(count):
+        epoch = now - timedelta(days=float(rng.uniform(0, 10)))
+        epoch_days = (epoch - datetime(1949, 12, 31)).total_seconds() / 86400.0
+        satrec = Satrec()
+        satrec.sgp4init(WGS72, 'i', 10000 + i, epoch_days, rng.uniform(0, 1e-3), 0.0, 0.0,
+                        rng.uniform(0, 0.05), rng.uniform(0, 2 * np.pi), np.radians(rng.uniform(0, 110)),
+                        rng.uniform(0, 2 * np.pi), rng.uniform(11, 16) * 2 * np.pi / 1440, rng.uniform(0, 2 * np.pi))
+        tle_line1, tle_line2 = export_tle(satrec)
+        object_id = f"{1960 + i % 60}-{i % 999:03d}A"
+        tle_line1 = with_checksum(tle_line1[:9] + f"{object_id[2:4]}{object_id[5:]}".ljust(8) + tle_line1[17:])
+        object_type = OBJECT_TYPES[i % len(OBJECT_TYPES)]
+        records.append({
+            'CCSDS_OMM_VERS': '2.0', 'COMMENT': 'GENERATED VIA SPACE-TRACK.ORG API', 'CREATION_DATE': now.strftime('%Y-%m-%dT%H:%M:%S'),
+            'ORIGINATOR': '18 SPCS', 'OBJECT_NAME': OBJECT_NAMES[object_type], 'OBJECT_ID': object_id,
+            'CENTER_NAME': 'EARTH', 'REF_FRAME': 'TEME', 'TIME_SYSTEM': 'UTC', 'MEAN_ELEMENT_THEORY': 'SGP4',
+            'EPOCH': gp_stream.tle_epoch_iso(tle_line1), 'MEAN_MOTION': tle_line2[52:63].strip(),
+            'ECCENTRICITY': '0.' + tle_line2[26:33], 'INCLINATION': tle_line2[8:16].strip(),
+            'RA_OF_ASC_NODE': tle_line2[17:25].strip(), 'ARG_OF_PERICENTER': tle_line2[34:42].strip(),
+            'MEAN_ANOMALY': tle_line2[43:51].strip(), 'EPHEMERIS_TYPE': '0', 'CLASSIFICATION_TYPE': 'U',
+            'NORAD_CAT_ID': str(10000 + i), 'ELEMENT_SET_NO': '999', 'REV_AT_EPOCH': str(i % 99999),
+            'BSTAR': '0.00012345000000', 'MEAN_MOTION_DOT': '0.00001234', 'MEAN_MOTION_DDOT': '0.0000000000000',
+            'SEMIMAJOR_AXIS': '7000.000', 'PERIOD': '97.000', 'APOAPSIS': None, 'PERIAPSIS': None,
+            'OBJECT_TYPE': object_type, 'RCS_SIZE': ['SMALL', 'MEDIUM', 'LARGE', None][i % 4],
+            'COUNTRY_CODE': 'CIS', 'LAUNCH_DATE': '1993-06-16', 'SITE': 'PKMTR', 'DECAY_DATE': None,
+            'FILE': '4321123', 'GP_ID': str(200000000 + i),
+            'TLE_LINE0': f"0 {OBJECT_NAMES[object_type]}", 'TLE_LINE1': tle_line1, 'TLE_LINE2': tle_line2,
+        })
+        perigee, apogee = orbit_heights(records[-1])
+        records[-1]['PERIAPSIS'], records[-1]['APOAPSIS'] = f"{perigee:.3f}", f"{apogee:.3f}"
+    return records
@@ -0,0 +1,123 @@
+import time
+
+import pytest
+
+import adc_service
+from simulated_i2c import SimulatedBus
+
+
+@pytest.fixture
+def service(tmp_path):
+    started = []
+
+    def start(bus, channels, **options):
+        adc = adc_service.ADCService(bus, channels=channels, interval=0.01, data_rate=860,
+                                     lock_file=str(tmp_path / 'ads1115.lock'), **options).start()
+        started.append(adc)
+        return adc
+
+    yield start
+    for adc in started:
+        adc.stop()
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_each_channel_reads_its_own_knob(service):
+    adc = service(SimulatedBus({0: 16000, 1: 8000}, noise=200), (0, 1))
+    assert adc.wait_ready(2)
+    assert abs(adc.raw(0) - 16000) <= 200
+    assert abs(adc.raw(1) - 8000) <= 200
+    assert adc.value(1, 27270) == pytest.approx((27270 - adc.raw(1)) / 27270)
+
+
+def test_median_ignores_a_spike(service):
+    bus = SimulatedBus({0: 16000})
+    adc = service(bus, (0,), window=9)
+    assert adc.wait_ready(2)
+    samples = adc.samples
+    bus.levels[0] = 32767
+    assert wait_for(lambda: adc.samples > samples)  # a reading or two of the spike
+    bus.levels[0] = 16000
+    medians = []
+    for _ in range(20):
+        medians.append(adc.raw(0))
+        time.sleep(0.005)
+    assert medians == [16000] * 20
+
+
+def test_turning_the_knob_moves_the_value(service):
+    bus = SimulatedBus({1: 8000})
+    adc = service(bus, (1,))
+    assert adc.wait_ready(2)
+    bus.levels[1] = 20000
+    assert wait_for(lambda: adc.raw(1) == 20000)
+
+
+def test_single_channel_configures_once(service):
+    bus = SimulatedBus({1: 8000})
+    adc = service(bus, (1,))
+    assert wait_for(lambda: adc.samples >= 20)
+    assert adc.switches == 1
+
+
+def test_single_channel_switches_back_after_another_writer(service):
+    bus = SimulatedBus({0: 16000, 1: 8000})
+    adc = service(bus, (1,))
+    assert adc.wait_ready(2)
+    # acquireData's service moves the input to A0 and leaves it there
+    with open(adc.lock_file, 'w'):
+        bus.write_i2c_block_data(bus.address, adc_service.ADS1115_CONFIG, adc_service.continuous_config(0, 860))
+        time.sleep(2.0 / 860)
+    assert wait_for(lambda: adc.switches == 2)
+    samples = adc.samples
+    assert wait_for(lambda: adc.samples >= samples + adc.window)
+    assert adc.raw(1) == 8000
+
+
+def test_two_channels_switch_every_sample(service):
+    adc = service(SimulatedBus({0: 16000, 1: 8000}), (0, 1))
+    assert wait_for(lambda: adc.samples >= 10)
+    assert adc.switches >= adc.samples
+
+
+def test_bus_errors_are_counted(service):
+    adc = service(SimulatedBus(address=0x49), (0,))
+    assert wait_for(lambda: adc.errors >= 3)
+    assert not adc.wait_ready(0.05)
+    assert adc.raw(0) is None and adc.value(0) is None
+
+
+def test_on_change_fires_when_the_knob_is_turned(service):
+    bus = SimulatedBus({1: 8000}, noise=50)
+    calls = []
+    adc = service(bus, (1,), on_change=lambda: calls.append(time.monotonic()), change_threshold=273)
+    assert adc.wait_ready(2)
+    assert wait_for(lambda: adc.samples >= 20)
+    assert len(calls) == 1  # the first reading, then noise well under the threshold
+    bus.levels[1] = 20000
+    assert wait_for(lambda: len(calls) >= 2)
+    assert wait_for(lambda: adc.raw(1) >= 19950)
+    settled = len(calls)
+    samples = adc.samples
+    assert wait_for(lambda: adc.samples >= samples + 20)
+    assert len(calls) == settled
+
+
+def test_bus_lock_holds_off_the_sampler(service):
+    adc = service(SimulatedBus({1: 8000}), (1,))
+    assert adc.wait_ready(2)
+    # a one-shot read in main.py or acquireData.py, as read_volume does it
+    with adc_service.bus_lock(adc.lock_file):
+        time.sleep(0.05)
+        samples = adc.samples
+        time.sleep(0.1)
+        assert adc.samples <= samples + 1
+    assert wait_for(lambda: adc.samples > samples + 1)
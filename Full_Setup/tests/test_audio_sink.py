@@ -0,0 +1,54 @@
+import time
+import wave
+
+import numpy as np
+import pytest
+
+import audio_engine
+import audio_sink
+
+
+def read_frames(filename):
+    with wave.open(filename, 'rb') as file:
+        return np.frombuffer(file.readframes(file.getnframes()), dtype='<i2')
+
+
+def test_one_file_until_the_size_limit(tmp_path, monkeypatch):
+    monkeypatch.setattr(audio_sink, 'MAX_WAV_FRAMES', 1000)
+    block = np.linspace(-1, 1, 2500, dtype=np.float32)
+    files = audio_sink.WavFiles(str(tmp_path / 'chimes.wav'), 44100)
+    files.write(block[:700])
+    files.write(block[700:])
+    files.close()
+    assert [name.rsplit('/', 1)[-1] for name in files.filenames] == ['chimes.wav', 'chimes_001.wav', 'chimes_002.wav']
+    frames = [read_frames(name) for name in files.filenames]
+    assert [len(part) for part in frames] == [1000, 1000, 500]
+    assert np.array_equal(np.concatenate(frames), np.frombuffer(audio_sink.pcm16(block), dtype='<i2'))
+
+
+def test_chunks_are_numbered_from_zero(tmp_path):
+    files = audio_sink.WavFiles(str(tmp_path / 'day.wav'), 44100, chunk_frames=100)
+    files.write(np.zeros(250, dtype=np.float32))
+    files.close()
+    assert [name.rsplit('/', 1)[-1] for name in files.filenames] == ['day_000.wav', 'day_001.wav', 'day_002.wav']
+
+
+def test_chunks_over_the_limit_are_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        audio_sink.WavFiles(str(tmp_path / 'day.wav'), 44100, chunk_frames=audio_sink.MAX_WAV_FRAMES + 1)
+
+
+def test_the_limit_is_the_largest_valid_riff_size():
+    assert 36 + 2 * audio_sink.MAX_WAV_FRAMES <= 2 ** 32 - 1 < 36 + 2 * (audio_sink.MAX_WAV_FRAMES + 1)
+
+
+def test_wav_sink_rolls_over(tmp_path, monkeypatch):
+    monkeypatch.setattr(audio_sink, 'MAX_WAV_FRAMES', 3000)
+    engine = audio_engine.AudioEngine(rate=44100, block_size=1024)
+    sink = audio_sink.WavSink(engine, str(tmp_path / 'chimes.wav'), realtime=False).start()
+    while sink.blocks < 5:
+        time.sleep(0.001)
+    sink.close()
+    lengths = [len(read_frames(name)) for name in sink.files.filenames]
+    assert len(lengths) >= 2 and all(length == 3000 for length in lengths[:-1])
+    assert sum(lengths) == sink.blocks * 1024
@@ -0,0 +1,139 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+import requests
+
+import catalog_sync
+import filter_pipeline
+from spacetrack_standin import start_standin
+
+NOW = datetime(2026, 10, 18, 12, 0, 0)
+FULL_PATH = '/basicspacedata/query/class/gp/decay_date/null-val/epoch/%3Enow-30/orderby/norad_cat_id/format/json'
+DELTA_PATH = '/basicspacedata/query/class/gp/creation_date/%3E{since}/orderby/norad_cat_id/format/json'
+
+
+def gp_record(norad_id, epoch_age_days=1.0, created=NOW - timedelta(hours=2), decay_date=None):
+    return {
+        'NORAD_CAT_ID': str(norad_id), 'OBJECT_ID': f"1999-{norad_id % 1000:03d}A", 'OBJECT_TYPE': 'DEBRIS',
+        'EPOCH': (NOW - timedelta(days=epoch_age_days)).strftime('%Y-%m-%dT%H:%M:%S.%f'),
+        'CREATION_DATE': created.strftime('%Y-%m-%dT%H:%M:%S'), 'DECAY_DATE': decay_date,
+        'INCLINATION': '51.6', 'ECCENTRICITY': '0.0001', 'MEAN_MOTION': '15.5', 'PERIAPSIS': '400.0',
+        'TLE_LINE1': f"1 {norad_id:05d}U", 'TLE_LINE2': f"2 {norad_id:05d}",
+    }
+
+
+@pytest.fixture
+def standin():
+    server = start_standin([gp_record(norad_id) for norad_id in range(100, 110)])
+    server.now = lambda: NOW
+    yield server
+    server.shutdown()
+
+
+def sync(standin, filename, now=NOW, ingest_format="json", keep=None):
+    session = requests.Session()
+    session.post(standin.base_url + '/ajaxauth/login', data={})
+    return catalog_sync.sync_catalog(session, str(filename), standin.base_url + FULL_PATH, standin.base_url + DELTA_PATH,
+                                     now=now, ingest_format=ingest_format, keep=keep)
+
+
+def ids(records):
+    return [record['NORAD_CAT_ID'] for record in records]
+
+
+@pytest.mark.parametrize('ingest_format', ['json', 'csv'])
+def test_first_sync_is_a_full_pull(standin, tmp_path, ingest_format):
+    records = sync(standin, tmp_path / 'data.json', ingest_format=ingest_format)
+    assert ids(records) == [str(norad_id) for norad_id in range(100, 110)]
+    assert '/creation_date/' not in standin.requests[-1]
+    with open(tmp_path / 'data.json', 'r') as file:
+        saved = json.load(file)
+    assert saved['last_full_sync'] == NOW.strftime(catalog_sync.TIME_FORMAT)
+    assert ids(saved['data']) == ids(records)
+
+
+@pytest.mark.parametrize('ingest_format', ['json', 'csv'])
+def test_delta_merges_changes_and_pops_decays(standin, tmp_path, ingest_format):
+    sync(standin, tmp_path / 'data.json', ingest_format=ingest_format)
+    later = NOW + timedelta(hours=1)
+    changed = gp_record(101, epoch_age_days=0.1, created=NOW - timedelta(minutes=30))
+    standin.records[1] = changed
+    standin.records.append(gp_record(200, created=NOW - timedelta(minutes=20)))
+    standin.records[2] = gp_record(102, created=NOW - timedelta(minutes=10), decay_date='2026-10-18')
+
+    records = sync(standin, tmp_path / 'data.json', now=later, ingest_format=ingest_format)
+    assert '/creation_date/' in standin.requests[-1]
+    assert ids(records) == ['100', '101'] + [str(norad_id) for norad_id in range(103, 110)] + ['200']
+    assert records[1]['EPOCH'] == changed['EPOCH']
+
+
+@pytest.mark.parametrize('ingest_format', ['json', 'csv'])
+def test_keep_filters_the_stream_but_not_decays(standin, tmp_path, ingest_format):
+    seen = []
+
+    def debris_only(record):
+        seen.append(record['NORAD_CAT_ID'])
+        return record['OBJECT_TYPE'] == 'DEBRIS'
+
+    standin.records[5]['OBJECT_TYPE'] = 'PAYLOAD'
+    records = sync(standin, tmp_path / 'data.json', ingest_format=ingest_format, keep=debris_only)
+    assert '105' not in ids(records)
+
+    # An object that now fails keep leaves the catalog; a decayed one is still popped without asking keep
+    standin.records[3] = dict(gp_record(103, created=NOW - timedelta(minutes=30)), OBJECT_TYPE='PAYLOAD')
+    standin.records[4] = gp_record(104, created=NOW - timedelta(minutes=20), decay_date='2026-10-18')
+    seen.clear()
+    records = sync(standin, tmp_path / 'data.json', now=NOW + timedelta(hours=1), ingest_format=ingest_format, keep=debris_only)
+    assert seen == ['103']
+    assert ids(records) == ['100', '101', '102'] + [str(norad_id) for norad_id in range(106, 110)]
+
+
+def test_update_that_fails_an_element_rule_evicts_the_old_record(standin, tmp_path):
+    pipeline = filter_pipeline.FilterPipeline({"max_perigee_km": 500}, (29.76303, -95.362061), now=NOW)
+    session = requests.Session()
+    session.post(standin.base_url + '/ajaxauth/login', data={})
+
+    def pipeline_sync(now):
+        return catalog_sync.sync_catalog(session, str(tmp_path / 'data.json'), pipeline.query(standin.base_url + FULL_PATH),
+                                         pipeline.query(standin.base_url + DELTA_PATH, incremental=True), now=now,
+                                         keep=lambda record: pipeline.reason(record) is None)
+
+    assert len(pipeline_sync(NOW)) == 10
+    # Object 103 is boosted above the perigee ceiling; the delta query must still return it
+    standin.records[3] = dict(gp_record(103, created=NOW - timedelta(minutes=30)), PERIAPSIS='650.0')
+    records = pipeline_sync(NOW + timedelta(hours=1))
+    assert '/periapsis/' not in standin.requests[-1]
+    assert '103' not in ids(records) and len(records) == 9
+    assert pipeline.counters[filter_pipeline.HIGH_PERIGEE] == 1
+
+
+def test_delta_prunes_aged_out_elements(standin, tmp_path):
+    sync(standin, tmp_path / 'data.json')
+    # Nothing new on the server, but six days on object 100's elements are past the 30-day window
+    standin.records[0]['EPOCH'] = (NOW - timedelta(days=25)).strftime('%Y-%m-%dT%H:%M:%S')
+    with open(tmp_path / 'data.json', 'r') as file:
+        saved = json.load(file)
+    saved['data'][0]['EPOCH'] = standin.records[0]['EPOCH']
+    with open(tmp_path / 'data.json', 'w') as file:
+        json.dump(saved, file)
+
+    records = sync(standin, tmp_path / 'data.json', now=NOW + timedelta(days=6))
+    assert '/creation_date/' in standin.requests[-1]
+    assert '100' not in ids(records)
+    assert len(records) == 9
+
+
+def test_full_pull_on_schedule(standin, tmp_path):
+    sync(standin, tmp_path / 'data.json')
+    standin.records.pop()
+    records = sync(standin, tmp_path / 'data.json', now=NOW + timedelta(days=7))
+    assert '/creation_date/' not in standin.requests[-1]
+    assert '109' not in ids(records)
+
+
+def test_failed_request_returns_none(standin, tmp_path):
+    session = requests.Session()
+    bad_url = standin.base_url + '/no/such/query'
+    assert catalog_sync.sync_catalog(session, str(tmp_path / 'data.json'), bad_url, bad_url, now=NOW) is None
+    assert not (tmp_path / 'data.json').exists()
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+import geo_distance
+
+RADIUS = 500.0
+# Houston, near the pole, and on the antimeridian where longitudes wrap
+OBSERVERS = [(29.76303, -95.362061), (78.2232, 15.6267), (-17.7134, 179.9)]
+
+
+def subpoints(observer_location, count=2000, seed=0):
+    # Subpoints anywhere on the globe, plus a crowd within 5 km of the radius
+    rng = np.random.default_rng(seed)
+    latitudes = np.degrees(np.arcsin(rng.uniform(-1, 1, count)))
+    longitudes = rng.uniform(-180, 180, count)
+    bearing = rng.uniform(0, 2 * np.pi, count)
+    reach = rng.uniform(RADIUS - 5, RADIUS + 5, count) / geo_distance.MEAN_RADIUS_KM
+    lat0, lon0 = np.radians(observer_location)
+    near_lat = np.arcsin(np.sin(lat0) * np.cos(reach) + np.cos(lat0) * np.sin(reach) * np.cos(bearing))
+    near_lon = lon0 + np.arctan2(np.sin(bearing) * np.sin(reach) * np.cos(lat0), np.cos(reach) - np.sin(lat0) * np.sin(near_lat))
+    return (np.concatenate([latitudes, np.degrees(near_lat)]),
+            np.concatenate([longitudes, (np.degrees(near_lon) + 180) % 360 - 180]))
+
+
+@pytest.fixture(scope='module', params=OBSERVERS, ids=['houston', 'svalbard', 'antimeridian'])
+def reference(request):
+    observer_location = request.param
+    latitudes, longitudes = subpoints(observer_location)
+    distances = geo_distance.distances_km(observer_location, latitudes, longitudes, mode="geodesic")
+    return observer_location, latitudes, longitudes, distances
+
+
+def test_screened_is_exact_inside_the_radius(reference):
+    observer_location, latitudes, longitudes, expected = reference
+    distances = geo_distance.distances_km(observer_location, latitudes, longitudes, mode="screened", radius=RADIUS)
+    inside = expected <= RADIUS
+    assert inside.sum() > 100
+    assert np.abs(distances - expected)[inside].max() < 1e-6
+
+
+def test_screened_puts_no_point_on_the_wrong_side(reference):
+    observer_location, latitudes, longitudes, expected = reference
+    distances = geo_distance.distances_km(observer_location, latitudes, longitudes, mode="screened", radius=RADIUS)
+    assert ((distances <= RADIUS) != (expected <= RADIUS)).sum() == 0
+
+
+def test_haversine_error_is_within_the_bound(reference):
+    observer_location, latitudes, longitudes, expected = reference
+    distances = geo_distance.distances_km(observer_location, latitudes, longitudes, mode="haversine")
+    assert np.all(np.abs(distances - expected) <= geo_distance.SPHERE_ERROR * expected + 1e-6)
+
+
+def test_vincenty_matches_geodesic(reference):
+    observer_location, latitudes, longitudes, expected = reference
+    distances = geo_distance.distances_km(observer_location, latitudes, longitudes, mode="vincenty")
+    assert np.abs(distances - expected).max() < 1e-6
+
+
+def test_haversine_bound_is_tight_north_south_at_the_equator():
+    # The worst case the bound allows for: a meridian arc across the equator
+    expected = geo_distance.distances_km((0.0, 0.0), [4.5], [0.0], mode="geodesic")[0]
+    distances = geo_distance.distances_km((0.0, 0.0), [4.5], [0.0], mode="haversine")[0]
+    assert 0.005 * expected < abs(distances - expected) <= geo_distance.SPHERE_ERROR * expected
+
+
+def test_screened_without_radius_is_vincenty():
+    latitudes, longitudes = subpoints(OBSERVERS[0], count=50)
+    assert np.array_equal(geo_distance.distances_km(OBSERVERS[0], latitudes, longitudes, mode="screened"),
+                          geo_distance.distances_km(OBSERVERS[0], latitudes, longitudes, mode="vincenty"))
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        geo_distance.distances_km(OBSERVERS[0], [0.0], [0.0], mode="flat")
@@ -0,0 +1,75 @@
+import pytest
+import requests
+
+import gp_stream
+from gp_records import synthetic_catalog
+from spacetrack_standin import start_standin
+
+DATA_PATH = '/basicspacedata/query/class/gp/decay_date/null-val/epoch/%3Enow-30/orderby/norad_cat_id/format/json'
+# What both formats carry exactly; 3LE works out OBJECT_TYPE from the name and has no RCS_SIZE
+SHARED_FIELDS = ['NORAD_CAT_ID', 'OBJECT_ID', 'OBJECT_NAME', 'INCLINATION', 'ECCENTRICITY', 'MEAN_MOTION',
+                 'TLE_LINE1', 'TLE_LINE2']
+
+
+@pytest.fixture(scope='module')
+def catalog():
+    return synthetic_catalog(12, seed=3)
+
+
+@pytest.fixture(scope='module')
+def standin(catalog):
+    server = start_standin(catalog)
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def session(standin):
+    session = requests.Session()
+    session.post(standin.base_url + '/ajaxauth/login', data={})
+    return session
+
+
+@pytest.mark.parametrize('ingest_format', gp_stream.FORMATS)
+def test_records_match_the_catalog(standin, session, catalog, ingest_format):
+    records = gp_stream.fetch_records(session, standin.base_url + DATA_PATH, ingest_format)
+    assert len(records) == len(catalog)
+    for record, original in zip(records, catalog):
+        for field in SHARED_FIELDS:
+            assert str(record[field]) == str(original[field]), field
+        assert record['EPOCH'][:19] == original['EPOCH'][:19]
+        assert record['DECAY_DATE'] is None
+
+
+def test_csv_asks_for_just_the_pipeline_fields(standin, session):
+    records = gp_stream.fetch_records(session, standin.base_url + DATA_PATH, "csv")
+    assert '/predicates/' in standin.requests[-1]
+    assert all(list(record) == gp_stream.PIPELINE_FIELDS for record in records)
+
+
+def test_3le_guesses_the_object_type(standin, session, catalog):
+    records = gp_stream.fetch_records(session, standin.base_url + DATA_PATH, "3le")
+    assert [record['OBJECT_TYPE'] for record in records] == [original['OBJECT_TYPE'] for original in catalog]
+
+
+@pytest.mark.parametrize('ingest_format', gp_stream.FORMATS)
+def test_keep_drops_records_as_they_arrive(standin, session, ingest_format):
+    seen = []
+
+    def keep(record):
+        seen.append(record['NORAD_CAT_ID'])
+        return record['OBJECT_TYPE'] == 'DEBRIS'
+
+    records = gp_stream.fetch_records(session, standin.base_url + DATA_PATH, ingest_format, keep=keep)
+    assert len(seen) == 12
+    assert records and all(record['OBJECT_TYPE'] == 'DEBRIS' for record in records)
+
+
+@pytest.mark.parametrize('ingest_format', gp_stream.FORMATS)
+def test_failed_request_returns_none(standin, session, ingest_format):
+    assert gp_stream.fetch_records(session, standin.base_url + '/no/such/query/format/json', ingest_format) is None
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        gp_stream.compact_query('https://example.invalid/class/gp/format/json', 'xml')
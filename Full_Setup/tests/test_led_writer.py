@@ -0,0 +1,191 @@
+import threading
+import time
+
+import pytest
+
+import led_protocol
+import led_link_sim
+import led_writer
+from fake_arduino import FakeArduino
+
+
+class FakeSketch:
+    """
+    Stands in for the port to the framed sketch: bytes written go through
+    led_protocol's Parser and every good frame is answered with an ACK, or
+    with what script says for it in turn ('ack', 'nak' or 'silent').
+    """
+
+    def __init__(self, script=()):
+        self.parser = led_protocol.Parser()
+        self.script = list(script)
+        self.frames = []
+        self.replies = []
+        self.lock = threading.Lock()
+
+    def write(self, data):
+        for byte in data:
+            result = self.parser.feed(byte, time.monotonic() * 1000)
+            if result is None or result == 'nak' or result[0] == 'ascii':
+                continue
+            self.frames.append(result)
+            answer = self.script.pop(0) if self.script else 'ack'
+            with self.lock:
+                if answer == 'ack':
+                    self.replies.append(led_protocol.ACK)
+                elif answer == 'nak':
+                    self.replies.append(led_protocol.NAK)
+        return len(data)
+
+    def read(self, size=1):
+        with self.lock:
+            if self.replies:
+                return bytes([self.replies.pop(0)])
+        time.sleep(0.001)  # the port's read timeout
+        return b''
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+@pytest.fixture
+def writers():
+    started = []
+
+    def start(serial_conn, **options):
+        leds = led_writer.LedWriter(serial_conn, **options).start()
+        started.append(leds)
+        return leds
+
+    yield start
+    for leds in started:
+        leds.stop()
+
+
+@pytest.fixture
+def arduino():
+    arduino = FakeArduino().start()
+    port = open(arduino.port, 'wb', buffering=0)
+    yield arduino, port
+    port.close()
+    arduino.stop()
+
+
+def commands(arduino):
+    return [command for _, command in arduino.events]
+
+
+def test_ascii_burst_goes_out_as_one_write(writers, arduino):
+    arduino, port = arduino
+    leds = writers(port, reset_delay=0.2)
+    for cluster in [3, 3, 4, 3, 5]:
+        leds.highlight(cluster)
+    assert wait_for(lambda: 'r' in commands(arduino))
+    assert commands(arduino) == ['3', '4', '5', 'r']
+    assert leds.writes == 2 and arduino.dropped == 0
+    assert arduino.highlighted == set() and arduino.fading == {3, 4, 5}
+
+
+def test_ascii_writes_are_paced_to_the_receive_buffer(writers, arduino):
+    arduino, port = arduino
+    leds = writers(port, reset_delay=0.2, rx_buffer=2, consume_rate=50)
+    for cluster in range(8):
+        leds.highlight(cluster)
+    assert wait_for(lambda: 'r' in commands(arduino))
+    assert commands(arduino) == [str(cluster) for cluster in range(8)] + ['r']
+    assert leds.writes > 4 and arduino.dropped == 0
+
+
+def test_ascii_reset_waits_for_the_latest_highlight(writers, arduino):
+    arduino, port = arduino
+    leds = writers(port, reset_delay=0.3)
+    began = time.monotonic()
+    leds.highlight(1)
+    time.sleep(0.2)
+    leds.highlight(2)
+    assert wait_for(lambda: 'r' in commands(arduino))
+    reset_at = [when for when, command in arduino.events if command == 'r'][0]
+    assert reset_at - began >= 0.5
+
+
+def test_binary_burst_is_one_highlight_frame_then_reset(writers):
+    sketch = FakeSketch()
+    leds = writers(sketch, reset_delay=0.1, protocol="binary")
+    for cluster in [3, 3, 4, 3, 5]:
+        leds.highlight(cluster)
+    assert wait_for(lambda: len(sketch.frames) == 2)
+    assert sketch.frames == [(led_protocol.HIGHLIGHT, bytes([0b111000])), (led_protocol.RESET, b'')]
+    assert leds.resends == 0 and leds.failures == 0
+
+
+def test_binary_colours_go_out_as_a_delta(writers):
+    sketch = FakeSketch()
+    leds = writers(sketch, reset_delay=10, protocol="binary")
+    leds.highlight(2, (255, 80, 0, 40))
+    leds.highlight(6)
+    assert wait_for(lambda: sketch.frames)
+    assert sketch.frames[0] == (led_protocol.DELTA, bytes([2, 255, 80, 0, 40, 6, 255, 255, 255, 0]))
+
+
+def test_binary_frame_is_sent_again_after_a_nak(writers):
+    sketch = FakeSketch(['nak', 'nak'])
+    leds = writers(sketch, reset_delay=10, protocol="binary")
+    leds.highlight(0)
+    assert wait_for(lambda: len(sketch.frames) == 3)
+    assert sketch.frames == [(led_protocol.HIGHLIGHT, b'\x01')] * 3
+    assert leds.resends == 2 and leds.failures == 0
+
+
+def test_binary_gives_up_on_a_silent_sketch(writers):
+    sketch = FakeSketch(['silent'] * 4)
+    leds = writers(sketch, reset_delay=10, protocol="binary", ack_timeout=0.02, retries=3)
+    leds.highlight(0)
+    assert wait_for(lambda: leds.failures == 1)
+    assert len(sketch.frames) == 4 and leds.resends == 3
+
+
+def test_newest_frame_replaces_one_not_yet_sent(writers):
+    sketch = FakeSketch(['silent'])
+    leds = writers(sketch, reset_delay=10, protocol="binary", ack_timeout=0.2, retries=0)
+    leds.highlight(0)
+    assert wait_for(lambda: sketch.frames)
+    # Both arrive while the highlight is still waiting for its ACK
+    old = [(1, 2, 3, 4)] * led_protocol.NUM_LEDS
+    new = [(5, 6, 7, 8)] * led_protocol.NUM_LEDS
+    leds.show_frame(old)
+    leds.show_frame(new)
+    assert wait_for(lambda: len(sketch.frames) == 2)
+    time.sleep(0.05)
+    assert sketch.frames[1] == (led_protocol.FRAME, bytes([5, 6, 7, 8] * led_protocol.NUM_LEDS))
+    assert len(sketch.frames) == 2 and leds.failures == 1
+
+
+def test_highlight_does_not_wait_on_a_slow_port(writers):
+    class SlowPort(FakeSketch):
+        def write(self, data):
+            time.sleep(0.2)
+            return super().write(data)
+
+    leds = writers(SlowPort(), reset_delay=10, protocol="binary")
+    leds.highlight(0)
+    time.sleep(0.02)  # the writer is now inside the slow write
+    began = time.perf_counter()
+    for cluster in range(1, 8):
+        leds.highlight(cluster)
+    assert time.perf_counter() - began < 0.05
+
+
+def test_framed_link_loses_nothing_the_sketch_shows():
+    # led_link_sim plays the same stop-and-wait against the sketch's timings
+    bursts = [(0.05 + 0.2 * n, [n % led_protocol.NUM_CLUSTERS, (n + 3) % led_protocol.NUM_CLUSTERS]) for n in range(9)]
+    workload = [(t, led_protocol.encode_highlight(clusters)) for t, clusters in bursts]
+    link, latencies = led_link_sim.simulate("binary", 115200, workload, 2.0)
+    assert len(latencies) == len(bursts)
+    # A frame that lands during show() is lost and sent again after the ACK timeout
+    assert link.host.failures == 0 and max(latencies) < 2 * link.host.ack_timeout
@@ -0,0 +1,49 @@
+import json
+import os
+
+import pytest
+from skyfield.api import load
+
+import orbit_screen
+
+# Slow (near-synchronous) objects with elements up to 30 days old, LEO objects of every
+# inclination and one orbit inside the Earth, all around 2026-10-18 12:00 UTC
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'screen_catalog.json')
+HOUSTON = (29.76303, -95.362061)
+
+
+@pytest.fixture(scope='module')
+def catalog():
+    with open(FIXTURE, 'r') as file:
+        return json.load(file)
+
+
+@pytest.fixture(scope='module')
+def start_time():
+    return load.timescale().utc(2026, 10, 18, 12)
+
+
+@pytest.mark.parametrize('radius', [100, 500])
+def test_every_rule_rejects_something(catalog, start_time, radius):
+    kept, rejected, counters = orbit_screen.screen_catalog(catalog, HOUSTON, radius, start_time)
+    assert all(counters[rule] for rule in orbit_screen.RULES)
+    assert len(kept) + len(rejected) == len(catalog)
+
+
+@pytest.mark.parametrize('radius', [100, 500])
+def test_no_rejected_object_has_a_pass(catalog, start_time, radius):
+    assert orbit_screen.validate_screen(catalog, HOUSTON, radius, start_time) == []
+
+
+def test_longitude_band_needs_a_window(catalog):
+    kept, rejected, counters = orbit_screen.screen_catalog(catalog, HOUSTON, 500)
+    assert counters[orbit_screen.OUTSIDE_LONGITUDE_BAND] == 0
+
+
+def test_fast_orbits_are_never_rejected_by_longitude(catalog, start_time):
+    window = orbit_screen.search_window(start_time, 1.0)
+    leo = [entry for entry in catalog if float(entry['MEAN_MOTION']) > 10]
+    assert leo
+    for entry in leo:
+        reach = 500 / orbit_screen.MEAN_EARTH_RADIUS_KM
+        assert orbit_screen.longitude_reason(entry, HOUSTON, reach, window) is None
@@ -0,0 +1,94 @@
+from datetime import timedelta
+
+import pytest
+from skyfield.api import load
+
+import pass_cache
+
+HOUSTON = (29.76303, -95.362061)
+
+
+def entry(norad_id, epoch='26290.50000000'):
+    return {'NORAD_CAT_ID': str(norad_id), 'TLE_LINE1': f"1 {norad_id:05d}U 99001A   {epoch}", 'TLE_LINE2': '2'}
+
+
+class FakeSearch:
+    """
+    Stands in for the pass search: every object culminates once an hour,
+    offset by its id in minutes, at a distance of 10 km per minute of offset.
+    Records each call. shift moves the culminations found by later calls,
+    the way two searches can time the same pass a second apart.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.shift = timedelta(0)
+
+    def __call__(self, entries, start_time, end_time, radius):
+        self.calls.append((len(entries), start_time.utc_datetime(), end_time.utc_datetime(), radius))
+        results = []
+        for item in entries:
+            minutes = int(item['NORAD_CAT_ID']) % 60
+            first = start_time.utc_datetime().replace(minute=0, second=0, microsecond=0)
+            pass_events = []
+            for hour in range(26):
+                culmination = first + timedelta(hours=hour, minutes=minutes) + self.shift
+                if start_time.utc_datetime() <= culmination <= end_time.utc_datetime() and minutes * 10 <= radius:
+                    pass_events.append({'culmination_time': culmination.strftime(pass_cache.TIME_FORMAT),
+                                        'altitude_km': 500.0, 'distance_km': minutes * 10.0})
+            results.append((item, pass_events))
+        return results
+
+
+@pytest.fixture
+def ts():
+    return load.timescale()
+
+
+def test_radius_is_applied_when_reading(tmp_path, ts):
+    search = FakeSearch()
+    entries = [entry(10), entry(25), entry(45)]
+    filename = str(tmp_path / 'pass_cache.json')
+    start = ts.utc(2026, 10, 18, 12, 30)
+
+    results = pass_cache.cached_pass_details(entries, HOUSTON, 300, start, search, filename)
+    assert search.calls[-1][3] == pass_cache.CACHE_RADIUS_KM
+    assert [len(pass_events) for _, pass_events in results] == [24, 24, 0]
+
+    # A different radius on the next run reads the same cache
+    results = pass_cache.cached_pass_details(entries, HOUSTON, 460.5, ts.utc(2026, 10, 18, 12, 31), search, filename)
+    assert len(search.calls) == 2 and search.calls[-1][0] == 3  # just the one-minute extension
+    assert [len(pass_events) for _, pass_events in results] == [24, 24, 24]
+    assert all(event['distance_km'] <= 460.5 for _, pass_events in results for event in pass_events)
+
+
+def test_new_elements_are_searched_again(tmp_path, ts):
+    search = FakeSearch()
+    filename = str(tmp_path / 'pass_cache.json')
+    pass_cache.cached_pass_details([entry(10), entry(20)], HOUSTON, 300, ts.utc(2026, 10, 18, 12), search, filename)
+    pass_cache.cached_pass_details([entry(10), entry(20, epoch='26291.00000000')], HOUSTON, 300,
+                                   ts.utc(2026, 10, 18, 13), search, filename)
+    assert search.calls[1][0] == 1  # full search of the object with new elements
+    assert search.calls[1][1] == ts.utc(2026, 10, 18, 13).utc_datetime()
+
+
+def test_boundary_pass_is_not_counted_twice(tmp_path, ts):
+    search = FakeSearch()
+    filename = str(tmp_path / 'pass_cache.json')
+    # The first search ends exactly on object 10's 12:10 culmination the next day
+    pass_cache.cached_pass_details([entry(10)], HOUSTON, 300, ts.utc(2026, 10, 18, 12, 10), search, filename)
+    # and the extension finds it again a second later
+    search.shift = timedelta(seconds=1)
+    results = pass_cache.cached_pass_details([entry(10)], HOUSTON, 300, ts.utc(2026, 10, 18, 13), search, filename)
+    times = [event['culmination_time'] for event in results[0][1]]
+    assert times.count('2026-10-19 12:10:00') + times.count('2026-10-19 12:10:01') == 1
+    assert len(times) == len(set(times)) == 24
+
+
+def test_other_observer_starts_over(tmp_path, ts):
+    search = FakeSearch()
+    filename = str(tmp_path / 'pass_cache.json')
+    pass_cache.cached_pass_details([entry(10)], HOUSTON, 300, ts.utc(2026, 10, 18, 12), search, filename)
+    pass_cache.cached_pass_details([entry(10)], (51.5, -0.1), 300, ts.utc(2026, 10, 18, 12, 5), search, filename)
+    assert search.calls[1][1] == ts.utc(2026, 10, 18, 12, 5).utc_datetime()
+    assert search.calls[1][2] - search.calls[1][1] == timedelta(days=1)
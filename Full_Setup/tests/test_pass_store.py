@@ -0,0 +1,10 @@
+import warnings
+
+import pass_store
+
+
+def test_epochs_round_trip_as_utc():
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', DeprecationWarning)
+        assert pass_store.from_epoch(0) == '1970-01-01 00:00:00'
+        assert pass_store.from_epoch(pass_store.to_epoch('2026-10-18 23:59:30')) == '2026-10-18 23:59:30'
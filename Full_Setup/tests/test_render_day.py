@@ -0,0 +1,50 @@
+import wave
+
+import pytest
+
+import audio_sink
+import render_day
+
+
+def passes():
+    return [{'object_id': f"2000-00{n}A", 'object_name': 'TEST DEB', 'rcs': rcs,
+             'culmination_time': f"2026-10-18 12:0{n}:30", 'altitude_km': 400.0 + 300 * n, 'distance_km': 100.0}
+            for n, rcs in enumerate(['SMALL', 'MEDIUM', 'LARGE'])]
+
+
+def frame_counts(filenames):
+    counts = []
+    for filename in filenames:
+        with wave.open(filename, 'rb') as file:
+            counts.append(file.getnframes())
+    return counts
+
+
+def test_chunks_hold_the_same_samples_as_one_file(tmp_path, capsys):
+    render_day.render(passes(), str(tmp_path / 'day.wav'), hours=0.1, chunk_minutes=None)
+    whole = capsys.readouterr().out
+    render_day.render(passes(), str(tmp_path / 'day.wav'), hours=0.1, chunk_minutes=2.5)
+    chunked = capsys.readouterr().out
+    assert whole.splitlines()[-1] == chunked.splitlines()[-1]  # samples SHA-1
+    names = [tmp_path / f"day_{n:03d}.wav" for n in range(3)]
+    assert frame_counts([str(tmp_path / 'day.wav')]) == [int(0.1 * 3600 * render_day.RATE)]
+    assert frame_counts([str(name) for name in names]) == [int(2.5 * 60 * render_day.RATE)] * 2 + [int(1 * 60 * render_day.RATE)]
+
+
+def test_hour_chunks_by_default(tmp_path, capsys):
+    render_day.render(passes(), str(tmp_path / 'day.wav'), hours=1.5)
+    assert 'day_000.wav' in capsys.readouterr().out
+    assert frame_counts([str(tmp_path / 'day_000.wav')]) == [3600 * render_day.RATE]
+
+
+def test_unchunked_render_splits_at_the_limit(tmp_path, monkeypatch):
+    monkeypatch.setattr(audio_sink, 'MAX_WAV_FRAMES', 60 * render_day.RATE)
+    render_day.render(passes(), str(tmp_path / 'day.wav'), hours=0.05, chunk_minutes=None)
+    assert frame_counts([str(tmp_path / 'day.wav'), str(tmp_path / 'day_001.wav'), str(tmp_path / 'day_002.wav')]) == \
+        [60 * render_day.RATE] * 3
+
+
+def test_chunks_over_the_wav_limit_are_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        render_day.render(passes(), str(tmp_path / 'day.wav'), hours=24, chunk_minutes=900)
+    assert not list(tmp_path.iterdir())
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+from sgp4.api import Satrec, WGS72
+from sgp4.exporter import export_tle
+from skyfield.api import load
+
+import tle_validity
+from gp_records import synthetic_catalog, with_checksum
+
+
+@pytest.fixture(scope='module')
+def ts():
+    return load.timescale()
+
+
+@pytest.fixture
+def catalog():
+    return synthetic_catalog(5, seed=2)
+
+
+def entry_for(satrec):
+    tle_line1, tle_line2 = export_tle(satrec)
+    return {'NORAD_CAT_ID': str(satrec.satnum), 'TLE_LINE1': tle_line1, 'TLE_LINE2': tle_line2}
+
+
+def test_good_elements_pass(ts, catalog):
+    invalid, counters = tle_validity.screen_catalog(catalog, ts.now())
+    assert invalid == {}
+    assert counters == {rule: 0 for rule in tle_validity.RULES}
+
+
+@pytest.mark.parametrize('damage', [
+    lambda line1, line2: ('garbage', 'junk'),
+    lambda line1, line2: (line1[:-1] + str((int(line1[-1]) + 1) % 10), line2),  # checksum
+    lambda line1, line2: (line1, line2[:40]),  # cut short
+    lambda line1, line2: (line2, line1),  # swapped
+    lambda line1, line2: (line1, with_checksum(line2[:2] + '99999' + line2[7:])),  # other object
+])
+def test_malformed_lines_are_unparseable(ts, catalog, damage):
+    catalog[2]['TLE_LINE1'], catalog[2]['TLE_LINE2'] = damage(catalog[2]['TLE_LINE1'], catalog[2]['TLE_LINE2'])
+    invalid, counters = tle_validity.screen_catalog(catalog, ts.now())
+    assert invalid == {id(catalog[2]): tle_validity.UNPARSEABLE}
+    assert counters[tle_validity.UNPARSEABLE] == 1
+
+
+def test_trailing_whitespace_is_fine(ts, catalog):
+    catalog[0]['TLE_LINE1'] += '  '
+    catalog[0]['TLE_LINE2'] += '\r'
+    assert tle_validity.screen_catalog(catalog, ts.now())[0] == {}
+
+
+def test_elements_that_decay_before_the_snapshot(ts):
+    # A low orbit with some drag, 200 days before the snapshot (much more drag and sgp4
+    # gives up on the eccentricity instead, which counts as a propagation error)
+    satrec = Satrec()
+    epoch = ts.utc(2026, 3, 31)
+    satrec.sgp4init(WGS72, 'i', 77001, epoch.ut1 - 2433281.5, 1e-4, 0.0, 0.0, 0.0001, 0.0, np.radians(51.6), 0.0,
+                    16.2 * 2 * np.pi / 1440, 0.0)
+    entry = entry_for(satrec)
+    invalid, counters = tle_validity.screen_catalog([entry], ts.utc(2026, 10, 18))
+    assert invalid == {id(entry): tle_validity.DECAYED_ELEMENTS}
+
+
+def test_entries_without_lines_are_left_alone(ts, catalog):
+    catalog[1]['TLE_LINE1'] = None
+    assert tle_validity.screen_catalog(catalog, ts.now())[0] == {}
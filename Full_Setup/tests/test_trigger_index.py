@@ -0,0 +1,26 @@
+import trigger_index
+
+NOW = 1_800_000_000.0
+
+
+def test_sleeps_until_the_earliest_deadline():
+    assert trigger_index.seconds_until(NOW, [NOW + 30, NOW + 12.5, NOW + 40]) == 12.5
+
+
+def test_sleep_is_capped_at_max_sleep():
+    assert trigger_index.seconds_until(NOW, [NOW + 3600], max_sleep=60) == 60
+
+
+def test_overdue_deadline_wakes_at_once():
+    assert trigger_index.seconds_until(NOW, [NOW - 5, NOW + 30]) == 0.0
+
+
+def test_wait_is_positive_while_a_rolling_run_is_in_progress():
+    # main.py passes None for the update deadline while acquireData runs in the
+    # background, though next_update_time is already behind; wake_when_finished
+    # ends the sleep instead
+    next_update_time = NOW - 120
+    acquisition_running = True
+    update_due = None if acquisition_running else next_update_time
+    assert trigger_index.seconds_until(NOW, [update_due, NOW + 2220]) == 60
+    assert trigger_index.seconds_until(NOW, [None, None]) == 60
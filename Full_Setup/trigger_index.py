@@ -0,0 +1,75 @@
+import heapq
+import numpy as np
+import pass_store
+
+# How long after its culmination a pass may still trigger (see check_pass_times)
+TRIGGER_WINDOW_S = 60
+
+
+def seconds_until(now, deadlines, max_sleep=60):
+    # Seconds from now to the earliest of deadlines (unix seconds, None for nothing pending), at most max_sleep
+    return max(0.0, min([max_sleep] + [deadline - now for deadline in deadlines if deadline is not None]))
+
+
+class PassSchedule:
+    """
+    Time index over a pass table. Culmination times are turned into
+    integer epochs once, and due() finds the passes of the current tick
+    by bisection instead of parsing every pass on every tick.
+    """
+
+    def __init__(self, passes):
+        self.passes = passes
+        if isinstance(passes, pass_store.PassTable):
+            epochs = passes.records['culmination']  # already epochs, and already sorted
+        else:
+            epochs = np.array([debris['culmination_time'] for debris in passes], dtype='datetime64[s]').astype(np.int64)
+        self.order = np.argsort(epochs, kind='stable')
+        self.epochs = epochs[self.order]
+        self.cursor = None
+
+    def due(self, now):
+        """
+        Passes that culminated within the trigger window before now (unix
+        seconds) and were not already returned by an earlier call.
+        """
+        start = np.searchsorted(self.epochs, now - TRIGGER_WINDOW_S, side='right')
+        end = np.searchsorted(self.epochs, now, side='right')
+        if self.cursor is not None:
+            start = max(start, self.cursor)
+            end = max(end, self.cursor)
+        self.cursor = end
+        return [self.passes[int(i)] for i in self.order[start:end]]
+
+    def next_culmination(self, now):
+        # Epoch of the first pass culminating after now, or None
+        index = np.searchsorted(self.epochs, now, side='right')
+        return int(self.epochs[index]) if index < len(self.epochs) else None
+
+
+class AlertExpiry:
+    """
+    Object IDs that have triggered recently, with a heap of expiry times
+    so expired IDs are dropped without scanning all of them.
+    """
+
+    def __init__(self):
+        self.alerts = {}
+        self.heap = []
+
+    def __contains__(self, object_id):
+        return object_id in self.alerts
+
+    def __len__(self):
+        return len(self.alerts)
+
+    def add(self, object_id, expiry):
+        self.alerts[object_id] = expiry
+        heapq.heappush(self.heap, (expiry, object_id))
+
+    def expire(self, now):
+        while self.heap and self.heap[0][0] < now:
+            expiry, object_id = heapq.heappop(self.heap)
+            # Skip heap entries that a later add() for the same object replaced
+            if self.alerts.get(object_id) == expiry:
+                del self.alerts[object_id]
@@ -0,0 +1,146 @@
+import threading
+import numpy as np
+
+# Chimes rendered block by block instead of as whole waveforms.
+#
+# A voice is the tone of generate_tone_with_reverb described by a handful of
+# numbers: volume * sin(2 pi f t) * exp(decay t), plus four echoes of it taken
+# reverb_delay, 2 * reverb_delay, ... further along and scaled by
+# volume * reverb_decay ** i, clipped to +-volume. Each sample is evaluated from
+# the voice's position, so a voice costs a few floats however long it rings.
+# Voices live in fixed size arrays allocated once. The tone is the imaginary
+# part of exp((decay + 2j pi f) t), so a block is the voice's value at its first
+# frame times a per-voice ramp computed at play(), and all echoes fold into one
+# complex gain until the last echo runs past the end of the chime. A voice can
+# be started at a later frame of the output, in which case its position is
+# negative until then.
+
+REVERB_TAPS = 4
+RELEASE_FRAMES = 256  # fade applied to a stolen voice so it does not click
+
+
+class VoiceSynth:
+    """
+    Polyphonic chime synthesizer. play() starts a voice now or at a given
+    output frame, render() mixes the next block of every active voice.
+    When all max_voices slots are busy a new chime steals the quietest
+    voice ("quietest") or the one that started first ("oldest").
+    """
+
+    def __init__(self, max_voices=32, rate=44100, block_size=1024, steal="quietest", reverb_delay=0.05, reverb_decay=0.3):
+        self.max_voices = max_voices
+        slots = 2 * max_voices  # room for stolen voices to fade while new ones sound
+        self.rate = rate
+        self.block_size = block_size
+        self.delay_frames = int(reverb_delay * rate)
+        self.steal = steal
+        self.reverb_delay = reverb_delay
+        self.reverb_decay = reverb_decay
+        self.active = np.zeros(slots, dtype=bool)
+        self.position = np.zeros(slots, dtype=np.int64)     # frames already played
+        self.length = np.zeros(slots, dtype=np.int64)       # frames in the whole chime
+        self.dt = np.zeros(slots)                           # seconds per frame, as linspace spaces them
+        self.exponent = np.zeros(slots, dtype=complex)      # decay + 2j pi frequency
+        self.volume = np.zeros(slots)
+        self.started = np.zeros(slots, dtype=np.int64)      # play() call count, for "oldest"
+        self.release = np.zeros(slots, dtype=np.int64)      # frames left of a steal fade, 0 if not stolen
+        self.taps = np.zeros((slots, REVERB_TAPS + 1), dtype=complex)  # complex gain of the tone and each echo
+        self.ramp = np.zeros((slots, block_size), dtype=complex)       # exp(exponent * dt * frame) over one block
+        self.frame = 0  # output frame of the next block, counted like AudioEngine.read_frame
+        self.plays = 0
+        self.stolen = 0
+        self.lock = threading.Lock()
+
+    def free_slot(self):
+        sounding = np.flatnonzero(self.active & (self.release == 0))
+        if len(sounding) >= self.max_voices:
+            # Fade the victim out in its own slot rather than cutting it off
+            if self.steal == "oldest":
+                victim = sounding[np.argmin(self.started[sounding])]
+            else:
+                t = self.position[sounding] * self.dt[sounding]
+                loudness = self.volume[sounding] * np.exp(self.exponent[sounding].real * t)
+                victim = sounding[np.argmin(loudness)]
+            self.release[victim] = RELEASE_FRAMES
+            self.stolen += 1
+        idle = np.flatnonzero(~self.active)
+        if len(idle):
+            return int(idle[0])
+        # Every slot is sounding or fading; cut the fade closest to done
+        fading = np.flatnonzero(self.release > 0)
+        return int(fading[np.argmin(self.release[fading])])
+
+    def play(self, frequency, duration, decay_rate, volume=0.8, at_frame=None):
+        length = int(duration * self.rate)
+        if length < 2:
+            return
+        with self.lock:
+            slot = self.free_slot()
+            self.active[slot] = True
+            self.position[slot] = 0 if at_frame is None else min(0, self.frame - at_frame)
+            self.length[slot] = length
+            self.dt[slot] = duration / (length - 1)
+            self.exponent[slot] = decay_rate + 2j * np.pi * frequency
+            self.volume[slot] = volume
+            self.started[slot] = self.plays
+            self.release[slot] = 0
+            echo = np.arange(REVERB_TAPS + 1) * self.delay_frames
+            self.taps[slot] = volume * self.reverb_decay ** np.arange(REVERB_TAPS + 1) * np.exp(self.exponent[slot] * echo * self.dt[slot])
+            self.taps[slot, 0] = 1.0
+            self.ramp[slot] = np.exp(self.exponent[slot] * self.dt[slot] * np.arange(self.block_size))
+            self.plays += 1
+
+    def render(self, frames):
+        block = np.zeros(frames, dtype=np.float32)
+        with self.lock:
+            slots = np.flatnonzero(self.active)
+            if not len(slots):
+                self.frame += frames
+                return block
+            position = self.position[slots, None] + np.arange(frames)
+            volume = self.volume[slots, None]
+            length = self.length[slots, None]
+            start = np.exp(self.exponent[slots] * self.position[slots] * self.dt[slots])
+            if frames == self.block_size:
+                tone = start[:, None] * self.ramp[slots]
+            else:
+                tone = np.exp(self.exponent[slots, None] * (position * self.dt[slots, None]))
+
+            # Tap i is the tone i * delay_frames further along, zero past the end of the chime
+            gain = np.broadcast_to(self.taps[slots].sum(axis=1)[:, None], tone.shape)
+            tail = self.position[slots] + frames + REVERB_TAPS * self.delay_frames > self.length[slots]
+            if tail.any():
+                echo = np.arange(REVERB_TAPS + 1)[:, None] * self.delay_frames
+                in_chime = position[tail, None, :] + echo < length[tail, None]
+                gain = gain.copy()
+                gain[tail] = (self.taps[slots[tail], :, None] * in_chime).sum(axis=1)
+            samples = np.clip(volume * (gain * tone).imag, -volume, volume)
+            if self.position[slots].min() < 0:
+                # Voices scheduled to start during or after this block
+                samples = np.where(position >= 0, samples, 0.0)
+
+            fading = self.release[slots] > 0
+            if fading.any():
+                ramp = np.clip((self.release[slots, None] - np.arange(frames)) / RELEASE_FRAMES, 0.0, 1.0)
+                samples = np.where(fading[:, None], samples * ramp, samples)
+                self.release[slots[fading]] = np.maximum(self.release[slots[fading]] - frames, 0)
+                self.active[slots[fading & (self.release[slots] == 0)]] = False
+
+            block += samples.sum(axis=0).astype(np.float32)
+            self.position[slots] += frames
+            self.frame += frames
+            self.active[slots[self.position[slots] >= self.length[slots]]] = False
+        return block
+
+    def voices(self):
+        with self.lock:
+            return int(self.active.sum())
+
+    def idle(self):
+        with self.lock:
+            return not self.active.any()
+
+    def skip(self, frames):
+        # Only called while idle (see AudioEngine.skip)
+        with self.lock:
+            self.frame += frames
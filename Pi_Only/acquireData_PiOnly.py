@@ -1,16 +1,49 @@
 import requests
 import json
-from skyfield.api import Topos, load, EarthSatellite
-from geopy.distance import geodesic
+import atexit
+from skyfield.api import load
 from credentials import USERNAME, PASSWORD # Import credentials
 from datetime import datetime, timedelta
 import os
 import time
 import sys
+import batch_propagation
+from pass_search import next_pass_details, parallel_pass_details
+import orbit_screen
+import tle_validity
+import catalog_sync
+import filter_pipeline
+import gp_stream
+import pass_cache
+import pass_store
+import exclusion_log
 
 #INPUTS
 my_location = (29.76303, -95.362061)
 search_radius = 300 #km
+# "batch" propagates the whole catalog at once (batch_propagation.py), "serial" runs find_events object by object
+# and "parallel" runs the same search as "serial" across a pool of worker processes (pass_search.py)
+propagation_mode = "batch"
+parallel_workers = 4
+# "incremental" merges only the changed GP records into data.json (catalog_sync.py), "full" downloads the whole catalog
+sync_mode = "incremental"
+# "csv" streams only the fields the pipeline uses (gp_stream.py), "3le" just the TLEs with the rest worked out from them, "json" the full GP records
+ingest_format = "csv"
+# record-level catalog filters, run locally cheapest first and also written into the space-track query (filter_pipeline.py);
+# the inclination floor is the observer's latitude less the margin, None turns the perigee ceiling or epoch age off
+catalog_filters = {
+    "object_types": ["DEBRIS", "ROCKET BODY", "UNKNOWN"],
+    "inclination_margin_deg": 4,
+    "max_perigee_km": None,
+    "max_epoch_age_days": 30,
+}
+full_sync_interval = timedelta(days=7)
+# reuse the passes of objects whose TLE has not changed since the last run (pass_cache.py)
+use_pass_cache = True
+# how far ahead the pass table reaches; with the pass cache each run only searches the part that opened since the last one
+search_horizon = timedelta(days=1)
+# "binary" writes the pass table to debris_data.pass (pass_store.py), "json" to debris_data.json
+pass_table_format = "binary"
 
 
 start_code = datetime.now()
@@ -19,63 +52,22 @@ ts = load.timescale()
 radius = search_radius # get search radius
 print(f"Search radius: {radius:.0f} km")
 
-def log_exclusion(reason, debris):
-    with open('exclusion_log.txt', 'a') as log_file:
-        log_message = f"Excluded {debris.get('OBJECT_ID', 'Unknown ID')}: {reason}\n"
-        log_file.write(log_message)
+# buffered, with a reason code per object and per-code counts at the end of the run (exclusion_log.py)
+exclusions = exclusion_log.ExclusionLog('exclusion_log.txt')
+# Closed at exit whichever way the run ends, so the objects the catalog sync dropped are written even when the pass table is reused
+atexit.register(exclusions.close)
+catalog_pipeline = filter_pipeline.FilterPipeline(catalog_filters, my_location)
 
 
-def is_valid_subpoint(debris):
-    tle_line1, tle_line2 = debris.get('TLE_LINE1'), debris.get('TLE_LINE2')
-    if tle_line1 and tle_line2 and (debris.get('DECAY_DATE') is None or debris.get('DECAY_DATE') == "None"):
-        satellite = EarthSatellite(tle_line1, tle_line2)
-        
-        #print(satellite)
-        # do some checks to exclude invalid satellites
-        try:
-            geocentric = satellite.at(ts.now())
-        except Exception as e:
-            print("Error encountered " + str(e))
-            print(debris.get('DECAY_DATE'))
-            return False
-        else:
-            try:
-                distance = geodesic(my_location, (geocentric.subpoint().latitude.degrees, geocentric.subpoint().longitude.degrees)).km
-            except Exception as e:
-                print("Error encountered " + str(e))
-                return False
+def cheap_filter(entry):
+    # The checks that need nothing but the record, so a streamed download can drop objects as they arrive
+    reason = catalog_pipeline.reason(entry)
+    if reason is not None:
+        exclusions.log(entry, exclusion_log.FILTER_CODES[reason])
+        return False
     return True
 
 
-def next_pass_details(tle_line1, tle_line2, observer_location):
-    ts = load.timescale()
-    satellite = EarthSatellite(tle_line1, tle_line2)
-    observer = Topos(latitude_degrees=observer_location[0], longitude_degrees=observer_location[1])
-
-    start_time = ts.now()
-    end_time = start_time + timedelta(days=1)  # Look 24 hours ahead
-
-    pass_events = []  # List to hold all pass details
-
-    times, events = satellite.find_events(observer, start_time, end_time, altitude_degrees=0.0)
-    for time, event in zip(times, events):
-        if event == 1:  # Culmination
-            geocentric = satellite.at(time)
-            subpoint = geocentric.subpoint()
-            altitude_km = subpoint.elevation.km  # Altitude above Earth's surface in kilometers
-            observer_location = (observer.latitude.degrees, observer.longitude.degrees)
-            subsatellite_point = (subpoint.latitude.degrees, subpoint.longitude.degrees)
-            distance_km = geodesic(observer_location, subsatellite_point).km
-            if distance_km > radius:  # Exclude satellites too far away
-                continue
-            pass_events.append({
-                'culmination_time': time.utc_strftime('%Y-%m-%d %H:%M:%S'),
-                'altitude_km': altitude_km,
-                'distance_km': distance_km
-            })
-
-    return pass_events
-
 def progress_meter(progress, total):
     percent = 100 * (progress / total)
     bar_length = 40
@@ -85,12 +77,33 @@ def progress_meter(progress, total):
     sys.stdout.flush()
 
 
+def search_passes(entries, start_time, end_time, search_radius):
+    # Pass search between start_time and end_time for entries that all have TLE lines
+    if propagation_mode == "batch":
+        span_days = end_time.tt - start_time.tt
+        return batch_propagation.batch_next_pass_details(entries, my_location, search_radius, start_time, span_days, progress=progress_meter)
+    if propagation_mode == "parallel":
+        return parallel_pass_details(entries, my_location, search_radius, start_time, end_time, workers=parallel_workers, progress=progress_meter)
+    pass_results = []
+    for index, debris in enumerate(entries):
+        progress_meter(index, len(entries))
+        pass_results.append((debris, next_pass_details(debris['TLE_LINE1'], debris['TLE_LINE2'], my_location, search_radius, start_time, end_time)))
+    return pass_results
+
+
 # URL for the login action
 LOGIN_URL = 'https://www.space-track.org/ajaxauth/login'
 
 # URL for the data query
 DATA_URL = 'https://www.space-track.org/basicspacedata/query/class/gp/decay_date/null-val/epoch/%3Enow-30/orderby/norad_cat_id/format/json'
 
+# URL for the records created since the last sync, {since} is filled in by catalog_sync
+DELTA_URL = 'https://www.space-track.org/basicspacedata/query/class/gp/creation_date/%3E{since}/orderby/norad_cat_id/format/json'
+
+# Let space-track apply the catalog filters it can, so those objects are never downloaded
+DATA_URL = catalog_pipeline.query(DATA_URL)
+DELTA_URL = catalog_pipeline.query(DELTA_URL, incremental=True)
+
 # Create a session object
 session = requests.Session()
 
@@ -126,7 +139,24 @@ if response.status_code == 200:
     else:
         print("Data file does not exist.")
 
-    if need_new_data:
+    if need_new_data and sync_mode == "incremental":
+        json_data = catalog_sync.sync_catalog(session, filename, DATA_URL, DELTA_URL, full_sync_interval, ingest_format=ingest_format,
+                                              keep=cheap_filter)
+        if json_data is None:
+            json_data = []  # ensure json_data is always defined
+    elif need_new_data and ingest_format != "json":
+        print("Streaming data from server...")
+        json_data = gp_stream.fetch_records(session, DATA_URL, ingest_format, keep=cheap_filter)
+        if json_data is None:
+            json_data = []  # ensure json_data is always defined
+        else:
+            data_to_save = {
+                "last_updated": datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'),
+                "data": json_data
+            }
+            with open(filename, 'w') as file:
+                json.dump(data_to_save, file)
+    elif need_new_data:
         print("Fetching data from server...")
         data_response = session.get(DATA_URL)
         if data_response.status_code == 200:
@@ -146,19 +176,20 @@ if response.status_code == 200:
     
     index = 0
     
-    filename2 = "debris_data.json"
+    filename2 = "debris_data.pass" if pass_table_format == "binary" else "debris_data.json"
     if os.path.exists(filename2):
-        with open(filename2, 'r') as file:
-            saved_data = json.load(file)
-            last_updated_str2 = saved_data.get("last_updated", "")
-            if last_updated_str2:
-                last_updated2 = datetime.strptime(last_updated_str2, '%Y-%m-%d %H:%M:%S')
-                if datetime.utcnow() - last_updated2 < timedelta(hours=1):
-                    need_new_debris_data = False
-                    json_data = saved_data.get("data", [])
-                    print("Using cached debris data.")
-                else:
-                    print("Cached debris data is older than one hours so updating.")
+        if pass_table_format == "binary":
+            last_updated_str2 = pass_store.open_pass_store(filename2).last_updated
+        else:
+            with open(filename2, 'r') as file:
+                last_updated_str2 = json.load(file).get("last_updated", "")
+        if last_updated_str2:
+            last_updated2 = datetime.strptime(last_updated_str2, '%Y-%m-%d %H:%M:%S')
+            if datetime.utcnow() - last_updated2 < timedelta(hours=1):
+                need_new_debris_data = False
+                print("Using cached debris data.")
+            else:
+                print("Cached debris data is older than one hours so updating.")
     if need_new_debris_data:
         print("\n Checking for valid entries in the downloaded data")
         for entry in json_data:
@@ -166,65 +197,69 @@ if response.status_code == 200:
             #print(f"{(index/len(json_data)*100):3.02f}" + "% complete")
             index += 1
 
-            if entry.get('DECAY_DATE') is not None:
-                log_exclusion("Already decayed", entry)
-                continue
-
-            inclination = float(entry.get('INCLINATION', 0))
-            if inclination < (my_location[0]) - 4:
-                log_exclusion("Inclination below threshold", entry)
-                continue
-
-            # Assuming is_valid_subpoint function checks if the satellite's pass is valid for the observer's location
-            if not is_valid_subpoint(entry):
-                log_exclusion("Invalid subpoint calculation", entry)
-                continue
-
-            if not (entry.get("OBJECT_TYPE") in ["DEBRIS", "ROCKET BODY", "UNKNOWN"]):
-                log_exclusion("Invalid subpoint calculation", entry)
-                continue
-            filtered_data.append(entry)
+            if cheap_filter(entry):
+                filtered_data.append(entry)
+        print(f"\n Catalog filters dropped {sum(catalog_pipeline.counters.values())} entries: {catalog_pipeline.counters}")
+
+        # propagate every remaining TLE once, at one shared time, and drop the ones sgp4 fails on (tle_validity.py)
+        invalid_tles, tle_counters = tle_validity.screen_catalog(filtered_data, ts.now())
+        print(f" TLE check dropped {len(invalid_tles)} entries: {tle_counters}")
+        for entry in filtered_data:
+            if id(entry) in invalid_tles:
+                exclusions.log(entry, exclusion_log.TLE_VALIDITY_CODES[invalid_tles[id(entry)]])
+        filtered_data = [entry for entry in filtered_data if id(entry) not in invalid_tles]
+
+        # before searching for passes, drop objects whose ground track cannot come within radius during the search;
+        # with the pass cache, within the radius it keeps passes out to, so turning the knob down doesn't evict them
+        start_time = ts.now()
+        screen_radius = max(radius, pass_cache.CACHE_RADIUS_KM) if use_pass_cache else radius
+        filtered_data, rejected_data, screen_counters = orbit_screen.screen_catalog(
+            filtered_data, my_location, screen_radius, start_time, search_horizon.total_seconds() / 86400.0)
+        for entry, reason in rejected_data:
+            exclusions.log(entry, exclusion_log.ORBIT_SCREEN_CODES[reason])
+        print(f"\n Orbit screen dropped {len(rejected_data)} entries: {screen_counters}")
 
         filtered_pass_data = []
 
-        index = 0
-
         print("\n Calculating pass times:")
+        with_tle = []
         for debris in filtered_data:
-            progress_meter(index,len(filtered_data))
-            #print(f"{(index/len(filtered_data)*100):3.02f}" + "% complete")
-            index += 1
-            tle_line1 = debris.get('TLE_LINE1')
-            tle_line2 = debris.get('TLE_LINE2')
-            if tle_line1 and tle_line2:
-                pass_details = next_pass_details(tle_line1, tle_line2, my_location)
-
-                if pass_details:
-                    for pass_event in pass_details:
-                        filtered_pass_data.append({
-                            'object_id': debris.get('OBJECT_ID'),
-                            'object_name': debris.get('OBJECT_NAME'),
-                            'rcs': debris.get('RCS_SIZE'),  # Assuming RCS_SIZE is the correct field for radar cross-section
-                            'culmination_time': pass_event['culmination_time'],
-                            'altitude_km': pass_event['altitude_km'],
-                            'distance_km': pass_event['distance_km']
-                        })
-                else:
-                    log_exclusion("Missing pass data", debris)
-                    continue
+            if debris.get('TLE_LINE1') and debris.get('TLE_LINE2'):
+                with_tle.append(debris)
             else:
-                log_exclusion("Missing TLE data", debris)
-                continue
+                exclusions.log(debris, exclusion_log.MISSING_TLE)
+        if use_pass_cache:
+            pass_results = pass_cache.cached_pass_details(with_tle, my_location, radius, start_time, search_passes, horizon=search_horizon)
+        else:
+            pass_results = search_passes(with_tle, start_time, start_time + search_horizon, radius)
+
+        for debris, pass_details in pass_results:
+            if pass_details:
+                for pass_event in pass_details:
+                    filtered_pass_data.append({
+                        'object_id': debris.get('OBJECT_ID'),
+                        'object_name': debris.get('OBJECT_NAME'),
+                        'rcs': debris.get('RCS_SIZE'),  # Assuming RCS_SIZE is the correct field for radar cross-section
+                        'culmination_time': pass_event['culmination_time'],
+                        'altitude_km': pass_event['altitude_km'],
+                        'distance_km': pass_event['distance_km']
+                    })
+            else:
+                exclusions.log(debris, exclusion_log.NO_PASS)
 
         filtered_pass_data.sort(key=lambda x: x['culmination_time'])
         
-        debris_data_to_save = {
-            "last_updated": datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'),
-            "data": filtered_pass_data
-        }
+        last_updated_str2 = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+        if pass_table_format == "binary":
+            pass_store.write_pass_store(filename2, filtered_pass_data, last_updated_str2)
+        else:
+            debris_data_to_save = {
+                "last_updated": last_updated_str2,
+                "data": filtered_pass_data
+            }
 
-        with open('debris_data.json', 'w') as file:
-            json.dump(debris_data_to_save, file, indent=4)
+            # Renamed into place so the player never reads a half-written table
+            pass_store.publish_json(filename2, debris_data_to_save)
 
         print(f"Debris data written to file successfully. {len(filtered_data)} entries saved.")
 
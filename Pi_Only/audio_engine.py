@@ -0,0 +1,118 @@
+import threading
+import time
+import numpy as np
+
+# Mixing buffer between the main loop, which adds chimes, and the audio
+# callback, which takes fixed size blocks out of it.
+#
+# The buffer is a preallocated float32 ring. Absolute frame counters mark the
+# next frame to be played (read_frame) and the end of everything mixed so far
+# (end_frame), so playing a block only touches that block. render() also notes
+# the wall clock time it was called, which maps wall clock times to frames of
+# the output so chimes can be placed at an exact frame ahead of time.
+
+
+class AudioEngine:
+    """
+    Ring buffer mixer. mix() adds a waveform starting at the next frame to
+    be played or at a given later frame, render() returns the next block,
+    through the limiter if there is one, and clears it for reuse.
+    Both take the same lock, so chimes can be mixed from any thread while
+    the sound card pulls blocks from its own.
+    """
+
+    def __init__(self, rate=44100, block_size=1024, capacity_seconds=16, output_latency=0.0, clock=time.time):
+        self.rate = rate
+        self.block_size = block_size
+        self.capacity = int(capacity_seconds * rate)
+        self.ring = np.zeros(self.capacity, dtype=np.float32)
+        self.read_frame = 0
+        self.end_frame = 0
+        self.output_latency = output_latency  # seconds from render() to the speaker
+        self.clock = clock
+        self.clock_frame = None  # first frame of the last rendered block, and when it was rendered
+        self.clock_time = None
+        self.sources = []  # objects with render(frames), e.g. a VoiceSynth, added to every block
+        self.limiter = None  # object with process(block) applied to the mixed block, e.g. a PeakLimiter
+        self.lock = threading.Lock()
+
+    def slices(self, start, stop):
+        # Ring positions covering absolute frames [start, stop), at most two slices
+        first = start % self.capacity
+        length = stop - start
+        if first + length <= self.capacity:
+            return [slice(first, first + length)]
+        return [slice(first, self.capacity), slice(0, first + length - self.capacity)]
+
+    def mix(self, waveform, at_frame=None):
+        waveform = np.asarray(waveform, dtype=np.float32)
+        if not len(waveform):
+            return
+        with self.lock:
+            start = self.read_frame if at_frame is None else max(self.read_frame, at_frame)
+            room = self.read_frame + self.capacity - start
+            if len(waveform) > room:
+                print(f"Chime of {len(waveform) / self.rate:.1f} s cut to the {room / self.rate:.1f} s left in the mix buffer")
+                waveform = waveform[:room]
+            offset = 0
+            for part in self.slices(start, start + len(waveform)):
+                length = part.stop - part.start
+                self.ring[part] += waveform[offset:offset + length]
+                offset += length
+            self.end_frame = max(self.end_frame, start + len(waveform))
+
+    def render(self, frames=None):
+        frames = frames or self.block_size
+        block = np.zeros(frames, dtype=np.float32)
+        with self.lock:
+            start = self.read_frame
+            self.clock_frame = start
+            self.clock_time = self.clock()
+            if start < self.end_frame:
+                offset = 0
+                for part in self.slices(start, start + min(frames, self.end_frame - start)):
+                    length = part.stop - part.start
+                    block[offset:offset + length] = self.ring[part]
+                    self.ring[part] = 0
+                    offset += length
+            self.read_frame = start + frames
+        for source in self.sources:
+            block += source.render(frames)
+        if self.limiter is not None:
+            return self.limiter.process(block)
+        np.clip(block, -1.0, 1.0, out=block)
+        return block
+
+    def idle(self):
+        # Nothing queued or sounding, so every block stays silent until something is mixed
+        with self.lock:
+            if self.read_frame < self.end_frame:
+                return False
+        return all(source.idle() for source in self.sources) and (self.limiter is None or self.limiter.idle())
+
+    def skip(self, frames):
+        # Advance an idle engine over frames of silence without rendering them
+        with self.lock:
+            self.clock_frame = self.read_frame
+            self.clock_time = self.clock()
+            self.read_frame += frames
+        for source in self.sources:
+            source.skip(frames)
+        if self.limiter is not None:
+            self.limiter.skip(frames)
+
+    def frame_at(self, wall_time):
+        # Output frame that reaches the speaker at wall_time (seconds, time.time() scale)
+        with self.lock:
+            if self.clock_time is None:
+                # Nothing rendered yet, the next block starts now
+                clock_frame, clock_time = self.read_frame, self.clock()
+            else:
+                clock_frame, clock_time = self.clock_frame, self.clock_time
+            frame = clock_frame + int(round((wall_time - clock_time - self.output_latency) * self.rate))
+            # The limiter holds every frame back by its look-ahead
+            return frame - self.limiter.lookahead if self.limiter is not None else frame
+
+    def pending_seconds(self):
+        with self.lock:
+            return max(0, self.end_frame - self.read_frame) / self.rate
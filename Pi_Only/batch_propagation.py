@@ -0,0 +1,233 @@
+import numpy as np
+from datetime import datetime, timedelta
+import geo_distance
+from sgp4.api import Satrec, SatrecArray, jday
+from skyfield.sgp4lib import theta_GMST1982
+
+DAY_S = 86400.0
+HALF_SECOND = 0.5 / DAY_S
+
+# WGS84 ellipsoid for the observer (same as skyfield's Topos)
+WGS84_A = 6378.137
+WGS84_E2 = (2 - 1 / 298.257223563) / 298.257223563
+
+# IERS2010 ellipsoid for the subpoint (same as skyfield's .subpoint())
+IERS2010_A = 6378.1366
+IERS2010_E2 = (2 - 1 / 298.25642) / 298.25642
+
+# Number of samples per refinement round, same as skyfield's find_maxima
+REFINE_SAMPLES = 12
+
+# Coarse maxima lower than this are not refined. The true maximum is at most half a grid
+# step (9 degrees of mean orbital arc) from a sample, which for a circular orbit that just
+# reaches the horizon puts the best sample at most about 3 degrees below it; the rest of the
+# margin is for eccentric orbits, which sweep more than that near perigee.
+MIN_COARSE_ALTITUDE = -10.0
+
+
+def parse_catalog(entries):
+    """
+    Parse the TLEs of a list of catalog entries once.
+    Returns (entries, satrecs) for the entries that have a usable TLE.
+    """
+    parsed_entries = []
+    satrecs = []
+    for entry in entries:
+        tle_line1, tle_line2 = entry.get('TLE_LINE1'), entry.get('TLE_LINE2')
+        if not (tle_line1 and tle_line2):
+            continue
+        try:
+            satrec = Satrec.twoline2rv(tle_line1, tle_line2)
+        except Exception as e:
+            print("Error encountered " + str(e))
+            continue
+        parsed_entries.append(entry)
+        satrecs.append(satrec)
+    return parsed_entries, satrecs
+
+
+def observer_vectors(observer_location):
+    # Earth fixed position (km) and local vertical of the observer on the WGS84 ellipsoid
+    lat = np.radians(observer_location[0])
+    lon = np.radians(observer_location[1])
+    n = WGS84_A / np.sqrt(1.0 - WGS84_E2 * np.sin(lat) ** 2)
+    position = np.array([n * np.cos(lat) * np.cos(lon),
+                         n * np.cos(lat) * np.sin(lon),
+                         n * (1.0 - WGS84_E2) * np.sin(lat)])
+    up = np.array([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+    return position, up
+
+
+def teme_to_earth_fixed(r_teme, jd, fr, dut1):
+    # Rotate TEME positions (..., n_times, 3) into the pseudo Earth fixed frame
+    theta, _ = theta_GMST1982(jd, fr + dut1 / DAY_S)
+    cos_t, sin_t = np.cos(theta), np.sin(theta)
+    x = cos_t * r_teme[..., 0] + sin_t * r_teme[..., 1]
+    y = -sin_t * r_teme[..., 0] + cos_t * r_teme[..., 1]
+    return np.stack((x, y, r_teme[..., 2]), axis=-1)
+
+
+def altitude_degrees(r_fixed, observer_position, observer_up):
+    # Elevation of each position above the observer's horizon
+    offset = r_fixed - observer_position
+    sin_alt = (offset @ observer_up) / np.linalg.norm(offset, axis=-1)
+    return np.degrees(np.arcsin(np.clip(sin_alt, -1.0, 1.0)))
+
+
+def subpoints(r_fixed):
+    # Geodetic latitude, longitude (degrees) and height (km) on the IERS2010 ellipsoid
+    x, y, z = r_fixed[..., 0], r_fixed[..., 1], r_fixed[..., 2]
+    r = np.sqrt(x * x + y * y)
+    lat = np.arctan2(z, r)
+    for _ in range(3):
+        sin_lat = np.sin(lat)
+        a_c = IERS2010_A / np.sqrt(1.0 - IERS2010_E2 * sin_lat * sin_lat)
+        hyp = z + a_c * IERS2010_E2 * sin_lat
+        lat = np.arctan2(hyp, r)
+    lon = (np.arctan2(y, x) - np.pi) % (2 * np.pi) - np.pi
+    height = np.sqrt(hyp * hyp + r * r) - a_c
+    return np.degrees(lat), np.degrees(lon), height
+
+
+def grid_step_days(satrecs):
+    # Same coarse step as skyfield's find_events, taken from the fastest object in the chunk
+    orbits_per_day = max(max(s.no_kozai for s in satrecs) * 1440.0 / (2 * np.pi), 1.0)
+    return min(0.05 / orbits_per_day, 0.25)
+
+
+def time_grid(jd0, fr0, span_days, step_days):
+    # Shared grid with one extra sample outside each end, like skyfield's find_maxima
+    steps = int(span_days / step_days) + 3
+    real_step = span_days / steps
+    fr = fr0 + np.linspace(-real_step, span_days + real_step, steps + 2)
+    return np.full(fr.shape, jd0), fr
+
+
+def coarse_maxima(altitudes):
+    # Indices (object, sample) of every sample at or above both of its neighbours
+    left = altitudes[:, 1:-1] >= altitudes[:, :-2]
+    right = altitudes[:, 1:-1] > altitudes[:, 2:]
+    objects, samples = np.nonzero(left & right)
+    return objects, samples + 1
+
+
+def refine_maxima(satrecs, jd0, fr_left, fr_right, observer_position, observer_up, dut1):
+    # Narrow the brackets around a set of maxima until the samples are half a second apart.
+    # Every bracket comes from the same grid, so they all shrink at the same rate, and a
+    # SatrecArray can propagate them all at once over the same offsets if each object's epoch
+    # is moved back by the start of its bracket. satrecs must be one object per maximum, as
+    # their epochs are changed.
+    alpha = np.linspace(0.0, 1.0, REFINE_SAMPLES)
+    jd = np.full(REFINE_SAMPLES, jd0)
+    rows = np.arange(len(satrecs))
+    valid = np.ones(len(satrecs), dtype=bool)
+    epochs = [satrec.jdsatepochF for satrec in satrecs]
+    width = fr_right[0] - fr_left[0]
+    while True:
+        for satrec, epoch, start in zip(satrecs, epochs, fr_left):
+            satrec.jdsatepochF = epoch - start
+        errors, r_teme, _ = SatrecArray(satrecs).sgp4(jd, width * alpha)
+        valid &= ~errors.any(axis=1)
+        fr = fr_left[:, None] + width * alpha
+        r_fixed = teme_to_earth_fixed(r_teme, jd0, fr, dut1)
+        altitude = altitude_degrees(r_fixed, observer_position, observer_up)
+        i = np.argmax(np.nan_to_num(altitude, nan=-90.0), axis=1)
+        step = width / (REFINE_SAMPLES - 1)
+        if step <= HALF_SECOND:
+            return fr[rows, i], altitude[rows, i], r_fixed[rows, i], valid
+        # Two samples either side of the best one, kept inside the bracket so every new bracket is as wide
+        fr_left = fr[rows, np.clip(i - 1, 0, REFINE_SAMPLES - 3)]
+        width = 2 * step
+
+
+def jd_to_utc_string(jd, fr):
+    # Round to the nearest second like Time.utc_strftime
+    moment = datetime(2000, 1, 1, 12) + timedelta(days=(jd - 2451545.0) + fr)
+    moment = (moment + timedelta(microseconds=500000)).replace(microsecond=0)
+    return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def propagate_chunk(satrecs, jd, fr, observer_position, observer_up, dut1):
+    # Propagate every object of the chunk over the shared grid in one call
+    errors, r_teme, _ = SatrecArray(satrecs).sgp4(jd, fr)
+    r_fixed = teme_to_earth_fixed(r_teme, jd, fr, dut1)
+    altitudes = altitude_degrees(r_fixed, observer_position, observer_up)
+    altitudes[errors != 0] = np.nan
+    return altitudes
+
+
+def batch_next_pass_details(entries, observer_location, radius, start_time, span_days=1.0, chunk_size=1000, progress=None,
+                            distance_mode="screened"):
+    """
+    Vectorized replacement for calling next_pass_details on each entry.
+    Returns a list of (entry, pass_events) with pass_events in the same
+    format as next_pass_details, for every entry (entries without a usable
+    TLE get no passes).
+    """
+    parsed_entries, satrecs = parse_catalog(entries)
+    observer_position, observer_up = observer_vectors(observer_location)
+
+    start_utc = start_time.utc_datetime()
+    jd0, fr0 = jday(start_utc.year, start_utc.month, start_utc.day, start_utc.hour,
+                    start_utc.minute, start_utc.second + start_utc.microsecond / 1e6)
+    dut1 = float(start_time.dut1)
+
+    # Group objects of similar mean motion so each chunk can share one time grid
+    order = sorted(range(len(satrecs)), key=lambda i: satrecs[i].no_kozai)
+    results = [[] for _ in satrecs]
+
+    for chunk_start in range(0, len(order), chunk_size):
+        if progress:
+            progress(chunk_start, len(order))
+        chunk = order[chunk_start:chunk_start + chunk_size]
+        chunk_satrecs = [satrecs[i] for i in chunk]
+        jd, fr = time_grid(jd0, fr0, span_days, grid_step_days(chunk_satrecs))
+        altitudes = propagate_chunk(chunk_satrecs, jd, fr, observer_position, observer_up, dut1)
+
+        objects, samples = coarse_maxima(altitudes)
+        high = altitudes[objects, samples] >= MIN_COARSE_ALTITUDE
+        objects, samples = objects[high], samples[high]
+        if not len(objects):
+            continue
+        # A fresh copy of the object per maximum, since refining moves their epochs
+        copies = [Satrec.twoline2rv(parsed_entries[chunk[obj]]['TLE_LINE1'], parsed_entries[chunk[obj]]['TLE_LINE2'])
+                  for obj in objects]
+        fr_max, altitude, r_fixed, valid = refine_maxima(
+            copies, jd0, fr[samples - 1], fr[samples + 1], observer_position, observer_up, dut1)
+
+        for k, obj in enumerate(objects):
+            # Drop maxima below the horizon or outside the search window
+            if not valid[k] or altitude[k] < 0.0 or fr_max[k] < fr0 or fr_max[k] > fr0 + span_days:
+                continue
+            pass_events = results[chunk[obj]]
+            if pass_events and fr_max[k] - pass_events[-1][0] <= HALF_SECOND:
+                continue
+            pass_events.append((fr_max[k], r_fixed[k]))
+
+    events_by_entry = {id(entry): sorted(events, key=lambda event: event[0]) for entry, events in zip(parsed_entries, results)}
+
+    # Subpoints and distances of every culmination in the catalog at once
+    first_event = {}
+    all_events = []
+    for key, events in events_by_entry.items():
+        first_event[key] = len(all_events)
+        all_events.extend(events)
+    if all_events:
+        latitudes, longitudes, altitudes_km = subpoints(np.array([r_fixed for fr_max, r_fixed in all_events]))
+        distances_km = geo_distance.distances_km(observer_location, latitudes, longitudes, mode=distance_mode, radius=radius)
+
+    pass_details = []
+    for entry in entries:
+        pass_events = []
+        for k, (fr_max, r_fixed) in enumerate(events_by_entry.get(id(entry), [])):
+            i = first_event[id(entry)] + k
+            altitude_km, distance_km = altitudes_km[i], distances_km[i]
+            if distance_km > radius:  # Exclude satellites too far away
+                continue
+            pass_events.append({
+                'culmination_time': jd_to_utc_string(jd0, fr_max),
+                'altitude_km': float(altitude_km),
+                'distance_km': float(distance_km)
+            })
+        pass_details.append((entry, pass_events))
+    return pass_details
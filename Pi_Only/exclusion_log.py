@@ -0,0 +1,82 @@
+import os
+from datetime import datetime
+
+import filter_pipeline
+import orbit_screen
+import tle_validity
+
+# Why each object was dropped from the pass table, one line per object:
+#
+#   OBJECT_ID <tab> NORAD_CAT_ID <tab> CODE
+#
+# after a "# run <time>" line, with a "# counts CODE=n ..." line when the run
+# closes the log. Lines are buffered and written buffer_lines at a time, and
+# once the file is past max_bytes it is renamed to <filename>.1 (replacing the
+# previous one) and a new file is started.
+
+DECAYED = "DECAYED"
+LOW_INCLINATION = "LOW_INCLINATION"
+UNPARSEABLE_TLE = "UNPARSEABLE_TLE"
+DECAYED_ELEMENTS = "DECAYED_ELEMENTS"
+PROPAGATION_ERROR = "PROPAGATION_ERROR"
+OBJECT_TYPE = "OBJECT_TYPE"
+EPOCH_AGE = "EPOCH_AGE"
+HIGH_PERIGEE = "HIGH_PERIGEE"
+BELOW_SURFACE = "BELOW_SURFACE"
+OUTSIDE_LATITUDE_BAND = "OUTSIDE_LATITUDE_BAND"
+OUTSIDE_LONGITUDE_BAND = "OUTSIDE_LONGITUDE_BAND"
+MISSING_TLE = "MISSING_TLE"
+NO_PASS = "NO_PASS"
+CODES = [DECAYED, LOW_INCLINATION, UNPARSEABLE_TLE, DECAYED_ELEMENTS, PROPAGATION_ERROR, OBJECT_TYPE, EPOCH_AGE, HIGH_PERIGEE, BELOW_SURFACE, OUTSIDE_LATITUDE_BAND, OUTSIDE_LONGITUDE_BAND, MISSING_TLE, NO_PASS]
+
+# filter_pipeline's, tle_validity's and orbit_screen's rules by code
+FILTER_CODES = {
+    filter_pipeline.DECAYED: DECAYED,
+    filter_pipeline.OBJECT_TYPE: OBJECT_TYPE,
+    filter_pipeline.EPOCH_AGE: EPOCH_AGE,
+    filter_pipeline.LOW_INCLINATION: LOW_INCLINATION,
+    filter_pipeline.HIGH_PERIGEE: HIGH_PERIGEE,
+}
+TLE_VALIDITY_CODES = {
+    tle_validity.UNPARSEABLE: UNPARSEABLE_TLE,
+    tle_validity.DECAYED_ELEMENTS: DECAYED_ELEMENTS,
+    tle_validity.PROPAGATION_ERROR: PROPAGATION_ERROR,
+}
+ORBIT_SCREEN_CODES = {
+    orbit_screen.BELOW_SURFACE: BELOW_SURFACE,
+    orbit_screen.OUTSIDE_LATITUDE_BAND: OUTSIDE_LATITUDE_BAND,
+    orbit_screen.OUTSIDE_LONGITUDE_BAND: OUTSIDE_LONGITUDE_BAND,
+}
+
+
+class ExclusionLog:
+    def __init__(self, filename='exclusion_log.txt', max_bytes=2000000, buffer_lines=5000):
+        self.filename = filename
+        self.max_bytes = max_bytes
+        self.buffer_lines = buffer_lines
+        self.lines = [f"# run {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')}\n"]
+        self.counts = {code: 0 for code in CODES}
+
+    def log(self, debris, code):
+        self.lines.append(f"{debris.get('OBJECT_ID', 'Unknown ID')}\t{debris.get('NORAD_CAT_ID', '')}\t{code}\n")
+        self.counts[code] = self.counts.get(code, 0) + 1
+        if len(self.lines) >= self.buffer_lines:
+            self.flush()
+
+    def flush(self):
+        if not self.lines:
+            return
+        if os.path.exists(self.filename) and os.path.getsize(self.filename) > self.max_bytes:
+            os.replace(self.filename, self.filename + '.1')
+        with open(self.filename, 'a') as log_file:
+            log_file.write(''.join(self.lines))
+        self.lines = []
+
+    def summary(self):
+        return ', '.join(f"{code} {count}" for code, count in self.counts.items() if count)
+
+    def close(self):
+        # Write out what is buffered with the run's counts and print them
+        self.lines.append("# counts " + ' '.join(f"{code}={count}" for code, count in self.counts.items()) + "\n")
+        self.flush()
+        print(f"\n Excluded {sum(self.counts.values())} objects: {self.summary() or 'none'}")
@@ -0,0 +1,116 @@
+import csv
+from datetime import datetime, timedelta
+
+# Streaming download of the GP catalog in a compact format.
+#
+#   "csv"  asks space-track for just PIPELINE_FIELDS (the predicates/ part of
+#          the query) as CSV. Records come out like the JSON ones, strings
+#          throughout and None for empty fields, with only those keys.
+#   "3le"  name line plus the two TLE lines, the smallest download. Everything
+#          but the name and the TLE itself is worked out from the lines:
+#          OBJECT_TYPE is guessed from the name (DEB, R/B), and RCS_SIZE,
+#          DECAY_DATE and CREATION_DATE are missing, so catalog_sync falls back
+#          to a full download every time.
+#
+# Either way the response is parsed line by line as it arrives, and keep(record)
+# can drop records before they are ever stored.
+
+PIPELINE_FIELDS = [
+    'NORAD_CAT_ID', 'OBJECT_ID', 'OBJECT_NAME', 'OBJECT_TYPE', 'RCS_SIZE',
+    'EPOCH', 'CREATION_DATE', 'DECAY_DATE',
+    'INCLINATION', 'ECCENTRICITY', 'MEAN_MOTION', 'PERIAPSIS',
+    'TLE_LINE1', 'TLE_LINE2',
+]
+FORMATS = ["csv", "3le"]
+
+
+def compact_query(url, ingest_format="csv", fields=PIPELINE_FIELDS):
+    # Turn a .../format/json query into the same query in the compact format
+    base = url[:url.rindex('/format/')]
+    if ingest_format == "csv":
+        return f"{base}/predicates/{','.join(fields)}/format/csv"
+    if ingest_format == "3le":
+        return f"{base}/format/3le"
+    raise ValueError(f"Unknown ingest format {ingest_format!r}, expected one of {FORMATS}")
+
+
+def parse_csv(lines):
+    for row in csv.DictReader(lines):
+        yield {field: (value if value != '' else None) for field, value in row.items()}
+
+
+def tle_epoch_iso(tle_line1):
+    # YYDDD.DDDDDDDD -> 2024-08-25T12:34:56.123456
+    year = int(tle_line1[18:20])
+    year += 2000 if year < 57 else 1900
+    day = float(tle_line1[20:32])
+    return (datetime(year, 1, 1) + timedelta(days=day - 1)).strftime('%Y-%m-%dT%H:%M:%S.%f')
+
+
+def international_designator(tle_line1):
+    # 98067A -> 1998-067A
+    designator = tle_line1[9:17].strip()
+    if len(designator) < 3:
+        return None
+    year = int(designator[:2])
+    return f"{2000 + year if year < 57 else 1900 + year}-{designator[2:]}"
+
+
+def object_type_from_name(name):
+    words = name.replace(',', ' ').split()
+    if 'DEB' in words:
+        return 'DEBRIS'
+    if 'R/B' in words:
+        return 'ROCKET BODY'
+    if 'TBA' in words or not words:
+        return 'UNKNOWN'
+    return 'PAYLOAD'
+
+
+def parse_3le(lines):
+    name = None
+    tle_line1 = None
+    for line in lines:
+        line = line.rstrip()
+        if line.startswith('0 '):
+            name = line[2:].strip()
+        elif line.startswith('1 '):
+            tle_line1 = line
+        elif line.startswith('2 ') and tle_line1 is not None:
+            tle_line2 = line
+            yield {
+                'NORAD_CAT_ID': tle_line1[2:7].strip(),
+                'OBJECT_ID': international_designator(tle_line1),
+                'OBJECT_NAME': name,
+                'OBJECT_TYPE': object_type_from_name(name or ''),
+                'RCS_SIZE': None,
+                'EPOCH': tle_epoch_iso(tle_line1),
+                'CREATION_DATE': None,
+                'DECAY_DATE': None,
+                'INCLINATION': tle_line2[8:16].strip(),
+                'ECCENTRICITY': '0.' + tle_line2[26:33].strip(),
+                'MEAN_MOTION': tle_line2[52:63].strip(),
+                'TLE_LINE1': tle_line1,
+                'TLE_LINE2': tle_line2,
+            }
+            name = tle_line1 = None
+
+
+def fetch_records(session, url, ingest_format="csv", keep=None):
+    """
+    Download the query in url (written for format/json) in ingest_format and
+    return its records, parsed as the response streams in. keep(record),
+    if given, decides which records are stored. Returns None if the server
+    request fails.
+    """
+    response = session.get(compact_query(url, ingest_format), stream=True)
+    if response.status_code != 200:
+        print(f"Failed to retrieve data. Status Code: {response.status_code}")
+        return None
+    if response.encoding is None:
+        response.encoding = 'utf-8'
+    lines = response.iter_lines(chunk_size=65536, decode_unicode=True)
+    parse = parse_csv if ingest_format == "csv" else parse_3le
+    records = [record for record in parse(lines) if keep is None or keep(record)]
+    response.close()
+    return records
@@ -0,0 +1,205 @@
+import json
+import math
+import sys
+import numpy as np
+from sgp4.api import jday
+from skyfield.api import load
+from pass_search import next_pass_details
+
+MU = 398600.4418  # Earth's gravitational parameter, km^3/s^2
+EARTH_RADIUS_KM = 6378.137
+EARTH_POLAR_RADIUS_KM = 6356.752
+MEAN_EARTH_RADIUS_KM = 6371.0
+
+# Slack for the difference between the mean inclination and the geodetic latitude of the subpoint
+LATITUDE_MARGIN_DEG = 1.0
+
+SIDEREAL_REVS_PER_DAY = 1.00273790935
+# Slack for the mean longitude of a slow object drifting away from the two-body prediction:
+# a fixed part for the sampled wander and the sphere, and a part per day from the element
+# epoch for J2, the Sun and Moon and the Kozai/Brouwer mean motion difference
+LONGITUDE_MARGIN_DEG = 2.0
+LONGITUDE_DRIFT_DEG_PER_DAY = 0.1
+
+# Rejection rules, in the order they are checked
+BELOW_SURFACE = "Orbit below surface"
+OUTSIDE_LATITUDE_BAND = "Ground track outside latitude band"
+OUTSIDE_LONGITUDE_BAND = "Ground track outside longitude band"
+RULES = [BELOW_SURFACE, OUTSIDE_LATITUDE_BAND, OUTSIDE_LONGITUDE_BAND]
+
+
+def orbit_heights(entry):
+    """
+    Perigee and apogee height in km from the mean motion and eccentricity.
+    Returns None if the elements are missing.
+    """
+    try:
+        mean_motion = float(entry['MEAN_MOTION'])  # revolutions per day
+        eccentricity = float(entry['ECCENTRICITY'])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if mean_motion <= 0:
+        return None
+    n = mean_motion * 2 * math.pi / 86400.0  # rad/s
+    semi_major_axis = (MU / (n * n)) ** (1.0 / 3.0)
+    perigee = semi_major_axis * (1 - eccentricity) - EARTH_RADIUS_KM
+    apogee = semi_major_axis * (1 + eccentricity) - EARTH_RADIUS_KM
+    return perigee, apogee
+
+
+def footprint_angle(height_km):
+    # Earth central angle (radians) out to where an object at this height sits on the horizon
+    return math.acos(EARTH_RADIUS_KM / (EARTH_RADIUS_KM + height_km))
+
+
+def tle_elements(entry):
+    """
+    Epoch (Julian date) and the angles of the TLE in degrees: inclination,
+    right ascension of the node, argument of perigee and mean anomaly.
+    Returns None if the TLE is missing or unreadable.
+    """
+    try:
+        tle_line1, tle_line2 = entry['TLE_LINE1'], entry['TLE_LINE2']
+        year = int(tle_line1[18:20])
+        jd, fr = jday(2000 + year if year < 57 else 1900 + year, 1, 1, 0, 0, 0)
+        epoch = jd + fr + float(tle_line1[20:32]) - 1
+        return epoch, float(tle_line2[8:16]), float(tle_line2[17:25]), float(tle_line2[34:42]), float(tle_line2[43:51])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def gmst_degrees(jd_ut1):
+    return (280.46061837 + 360.98564736629 * (jd_ut1 - 2451545.0)) % 360.0
+
+
+def longitude_wander(eccentricity, inclination, arg_perigee):
+    # Furthest the subpoint's longitude gets (degrees) from the mean longitude over one two-body
+    # orbit: the equation of centre plus the reduction of the orbit plane to the equator
+    nu = np.linspace(0.0, 2 * np.pi, 721)
+    e_anomaly = 2 * np.arctan2(np.sqrt(1 - eccentricity) * np.sin(nu / 2), np.sqrt(1 + eccentricity) * np.cos(nu / 2))
+    mean_anomaly = e_anomaly - eccentricity * np.sin(e_anomaly)
+    u = np.radians(arg_perigee) + nu
+    right_ascension = np.arctan2(np.cos(np.radians(inclination)) * np.sin(u), np.cos(u))
+    offset = (right_ascension - (np.radians(arg_perigee) + mean_anomaly) + np.pi) % (2 * np.pi) - np.pi
+    return math.degrees(np.abs(offset).max())
+
+
+def longitude_reason(entry, observer_location, reach, window):
+    # A slow object's subpoint stays near its mean longitude, which drifts at the difference between
+    # its mean motion and the Earth's rotation; over a short window that can leave whole bands of
+    # longitude out of reach
+    elements = tle_elements(entry)
+    if elements is None:
+        return None
+    epoch, inclination, node, arg_perigee, mean_anomaly = elements
+    mean_motion, eccentricity = float(entry['MEAN_MOTION']), float(entry['ECCENTRICITY'])
+    start, end = window
+    drift = (mean_motion - SIDEREAL_REVS_PER_DAY) * 360.0 * (end - start)
+    if abs(drift) >= 360.0:
+        return None
+    # Longitude either side of the observer's that still has a point within reach of the observer
+    cos_latitude = math.cos(math.radians(observer_location[0]))
+    longitude_reach = 90.0 if math.sin(reach) >= cos_latitude else math.degrees(math.asin(math.sin(reach) / cos_latitude))
+    slack = (longitude_wander(eccentricity, inclination, arg_perigee) + longitude_reach + LONGITUDE_MARGIN_DEG
+             + LONGITUDE_DRIFT_DEG_PER_DAY * max(abs(start - epoch), abs(end - epoch)))
+    if abs(drift) + 2 * slack >= 360.0:
+        return None
+    mean_longitude = (node + arg_perigee + mean_anomaly + 360.0 * mean_motion * (start - epoch) - gmst_degrees(start))
+    west = mean_longitude + min(drift, 0.0) - slack
+    if (observer_location[1] - west) % 360.0 > abs(drift) + 2 * slack:
+        return OUTSIDE_LONGITUDE_BAND
+    return None
+
+
+def screen_reason(entry, observer_location, radius, window=None):
+    """
+    Return the rule that rules out any pass of this object within radius,
+    or None if the object has to go through the full search. window is the
+    (start, end) Julian dates searched; without it only the rules that hold
+    for all time are checked.
+    """
+    heights = orbit_heights(entry)
+    if heights is None:
+        return None
+    apogee = heights[1]
+
+    # Never above the ellipsoid, so never above anyone's horizon
+    if apogee + EARTH_RADIUS_KM < EARTH_POLAR_RADIUS_KM:
+        return BELOW_SURFACE
+
+    # The subpoint can get no further from the equator than the inclination (or 180 - i
+    # for retrograde orbits). A culmination counts only if it is above the horizon and
+    # its subpoint is within radius, so the reach is the smaller of the two.
+    try:
+        inclination = float(entry['INCLINATION'])
+    except (KeyError, TypeError, ValueError):
+        return None
+    max_latitude = inclination if inclination <= 90 else 180 - inclination
+    reach = min(radius / MEAN_EARTH_RADIUS_KM, footprint_angle(max(apogee, 0.0)))
+    if max_latitude + math.degrees(reach) + LATITUDE_MARGIN_DEG < abs(observer_location[0]):
+        return OUTSIDE_LATITUDE_BAND
+
+    if window is not None:
+        return longitude_reason(entry, observer_location, reach, window)
+    return None
+
+
+def search_window(start_time, span_days):
+    # (start, end) Julian dates of a search from a skyfield Time
+    return start_time.ut1, start_time.ut1 + span_days
+
+
+def screen_catalog(entries, observer_location, radius, start_time=None, span_days=1.0):
+    """
+    Split entries into the ones that still need the pass search and the
+    ones that can never pass. Returns (kept, rejected, counters) where
+    rejected is a list of (entry, rule) and counters counts each rule.
+    With the start_time (skyfield Time) and span_days of the search,
+    objects whose ground track cannot get near the observer within that
+    window are rejected too.
+    """
+    kept = []
+    rejected = []
+    counters = {rule: 0 for rule in RULES}
+    window = search_window(start_time, span_days) if start_time is not None else None
+    for entry in entries:
+        reason = screen_reason(entry, observer_location, radius, window)
+        if reason is None:
+            kept.append(entry)
+        else:
+            rejected.append((entry, reason))
+            counters[reason] += 1
+    return kept, rejected, counters
+
+
+def validate_screen(entries, observer_location, radius, start_time, span_days=1.0):
+    """
+    Run the full pass search on every entry the screen rejects.
+    Returns the (entry, rule, pass_events) that the screen got wrong,
+    which should always be an empty list.
+    """
+    kept, rejected, counters = screen_catalog(entries, observer_location, radius, start_time, span_days)
+    misses = []
+    for entry, reason in rejected:
+        pass_events = next_pass_details(entry['TLE_LINE1'], entry['TLE_LINE2'], observer_location, radius, start_time,
+                                        start_time + span_days)
+        if pass_events:
+            misses.append((entry, reason, pass_events))
+    return misses
+
+
+if __name__ == "__main__":
+    # python orbit_screen.py data.json 29.76303 -95.362061 300
+    with open(sys.argv[1], 'r') as file:
+        catalog = json.load(file).get("data", [])
+    location = (float(sys.argv[2]), float(sys.argv[3]))
+    search_radius = float(sys.argv[4])
+    catalog = [entry for entry in catalog if entry.get('TLE_LINE1') and entry.get('TLE_LINE2')]
+
+    now = load.timescale().now()
+    kept, rejected, counters = screen_catalog(catalog, location, search_radius, now)
+    print(f"{len(kept)} kept, {len(rejected)} rejected: {counters}")
+    misses = validate_screen(catalog, location, search_radius, now)
+    for entry, reason, pass_events in misses:
+        print(f"{entry.get('OBJECT_ID')} rejected by '{reason}' but has {len(pass_events)} passes")
+    print(f"{len(misses)} objects rejected that the full search would have kept")
@@ -0,0 +1,121 @@
+import json
+import os
+from datetime import datetime, timedelta
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Passes are searched out to the full turn of acquireData's radius knob and the radius
+# of the run is applied when they are read, so turning the knob keeps the cache
+CACHE_RADIUS_KM = 500.0
+
+# Culminations of one object closer together than this are the same pass, found from
+# both sides of the boundary between two searches
+SAME_PASS_SECONDS = 60
+
+
+def object_key(entry):
+    return str(entry.get('NORAD_CAT_ID') or entry.get('OBJECT_ID'))
+
+
+def tle_epoch(entry):
+    # Epoch field of TLE line 1 (YYDDD.DDDDDDDD)
+    return entry['TLE_LINE1'][18:32]
+
+
+def load_cache(filename, header):
+    # A cache written for another observer, search radius or horizon is worthless
+    if not os.path.exists(filename):
+        return {}
+    with open(filename, 'r') as file:
+        saved_cache = json.load(file)
+    if saved_cache.get("header") != header:
+        print("Pass cache was built for other search settings, starting over.")
+        return {}
+    return saved_cache.get("objects", {})
+
+
+def save_cache(filename, header, objects):
+    with open(filename, 'w') as file:
+        json.dump({"header": header, "objects": objects}, file)
+
+
+def merge_passes(passes, new_passes):
+    # Add new_passes to passes, leaving out the ones passes already holds
+    times = [datetime.strptime(event['culmination_time'], TIME_FORMAT) for event in passes]
+    merged = list(passes)
+    for event in new_passes:
+        time = datetime.strptime(event['culmination_time'], TIME_FORMAT)
+        if all(abs((time - other).total_seconds()) > SAME_PASS_SECONDS for other in times):
+            merged.append(event)
+            times.append(time)
+    return merged
+
+
+def cached_pass_details(entries, observer_location, radius, start_time, search, filename='pass_cache.json', horizon=timedelta(days=1)):
+    """
+    Pass search with a persistent cache keyed by (object, TLE epoch,
+    observer location, horizon). search(entries, start_time, end_time,
+    radius) is the underlying search and must return (entry, pass_events)
+    for every entry. The cache holds the passes out to CACHE_RADIUS_KM (or
+    radius, if larger) and only the ones within radius are returned.
+    Objects with new elements are searched over the whole horizon,
+    unchanged ones only over the part of the window that has opened up
+    since the last run. Returns (entry, pass_events) for every entry,
+    like search.
+    """
+    ts = start_time.ts
+    end_time = start_time + horizon
+    now_str = start_time.utc_strftime(TIME_FORMAT)
+    search_radius = max(radius, CACHE_RADIUS_KM)
+    header = {
+        "observer": list(observer_location),
+        "search_radius": search_radius,
+        "horizon_days": horizon.total_seconds() / 86400.0
+    }
+    cached_objects = load_cache(filename, header)
+
+    full_search = []
+    extend_search = {}  # searched_until -> entries
+    for entry in entries:
+        cached = cached_objects.get(object_key(entry))
+        if cached is None or cached["tle_epoch"] != tle_epoch(entry) or cached["searched_until"] < start_time.tt:
+            full_search.append(entry)
+        elif cached["searched_until"] < end_time.tt:
+            extend_search.setdefault(cached["searched_until"], []).append(entry)
+
+    new_passes = {}
+    if full_search:
+        for entry, pass_events in search(full_search, start_time, end_time, search_radius):
+            new_passes[id(entry)] = pass_events
+    extended = 0
+    for searched_until, group in extend_search.items():
+        extended += len(group)
+        for entry, pass_events in search(group, ts.tt_jd(searched_until), end_time, search_radius):
+            new_passes[id(entry)] = pass_events
+    print(f"\n Pass cache: {len(full_search)} objects searched, {extended} extended, "
+          f"{len(entries) - len(full_search) - extended} reused")
+
+    # Rebuild the cache from the current entries, which also evicts objects
+    # that have left the catalog and passes that have already happened
+    full_ids = {id(entry) for entry in full_search}
+    objects = {}
+    pass_results = []
+    for entry in entries:
+        key = object_key(entry)
+        if id(entry) in full_ids:
+            pass_events = new_passes.get(id(entry), [])
+            searched_until = end_time.tt
+        else:
+            cached = cached_objects[key]
+            pass_events = [event for event in cached["passes"] if event['culmination_time'] >= now_str]
+            pass_events = merge_passes(pass_events, new_passes.get(id(entry), []))
+            searched_until = max(end_time.tt, cached["searched_until"])
+        objects[key] = {
+            "tle_epoch": tle_epoch(entry),
+            "searched_until": searched_until,
+            "passes": pass_events
+        }
+        pass_results.append((entry, [event for event in pass_events if event['distance_km'] <= radius]))
+
+    save_cache(filename, header, objects)
+    return pass_results
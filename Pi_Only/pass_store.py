@@ -0,0 +1,146 @@
+import calendar
+import json
+import mmap
+import os
+import struct
+import sys
+from datetime import datetime, timezone
+
+import numpy as np
+
+# Compact binary pass table, written by acquireData.py and memory-mapped by main.py.
+#
+#   header   MAGIC, version, record count, last_updated (unix seconds)
+#   records  PASS_DTYPE, sorted by culmination time
+#   objects  JSON list of [object_id, object_name], indexed by the 'object' column
+
+MAGIC = b'SCPT'
+VERSION = 1
+HEADER = struct.Struct('<4sHxxIq')
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+PASS_DTYPE = np.dtype([
+    ('culmination', '<i8'),  # unix seconds, UTC
+    ('altitude_km', '<f8'),
+    ('distance_km', '<f8'),
+    ('rcs', 'u1'),           # index into RCS_CODES
+    ('object', '<u4'),       # index into the object table
+])
+
+RCS_CODES = [None, 'SMALL', 'MEDIUM', 'LARGE']
+
+
+def to_epoch(time_string):
+    return calendar.timegm(datetime.strptime(time_string, TIME_FORMAT).timetuple())
+
+
+def from_epoch(epoch):
+    return datetime.fromtimestamp(int(epoch), timezone.utc).replace(tzinfo=None).strftime(TIME_FORMAT)
+
+
+def rcs_code(rcs):
+    return RCS_CODES.index(rcs) if rcs in RCS_CODES else 0
+
+
+class PassTable:
+    """
+    Read-only view of a pass store. The records stay in the mapped file;
+    indexing or iterating gives dicts in the debris_data.json format.
+    """
+
+    def __init__(self, records, objects, last_updated):
+        self.records = records
+        self.objects = objects
+        self.last_updated = last_updated
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, index):
+        record = self.records[index]
+        object_id, object_name = self.objects[record['object']]
+        return {
+            'object_id': object_id,
+            'object_name': object_name,
+            'rcs': RCS_CODES[record['rcs']],
+            'culmination_time': from_epoch(record['culmination']),
+            'altitude_km': float(record['altitude_km']),
+            'distance_km': float(record['distance_km'])
+        }
+
+    def __iter__(self):
+        for index in range(len(self.records)):
+            yield self[index]
+
+    def since(self, epoch):
+        # Passes culminating after epoch, as a view on the same mapping
+        start = np.searchsorted(self.records['culmination'], epoch, side='right')
+        return PassTable(self.records[start:], self.objects, self.last_updated)
+
+
+def write_pass_store(filename, passes, last_updated):
+    """
+    Write passes (dicts in the debris_data.json format) to filename.
+    The file is written next to the target and renamed over it, so a
+    reader that has the old file mapped keeps a consistent copy.
+    """
+    object_index = {}
+    objects = []
+    records = np.zeros(len(passes), dtype=PASS_DTYPE)
+    for i, debris in enumerate(passes):
+        key = (debris['object_id'], debris['object_name'])
+        if key not in object_index:
+            object_index[key] = len(objects)
+            objects.append(list(key))
+        records[i] = (to_epoch(debris['culmination_time']), debris['altitude_km'], debris['distance_km'],
+                      rcs_code(debris['rcs']), object_index[key])
+    records = records[np.argsort(records['culmination'], kind='stable')]
+
+    temp_filename = filename + '.tmp'
+    with open(temp_filename, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(records), to_epoch(last_updated)))
+        file.write(records.tobytes())
+        file.write(json.dumps(objects).encode('utf-8'))
+    os.replace(temp_filename, filename)
+
+
+def publish_json(filename, data):
+    # Same temp file and rename as write_pass_store, for the JSON pass table
+    temp_filename = filename + '.tmp'
+    with open(temp_filename, 'w') as file:
+        json.dump(data, file, indent=4)
+    os.replace(temp_filename, filename)
+
+
+def open_pass_store(filename):
+    with open(filename, 'rb') as file:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, count, last_updated = HEADER.unpack_from(mapped, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{filename} is not a version {VERSION} pass store")
+    records = np.frombuffer(mapped, dtype=PASS_DTYPE, count=count, offset=HEADER.size)
+    objects = json.loads(mapped[HEADER.size + count * PASS_DTYPE.itemsize:].decode('utf-8'))
+    return PassTable(records, objects, from_epoch(last_updated))
+
+
+def json_to_store(json_filename, store_filename):
+    with open(json_filename, 'r') as file:
+        full_data = json.load(file)
+    write_pass_store(store_filename, full_data.get('data', []), full_data.get('last_updated'))
+
+
+def store_to_json(store_filename, json_filename):
+    table = open_pass_store(store_filename)
+    with open(json_filename, 'w') as file:
+        json.dump({"last_updated": table.last_updated, "data": list(table)}, file, indent=4)
+
+
+if __name__ == "__main__":
+    # python pass_store.py to-store debris_data.json debris_data.pass
+    # python pass_store.py to-json debris_data.pass debris_data.json
+    if sys.argv[1] == 'to-store':
+        json_to_store(sys.argv[2], sys.argv[3])
+    elif sys.argv[1] == 'to-json':
+        store_to_json(sys.argv[2], sys.argv[3])
+    else:
+        print("usage: pass_store.py to-store|to-json <source> <destination>")